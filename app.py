@@ -1,331 +1,63 @@
 # =========================
 # app.py (PART 1/6)
 # =========================
-import os, re, json, hashlib, secrets
+import os, re, secrets
 from datetime import datetime, timedelta, time as dtime
 from zoneinfo import ZoneInfo
-from urllib.parse import urlparse
-import zipfile
-from io import BytesIO
 
 import pandas as pd
-import requests
 import streamlit as st
 
-st.set_page_config(page_title="⚽ Prediction Game", layout="wide")
+from prediction_core.settings import TENANTS, secret, tenant_data_dir
+from prediction_core.game import use_game
+from prediction_core.i18n import tr
+from prediction_core.instrument import (PERF_SLOW_RERUN_MS, PERF_WINDOW_MINUTES, _metrics_exporter, _perf_store,
+                                        metrics_inc, metrics_register_files, perf_rerun, perf_reset, perf_span,
+                                        perf_summary)
+from prediction_core.storage import (_file_sig, cache_logo_from_url, ensure_history_schema, get_saved_logo, load_csv,
+                                     load_overrides, normalize_digits, save_csv, save_overrides, save_team_logo,
+                                     save_uploaded_logo, to_utc_series)
+from prediction_core.accounts import (USER_COLS, _hash_pin, _user_key, _users_index, _verify_pin, add_user,
+                                      create_league, find_user, invalidate_users_index, join_league,
+                                      league_leaderboard, league_member_names, leave_league, otp_generate, otp_revoke,
+                                      otp_validate, remove_user, throttle_acquire, throttle_result, throttle_snapshot,
+                                      update_user, user_exists, user_leagues, users_version)
+from prediction_core.scoring import (LEADERBOARD_TOP_K, PREDICTION_AUDIT_COLS, RankedBoard, _parse_score,
+                                     _winner_from_score, append_prediction, compact_predictions,
+                                     effective_prediction_rows, leaderboard_as_of, leaderboard_slice,
+                                     leaderboard_snapshots, materialized_leaderboard, movement_arrow, points_cube,
+                                     predictions_compacted, rank_medal, rank_movement, ranked_leaderboard,
+                                     rebuild_leaderboard_history, record_leaderboard_snapshot, save_predictions,
+                                     split_match_name)
+from prediction_core.backup import (SNAPSHOT_INTERVAL_MINUTES, SNAPSHOT_KEEP_DAILY, SNAPSHOT_KEEP_HOURLY,
+                                    SNAPSHOT_KEEP_RECENT, _backup_target, _snapshot_scheduler, _upload_worker,
+                                    close_season, create_backup_zip, enqueue_backup_upload, list_seasons,
+                                    list_snapshots, list_upload_jobs, load_season_archive, restore_from_zip,
+                                    restore_snapshot, retry_failed_uploads, take_snapshot)
+from prediction_core.standings import STANDINGS_CHECK_SECONDS, _standings_publisher, publish_standings, standings_status
+from prediction_core.feed import _feed_exporter
 
-DATA_DIR = "."
-USERS_FILE         = os.path.join(DATA_DIR, "users.csv")
-MATCHES_FILE       = os.path.join(DATA_DIR, "matches.csv")
-MATCH_HISTORY_FILE = os.path.join(DATA_DIR, "match_history.csv")
-PREDICTIONS_FILE   = os.path.join(DATA_DIR, "predictions.csv")
-LEADERBOARD_FILE   = os.path.join(DATA_DIR, "leaderboard.csv")
-SEASON_FILE        = os.path.join(DATA_DIR, "season.txt")
-TEAM_LOGOS_FILE    = os.path.join(DATA_DIR, "team_logos.json")
-LOGO_DIR           = os.path.join(DATA_DIR, "logos")
-os.makedirs(LOGO_DIR, exist_ok=True)
-
-LEADERBOARD_OVERRIDES_FILE = os.path.join(DATA_DIR, "leaderboard_overrides.csv")
-OTP_FILE = os.path.join(DATA_DIR, "otp.csv")
-
-ADMIN_PASSWORD = "madness"
-
-BACKUP_FILES = [
-    USERS_FILE,
-    MATCHES_FILE,
-    MATCH_HISTORY_FILE,
-    PREDICTIONS_FILE,
-    LEADERBOARD_FILE,
-    SEASON_FILE,
-    TEAM_LOGOS_FILE,
-    LEADERBOARD_OVERRIDES_FILE,
-    OTP_FILE,
-]
-
-def create_backup_zip() -> BytesIO:
-    buf = BytesIO()
-    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as z:
-        for path in BACKUP_FILES:
-            try:
-                if os.path.exists(path):
-                    z.write(path, arcname=os.path.basename(path))
-            except Exception:
-                pass
-    buf.seek(0)
-    return buf
-
-def restore_from_zip(filelike) -> None:
-    filelike.seek(0)
-    with zipfile.ZipFile(filelike, "r") as z:
-        allowed = {os.path.basename(p) for p in BACKUP_FILES}
-        for member in z.namelist():
-            base = os.path.basename(member)
-            if base in allowed:
-                try:
-                    target = os.path.join(DATA_DIR, base)
-                    with z.open(member) as src, open(target, "wb") as dst:
-                        dst.write(src.read())
-                except Exception:
-                    pass
+st.set_page_config(page_title="⚽ Prediction Game", layout="wide")
 
-def _get_supabase_client():
+# The game logic lives in prediction_core (no Streamlit there); this file is
+# the UI. Each rerun picks its game from ?game= (or DEFAULT_TENANT) and
+# selects it with use_game() before any page code runs.
+TENANT_ID = ""
+if TENANTS:
     try:
-        from supabase import create_client
-        url = st.secrets.get("SUPABASE_URL")
-        key = st.secrets.get("SUPABASE_SERVICE_ROLE") or st.secrets.get("SUPABASE_ANON_KEY")
-        if not url or not key:
-            return None
-        return create_client(url, key)
+        TENANT_ID = str(st.query_params.get("game") or secret("DEFAULT_TENANT", "") or "").strip()
     except Exception:
-        return None
+        TENANT_ID = str(secret("DEFAULT_TENANT", "") or "").strip()
+TENANT = TENANTS.get(TENANT_ID, {})
 
-def upload_backup_to_supabase(buf: BytesIO, bucket: str = "backups") -> str | None:
-    sb = _get_supabase_client()
-    if not sb:
-        return None
-    try:
-        sb.storage.create_bucket(bucket, public=False)
-    except Exception:
-        pass
-    ts = datetime.now(ZoneInfo("UTC")).strftime("%Y%m%d_%H%M%S")
-    key = f"prediction_backups/backup_{ts}.zip"
-    try:
-        sb.storage.from_(bucket).upload(key, buf.getvalue(), {"content-type": "application/zip"})
-        return f"{bucket}/{key}"
-    except Exception:
-        return None
+DATA_DIR = tenant_data_dir(TENANT_ID)
+GAME = use_game(DATA_DIR, TENANT_ID if TENANT_ID in TENANTS else "")
+
+ADMIN_PASSWORD = str(TENANT.get("admin_password") or secret("ADMIN_PASSWORD", "madness"))
 
-LANG = {
-    "en": {
-        "app_title": "⚽ Prediction Game",
-        "sidebar_time": "⏱️ Time & Settings",
-        "sidebar_lang": "Language",
-        "lang_en": "English",
-        "lang_ar": "العربية",
-        "app_timezone": "App Timezone",
-        "login_tab": "Login",
-        "user_login": "User Login",
-        "admin_login": "Admin Login",
-        "your_name": "Your Name",
-        "admin_pass": "Admin Password",
-        "login": "Login",
-        "register": "Register",
-        "login_ok": "Logged in.",
-        "admin_ok": "Admin authenticated.",
-        "admin_bad": "Wrong password.",
-        "need_name": "Please enter a name.",
-        "please_login_first": "Please log in first",
-        "tab_play": "Play",
-        "tab_leaderboard": "Leaderboard",
-        "tab_admin": "Admin",
-        "no_matches": "No matches yet.",
-        "kickoff": "Kickoff",
-        "opens_in": "Opens in",
-        "closes_in": "Closes in",
-        "closed": "Predictions closed",
-        "score": "Score (e.g. 2-1)",
-        "winner": "Winner",
-        "draw": "Draw",
-        "gold_badge": "🔥 Golden Match 🔥",
-        "already_submitted": "You already submitted.",
-        "saved_ok": "Prediction saved.",
-        "fmt_error": "Use format like 2-1 (numbers only)",
-        "range_error": "Goals must be 0–20",
-        "enter_both_teams": "Enter both teams.",
-        "submit_btn": "Submit",
-        "leaderboard": "Leaderboard",
-        "no_scores_yet": "No scores yet.",
-        "lb_rank": "Rank",
-        "lb_user": "User",
-        "lb_preds": "Predictions",
-        "lb_exact": "Exact",
-        "lb_outcome": "Outcome",
-        "lb_points": "Points",
-        "admin_panel": "Admin Panel",
-        "season_name_label": "Season Name (e.g., Real Madrid 2025)",
-        "season_saved": "Season name saved.",
-        "reset_confirm": "Season reset complete (team logos are kept).",
-        "test_data": "Insert Test Data",
-        "test_done": "Test data inserted.",
-        "add_match": "➕ Add a match",
-        "team_a": "Team A",
-        "team_b": "Team B",
-        "home_logo_url": "Home Logo URL",
-        "away_logo_url": "Away Logo URL",
-        "home_logo_upload": "Upload Home Logo",
-        "away_logo_upload": "Upload Away Logo",
-        "occasion": "Occasion",
-        "occasion_logo_url": "Occasion Logo URL",
-        "occasion_logo_upload": "Upload Occasion Logo",
-        "round": "Round",
-        "date_label": "Date",
-        "hour": "Hour (1–12)",
-        "minute": "Minute",
-        "ampm": "AM/PM",
-        "ampm_am": "AM",
-        "ampm_pm": "PM",
-        "big_game": "🔥 Golden Match 🔥",
-        "btn_add_match": "Add Match",
-        "match_added": "Match added.",
-        "edit_matches": "Edit Matches",
-        "final_score": "Final Score (e.g. 2-1)",
-        "real_winner": "Real Winner",
-        "save": "Save",
-        "delete": "Delete",
-        "updated": "Updated",
-        "deleted": "Deleted",
-        "match_history": "Match History (Admin only)",
-        "terminate": "Terminate",
-        "terminated": "User terminated.",
-    },
-    "ar": {
-        "app_title": "⚽ لعبة التوقعات",
-        "sidebar_time": "⏱️ الوقت والإعدادات",
-        "sidebar_lang": "اللغة",
-        "lang_en": "English",
-        "lang_ar": "العربية",
-        "app_timezone": "المنطقة الزمنية للتطبيق",
-        "login_tab": "تسجيل الدخول",
-        "user_login": "دخول المشارك",
-        "admin_login": "دخول المشرف",
-        "your_name": "اسمك",
-        "admin_pass": "كلمة مرور المشرف",
-        "login": "تسجيل الدخول",
-        "register": "تسجيل",
-        "login_ok": "تم تسجيل الدخول.",
-        "admin_ok": "تم التحقق من المشرف.",
-        "admin_bad": "كلمة المرور غير صحيحة.",
-        "need_name": "الرجاء إدخال الاسم.",
-        "please_login_first": "الرجاء تسجيل الدخول أولًا",
-        "tab_play": "اللعب",
-        "tab_leaderboard": "الترتيب",
-        "tab_admin": "الإدارة",
-        "no_matches": "لا توجد مباريات بعد.",
-        "kickoff": "ضربة البداية",
-        "opens_in": "يفتح بعد",
-        "closes_in": "يغلق بعد",
-        "closed": "أُغلقت التوقعات",
-        "score": "النتيجة (مثال 1-2)",
-        "winner": "الفائز",
-        "draw": "تعادل",
-        "gold_badge": "🔥 المباراة الذهبية 🔥",
-        "already_submitted": "لقد سجّلت توقعك.",
-        "saved_ok": "تم حفظ التوقع.",
-        "fmt_error": "استخدم الصيغة 1-2 (أرقام فقط)",
-        "range_error": "الأهداف بين 0 و20",
-        "enter_both_teams": "أدخل اسمي الفريقين.",
-        "submit_btn": "إرسال",
-        "leaderboard": "الترتيب",
-        "no_scores_yet": "لا توجد نقاط بعد.",
-        "lb_rank": "الترتيب",
-        "lb_user": "المشارك",
-        "lb_preds": "عدد التوقعات",
-        "lb_exact": "التوقع الصحيح",
-        "lb_outcome": "نصف التوقع",
-        "lb_points": "النقاط",
-        "admin_panel": "لوحة التحكم",
-        "season_name_label": "اسم الموسم (مثال: ريال مدريد 2025)",
-        "season_saved": "تم حفظ اسم الموسم.",
-        "reset_confirm": "تمت إعادة ضبط الموسم (مع الاحتفاظ بالشعارات المحفوظة).",
-        "test_data": "إدراج بيانات تجريبية",
-        "test_done": "تم إدراج البيانات التجريبية.",
-        "add_match": "➕ إضافة مباراة",
-        "team_a": "الفريق (أ)",
-        "team_b": "الفريق (ب)",
-        "home_logo_url": "رابط شعار المضيف",
-        "away_logo_url": "رابط شعار الضيف",
-        "home_logo_upload": "رفع شعار المضيف",
-        "away_logo_upload": "رفع شعار الضيف",
-        "occasion": "المناسبة",
-        "occasion_logo_url": "رابط شعار المناسبة",
-        "occasion_logo_upload": "رفع شعار المناسبة",
-        "round": "الجولة",
-        "date_label": "التاريخ",
-        "hour": "الساعة (1–12)",
-        "minute": "الدقيقة",
-        "ampm": "ص/م",
-        "ampm_am": "صباحا",
-        "ampm_pm": "مساء",
-        "big_game": "🔥 المباراة الذهبية 🔥",
-        "btn_add_match": "إضافة المباراة",
-        "match_added": "تمت إضافة المباراة.",
-        "edit_matches": "تعديل المباريات",
-        "final_score": "النتيجة النهائية (مثال 2-1)",
-        "real_winner": "الفائز الحقيقي",
-        "save": "حفظ",
-        "delete": "حذف",
-        "updated": "تم التحديث",
-        "deleted": "تم الحذف",
-        "match_history": "سجل المباريات (للمشرف فقط)",
-        "terminate": "إيقاف",
-        "terminated": "تم إيقاف المستخدم.",
-    }
-}
-
-def tr(lang, key, **kwargs):
-    d = LANG["ar" if lang == "ar" else "en"]
-    txt = d.get(key, key)
-    return txt.format(**kwargs) if kwargs else txt
 # =========================
 # app.py (PART 2/6)
 # =========================
-def normalize_digits(text: str) -> str:
-    if not isinstance(text, str):
-        return text
-    mapping = {
-        ord('٠'):'0', ord('١'):'1', ord('٢'):'2', ord('٣'):'3', ord('٤'):'4',
-        ord('٥'):'5', ord('٦'):'6', ord('٧'):'7', ord('٨'):'8', ord('٩'):'9',
-        ord('۰'):'0', ord('۱'):'1', ord('۲'):'2', ord('۳'):'3', ord('۴'):'4',
-        ord('۵'):'5', ord('۶'):'6', ord('۷'):'7', ord('۸'):'8', ord('۹'):'9',
-    }
-    text = text.translate(mapping).strip()
-    for ch in ['–','—','−','ـ','‒','﹘','﹣','－']:
-        text = text.replace(ch, '-')
-    return text
-
-def load_csv(file, cols):
-    if os.path.exists(file) and os.path.getsize(file) > 0:
-        df = pd.read_csv(file)
-        for c in cols:
-            if c not in df.columns:
-                df[c] = None
-        return df[cols]
-    return pd.DataFrame(columns=cols)
-
-def save_csv(df, file):
-    df.to_csv(file, index=False)
-
-def load_overrides() -> pd.DataFrame:
-    return load_csv(LEADERBOARD_OVERRIDES_FILE, ["User","Predictions","Points"])
-
-def save_overrides(df: pd.DataFrame):
-    save_csv(df, LEADERBOARD_OVERRIDES_FILE)
-
-def _hash_pin(pin: str) -> str:
-    salt = secrets.token_hex(8)
-    h = hashlib.sha256((salt + pin).encode("utf-8")).hexdigest()
-    return f"{salt}:{h}"
-
-def _verify_pin(stored: str | None, pin: str) -> bool:
-    try:
-        if stored is None:
-            return False
-        if isinstance(stored, float) and pd.isna(stored):
-            return False
-        s = str(stored)
-        if ":" not in s:
-            return False
-        salt, h = s.split(":", 1)
-        return hashlib.sha256((salt + pin).encode("utf-8")).hexdigest() == h
-    except Exception:
-        return False
-
-def parse_iso_dt(val):
-    try:
-        return datetime.fromisoformat(str(val)) if pd.notna(val) and val else None
-    except Exception:
-        return None
-
 def to_tz(dt: datetime | None, tz: ZoneInfo) -> datetime | None:
     if not dt:
         return None
@@ -342,6 +74,18 @@ def format_dt_ampm(dt: datetime | None, tz: ZoneInfo, lang="en") -> str:
         return loc.strftime("%Y-%m-%d %I:%M ") + ampm
     return loc.strftime("%Y-%m-%d %I:%M %p")
 
+# Column-wise time handling: kickoffs are parsed once into tz-aware UTC
+# datetime64, converted with tz_convert and formatted per column. Formatted
+# columns are cached per (values, tz, lang).
+@st.cache_data(show_spinner=False, max_entries=256)
+def format_dt_column(values: pd.Series, tz_name: str, lang: str = "en") -> pd.Series:
+    utc = to_utc_series(values)
+    local = utc.dt.tz_convert(tz_name)
+    am, pm = ("صباحا", "مساء") if lang == "ar" else ("AM", "PM")
+    suffix = local.dt.hour.lt(12).map({True: am, False: pm})
+    out = local.dt.strftime("%Y-%m-%d %I:%M ") + suffix
+    return out.where(utc.notna(), "")
+
 def human_delta(delta: timedelta, lang: str) -> str:
     total = int(max(0, delta.total_seconds()))
     days = total // 86400
@@ -364,76 +108,6 @@ def human_delta(delta: timedelta, lang: str) -> str:
     parts.append(f"{minutes} {'minute' if minutes==1 else 'minutes'}")
     return " ".join(parts)
 
-def _filename_from_url(url: str) -> str:
-    parsed = urlparse(url)
-    base = os.path.basename(parsed.path) or "logo.png"
-    ext = os.path.splitext(base)[1] or ".png"
-    stem = hashlib.md5(url.encode()).hexdigest()
-    return f"{stem}{ext}"
-
-def cache_logo_from_url(url: str) -> str | None:
-    if not (isinstance(url, str) and url.lower().startswith(("http://","https://"))):
-        return None
-    try:
-        fname = _filename_from_url(url)
-        path = os.path.join(LOGO_DIR, fname)
-        if os.path.exists(path):
-            return path
-        r = requests.get(url, timeout=12)
-        r.raise_for_status()
-        with open(path, "wb") as f:
-            f.write(r.content)
-        return path
-    except Exception:
-        return None
-
-def save_uploaded_logo(file, name_hint: str) -> str | None:
-    try:
-        ext = os.path.splitext(file.name)[1] or ".png"
-        safe = re.sub(r"[^A-Za-z0-9_-]+", "_", name_hint or "logo")
-        path = os.path.join(LOGO_DIR, f"{safe}{ext}")
-        with open(path, "wb") as f:
-            f.write(file.read())
-        return path
-    except Exception:
-        return None
-
-def _load_team_logos() -> dict:
-    if os.path.exists(TEAM_LOGOS_FILE) and os.path.getsize(TEAM_LOGOS_FILE) > 0:
-        try:
-            with open(TEAM_LOGOS_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
-
-def _save_team_logos(mapping: dict):
-    try:
-        with open(TEAM_LOGOS_FILE, "w", encoding="utf-8") as f:
-            json.dump(mapping, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
-
-def save_team_logo(team: str, logo_path_or_url: str | None):
-    if not team or not logo_path_or_url:
-        return
-    logos = _load_team_logos()
-    logos[team] = logo_path_or_url
-    _save_team_logos(logos)
-
-def get_saved_logo(team: str) -> str | None:
-    logos = _load_team_logos()
-    return logos.get(team or "", None)
-
-def ensure_history_schema(df: pd.DataFrame) -> pd.DataFrame:
-    cols = ["Match","Kickoff","Result","HomeLogo","AwayLogo","BigGame","RealWinner","Occasion","OccasionLogo","Round","CompletedAt"]
-    if df.empty:
-        return pd.DataFrame(columns=cols)
-    for c in cols:
-        if c not in df.columns:
-            df[c] = None
-    return df[cols]
-
 def show_logo_safe(img_ref, width=56, caption=""):
     try:
         if not img_ref or (isinstance(img_ref, float) and pd.isna(img_ref)):
@@ -487,238 +161,53 @@ def _get_tz_from_query_params(default_tz="Asia/Riyadh"):
 # =========================
 # app.py (PART 3/6)
 # =========================
-def _otp_hash(code: str, salt: str) -> str:
-    return hashlib.sha256((salt + code).encode("utf-8")).hexdigest()
-
-def _load_otps() -> pd.DataFrame:
-    cols = ["User", "Salt", "Hash", "ExpiresAt", "CreatedAt"]
-    df = load_csv(OTP_FILE, cols)
-    for c in cols:
-        if c not in df.columns:
-            df[c] = None
-    return df[cols]
-
-def _save_otps(df: pd.DataFrame):
-    cols = ["User", "Salt", "Hash", "ExpiresAt", "CreatedAt"]
-    for c in cols:
-        if c not in df.columns:
-            df[c] = None
-    save_csv(df[cols], OTP_FILE)
-
-def _otp_cleanup(df: pd.DataFrame) -> pd.DataFrame:
-    now = datetime.now(ZoneInfo("UTC"))
-    df = df.copy()
-    df["ExpiresAt_dt"] = pd.to_datetime(df["ExpiresAt"], errors="coerce", utc=True)
-    df = df[(df["ExpiresAt_dt"].isna()) | (df["ExpiresAt_dt"] > now)]
-    return df.drop(columns=["ExpiresAt_dt"], errors="ignore")
-
-def otp_revoke(user: str) -> None:
-    df = _otp_cleanup(_load_otps())
-    u = str(user).strip().casefold()
-    df = df[df["User"].astype(str).str.strip().str.casefold() != u]
-    _save_otps(df)
-
-def otp_generate(user: str, minutes_valid: int = 10) -> str:
-    otp_revoke(user)
-    code = f"{secrets.randbelow(1_000_000):06d}"
-    salt = secrets.token_hex(8)
-    expires = datetime.now(ZoneInfo("UTC")) + timedelta(minutes=int(minutes_valid))
-    df = _otp_cleanup(_load_otps())
-    df = pd.concat([df, pd.DataFrame([{
-        "User": str(user).strip(),
-        "Salt": salt,
-        "Hash": _otp_hash(code, salt),
-        "ExpiresAt": expires.isoformat(),
-        "CreatedAt": datetime.now(ZoneInfo("UTC")).isoformat(),
-    }])], ignore_index=True)
-    _save_otps(df)
-    return code
-
-def otp_validate(user: str, code: str) -> bool:
-    df = _otp_cleanup(_load_otps())
-    u = str(user).strip().casefold()
-    dfu = df[df["User"].astype(str).str.strip().str.casefold() == u]
-    if dfu.empty:
-        return False
-    row = dfu.iloc[-1]
-    salt = str(row.get("Salt") or "")
-    h = str(row.get("Hash") or "")
-    code = normalize_digits(str(code or "")).strip()
-    if not re.fullmatch(r"\d{6}", code):
-        return False
-    if not salt or not h:
-        return False
-    if _otp_hash(code, salt) == h:
-        otp_revoke(user)
-        return True
-    return False
-
-def load_users():
-    cols = ["Name","CreatedAt","IsBanned","PinHash"]
-    if os.path.exists(USERS_FILE) and os.path.getsize(USERS_FILE) > 0:
-        df = pd.read_csv(USERS_FILE)
-        for c in cols:
-            if c not in df.columns:
-                df[c] = None
-        df["IsBanned"] = pd.to_numeric(df["IsBanned"], errors="coerce").fillna(0).astype(int)
-        df["PinHash"] = df["PinHash"].astype("string")
-        df.loc[df["PinHash"].isin([None, pd.NA, "nan", "NaN", "None"]), "PinHash"] = None
-        return df[cols]
-    return pd.DataFrame(columns=cols)
-
-def save_users(df):
-    cols = ["Name","CreatedAt","IsBanned","PinHash"]
-    for c in cols:
-        if c not in df.columns:
-            df[c] = None
-    df["IsBanned"] = pd.to_numeric(df.get("IsBanned", 0), errors="coerce").fillna(0).astype(int)
-    df[cols].to_csv(USERS_FILE, index=False)
-
-def split_match_name(match_name: str) -> tuple[str, str]:
-    parts = re.split(r"\s*vs\s*", str(match_name or ""), flags=re.IGNORECASE)
-    if len(parts) >= 2:
-        return parts[0].strip(), parts[1].strip()
-    return (match_name or "").strip(), ""
-
-def _parse_score(score_str: str) -> tuple[int,int] | None:
-    if not isinstance(score_str, str):
-        return None
-    s = normalize_digits(score_str).strip()
-    if not re.fullmatch(r"\d{1,2}-\d{1,2}", s):
-        return None
-    try:
-        a, b = map(int, s.split("-"))
-    except Exception:
-        return None
-    if not (0 <= a <= 20 and 0 <= b <= 20):
-        return None
-    return (a, b)
-
-def _norm_draw(x: str) -> bool:
-    s = str(x or "").strip().casefold()
-    return s in {"draw", "تعادل"} or s == tr("en","draw").casefold() or s == tr("ar","draw").casefold()
-
-def get_real_winner(match_row: pd.Series) -> str:
-    rw = str(match_row.get("RealWinner") or "").strip()
-    if rw:
-        return "Draw" if _norm_draw(rw) else rw
-    score = _parse_score(str(match_row.get("Result") or ""))
-    if not score:
-        return "Draw"
-    a, b = score
-    if a == b:
-        return "Draw"
-    team_a, team_b = split_match_name(match_row.get("Match") or "")
-    return team_a if a > b else team_b
-
-def points_for_prediction(match_row: pd.Series, pred_score: str, chosen_winner: str) -> tuple[int,int,int]:
-    real_score = _parse_score(str(match_row.get("Result") or ""))
-    pred = _parse_score(str(pred_score or ""))
-    if not real_score or not pred:
-        return (0, 0, 0)
-
-    big = bool(match_row.get("BigGame", False))
-    team_a, team_b = split_match_name(match_row.get("Match") or "")
-
-    ra, rb = real_score
-    pa, pb = pred
-
-    if (ra, rb) == (pa, pb):
-        return (6 if big else 3, 1, 0)
-
-    real_w = "Draw" if ra == rb else (team_a if ra > rb else team_b)
-
-    cw = str(chosen_winner or "").strip()
-    if _norm_draw(cw):
-        pred_w = "Draw"
-    else:
-        pred_w = cw
-
-    if real_w == "Draw" and pred_w == "Draw":
-        return (2 if big else 1, 0, 1)
-
-    if real_w != "Draw" and pred_w == real_w:
-        return (2 if big else 1, 0, 1)
-
-    return (0, 0, 0)
-
-def _load_all_matches_for_scoring() -> pd.DataFrame:
-    cols_open = ["Match","Kickoff","Result","HomeLogo","AwayLogo","BigGame","RealWinner","Occasion","OccasionLogo","Round"]
-    cols_hist = cols_open + ["CompletedAt"]
-    open_m = load_csv(MATCHES_FILE, cols_open)
-    hist_m = load_csv(MATCH_HISTORY_FILE, cols_hist)
-    if not hist_m.empty:
-        hist_m = hist_m.drop(columns=["CompletedAt"], errors="ignore")
-    if open_m.empty and hist_m.empty:
-        return pd.DataFrame(columns=cols_open)
-    allm = pd.concat([open_m, hist_m], ignore_index=True)
-    for c in cols_open:
-        if c not in allm.columns:
-            allm[c] = None
-    return allm[cols_open]
-
-def recompute_leaderboard(predictions_df: pd.DataFrame) -> pd.DataFrame:
-    cols = ["User","Points","Predictions","Exact","Outcome"]
-    lb = pd.DataFrame(columns=cols)
-
-    if predictions_df.empty:
-        save_csv(lb, LEADERBOARD_FILE)
-        return lb
-
-    matches_full = _load_all_matches_for_scoring()
-    if matches_full.empty:
-        save_csv(lb, LEADERBOARD_FILE)
-        return lb
-
-    preds = predictions_df.copy()
-    preds["SubmittedAt_dt"] = pd.to_datetime(preds["SubmittedAt"], errors="coerce", utc=True)
-    preds = preds.sort_values(["User","Match","SubmittedAt_dt"])
-    latest = preds.drop_duplicates(subset=["User","Match"], keep="last")
-
-    rows = []
-    for _, p in latest.iterrows():
-        mrow = matches_full[matches_full["Match"].astype(str) == str(p.get("Match"))]
-        if mrow.empty:
-            continue
-        m = mrow.iloc[0]
-        score = _parse_score(str(m.get("Result") or ""))
-        if not score:
-            continue
-        pts, ex, out = points_for_prediction(
-            match_row=m,
-            pred_score=str(p.get("Prediction") or ""),
-            chosen_winner=str(p.get("Winner") or ""),
-        )
-        rows.append({"User": str(p.get("User") or "").strip(), "Points": pts, "Exact": ex, "Outcome": out})
-
-    if not rows:
-        save_csv(lb, LEADERBOARD_FILE)
-        return lb
-
-    per = pd.DataFrame(rows)
-    lb = (per.groupby("User", as_index=False)
-            .agg(Points=("Points","sum"),
-                 Predictions=("Points","count"),
-                 Exact=("Exact","sum"),
-                 Outcome=("Outcome","sum")))
-
-    lb = lb.sort_values(["Points","Predictions","Exact"], ascending=[False, True, False]).reset_index(drop=True)
-
-    try:
-        ov = load_overrides()
-        if not ov.empty:
-            ov["Predictions"] = pd.to_numeric(ov["Predictions"], errors="coerce")
-            ov["Points"] = pd.to_numeric(ov["Points"], errors="coerce")
-            lb = lb.merge(ov, on="User", how="left", suffixes=("", "_ovr"))
-            lb["Predictions"] = lb["Predictions_ovr"].where(pd.notna(lb["Predictions_ovr"]), lb["Predictions"]).astype(int)
-            lb["Points"] = lb["Points_ovr"].where(pd.notna(lb["Points_ovr"]), lb["Points"]).astype(int)
-            lb = lb.drop(columns=["Predictions_ovr","Points_ovr"], errors="ignore")
-            lb = lb.sort_values(["Points","Predictions","Exact"], ascending=[False, True, False]).reset_index(drop=True)
-    except Exception:
-        pass
+# The logged-in user's record lives in session state and is trusted until the
+# global users version moves (ban, delete, restore), so a player's reruns do
+# not touch users.csv.
+def set_session_user(rec: dict | None):
+    if rec is None:
+        st.session_state.pop("current_user", None)
+        return
+    st.session_state["current_user"] = {**rec, "_version": users_version(), "_preds_sig": "unloaded", "_predicted": set()}
 
-    save_csv(lb[cols], LEADERBOARD_FILE)
-    return lb
+def current_user_record() -> dict | None:
+    name = st.session_state.get("current_name")
+    if not name:
+        return None
+    cached = st.session_state.get("current_user")
+    if cached is None or cached.get("_version") != users_version() or _user_key(cached.get("Name")) != _user_key(name):
+        rec = find_user(name)
+        set_session_user(rec)
+        cached = st.session_state.get("current_user")
+    return cached
+
+def session_predicted_matches(predictions_df: pd.DataFrame) -> set:
+    rec = current_user_record()
+    if rec is None:
+        return set()
+    sig = _file_sig(GAME.PREDICTIONS_FILE)
+    if rec.get("_preds_sig") != sig:
+        mine = predictions_df.loc[predictions_df["User"].astype(str) == str(rec["Name"]), "Match"]
+        rec["_predicted"] = set(mine.astype(str))
+        rec["_preds_sig"] = sig
+    return rec["_predicted"]
+
+def logout_session():
+    for k in ("role", "current_name", "current_user"):
+        st.session_state.pop(k, None)
+
+def _session_id() -> str:
+    sid = st.session_state.get("_session_id")
+    if not sid:
+        sid = secrets.token_hex(8)
+        st.session_state["_session_id"] = sid
+    return sid
+
+def throttle_message(wait: float, lang: str) -> str:
+    secs = int(wait) + 1
+    if lang == "ar":
+        return f"محاولات كثيرة. حاول مرة أخرى بعد {secs} ثانية."
+    return f"Too many attempts. Try again in {secs}s."
 # =========================
 # app.py (PART 4/6)
 # =========================
@@ -734,7 +223,6 @@ def page_login(LANG_CODE: str):
     )
 
     if role == tr(LANG_CODE, "user_login"):
-        users_df = load_users()
         st.subheader(tr(LANG_CODE, "user_login"))
 
         name_in = st.text_input(tr(LANG_CODE, "your_name"), key="login_name")
@@ -749,23 +237,26 @@ def page_login(LANG_CODE: str):
         if st.button(tr(LANG_CODE, "login"), key="btn_user_login"):
             if not name_norm or not re.fullmatch(r"\d{4}", pin_norm):
                 st.error(tr(LANG_CODE, "please_login_first"))
+            elif (wait := throttle_acquire("login", name_norm, _session_id())) > 0:
+                st.error(throttle_message(wait, LANG_CODE))
             else:
-                candidates = users_df[
-                    users_df["Name"].astype(str).str.strip().str.casefold() == name_norm.casefold()
-                ]
-                if candidates.empty:
+                row = find_user(name_norm)
+                if row is None:
+                    throttle_result("login", name_norm, _session_id(), ok=False)
                     st.error(tr(LANG_CODE, "please_login_first"))
                 else:
-                    row = candidates.iloc[0]
                     if int(row.get("IsBanned", 0)) == 1:
                         st.error("User is banned." if LANG_CODE == "en" else "المستخدم محظور.")
                     else:
                         if _verify_pin(row.get("PinHash"), pin_norm):
+                            throttle_result("login", name_norm, _session_id(), ok=True)
                             st.session_state["role"] = "user"
                             st.session_state["current_name"] = str(row["Name"]).strip()
+                            set_session_user(row)
                             st.success(tr(LANG_CODE, "login_ok"))
                             st.rerun()
                         else:
+                            throttle_result("login", name_norm, _session_id(), ok=False)
                             st.error("Wrong PIN." if LANG_CODE == "en" else "الرقم السري غير صحيح.")
 
         st.markdown("---")
@@ -786,30 +277,18 @@ def page_login(LANG_CODE: str):
             elif not re.fullmatch(r"\d{4}", reg_pin_n):
                 st.error("PIN must be 4 digits." if LANG_CODE == "en" else "الرقم السري يجب أن يكون 4 أرقام.")
             else:
-                users_df = load_users()
-                exists = users_df["Name"].astype(str).str.strip().str.casefold().eq(reg_name_n.casefold()).any()
-                if exists:
+                rec = add_user(reg_name_n, _hash_pin(reg_pin_n))
+                if rec is None:
                     st.error(
                         "Name already exists. Please choose a different name."
                         if LANG_CODE == "en"
                         else "الاسم موجود مسبقًا. الرجاء اختيار اسم مختلف."
                     )
                 else:
-                    new_row = pd.DataFrame(
-                        [
-                            {
-                                "Name": reg_name_n,
-                                "CreatedAt": datetime.now(ZoneInfo("UTC")).isoformat(),
-                                "IsBanned": 0,
-                                "PinHash": _hash_pin(reg_pin_n),
-                            }
-                        ]
-                    )
-                    users_df = pd.concat([users_df, new_row], ignore_index=True)
-                    save_users(users_df)
                     st.success(tr(LANG_CODE, "login_ok"))
                     st.session_state["role"] = "user"
                     st.session_state["current_name"] = reg_name_n
+                    set_session_user(rec)
                     st.rerun()
 
         st.markdown("---")
@@ -842,17 +321,19 @@ def page_login(LANG_CODE: str):
                 st.error("PIN must be 4 digits." if LANG_CODE == "en" else "الرقم السري يجب أن يكون 4 أرقام.")
             elif pin1_n != pin2_n:
                 st.error("PINs do not match." if LANG_CODE == "en" else "الرقمان غير متطابقين.")
+            elif (wait := throttle_acquire("otp", r_name_n, _session_id())) > 0:
+                st.error(throttle_message(wait, LANG_CODE))
             else:
-                users_df = load_users()
-                mask = users_df["Name"].astype(str).str.strip().str.casefold() == r_name_n.casefold()
-                if not mask.any():
+                if not user_exists(r_name_n):
+                    throttle_result("otp", r_name_n, _session_id(), ok=False)
                     st.error("User not found." if LANG_CODE == "en" else "المستخدم غير موجود.")
                 else:
                     if otp_validate(r_name_n, otp_n):
-                        users_df.loc[mask, "PinHash"] = _hash_pin(pin1_n)
-                        save_users(users_df)
+                        throttle_result("otp", r_name_n, _session_id(), ok=True)
+                        update_user(r_name_n, PinHash=_hash_pin(pin1_n))
                         st.success("PIN updated. You can login now ✅" if LANG_CODE == "en" else "تم تغيير الرقم السري ✅")
                     else:
+                        throttle_result("otp", r_name_n, _session_id(), ok=False)
                         st.error("Invalid/expired OTP." if LANG_CODE == "en" else "رمز OTP غير صالح أو منتهي.")
 
     else:
@@ -860,399 +341,38 @@ def page_login(LANG_CODE: str):
         pwd = st.text_input(tr(LANG_CODE, "admin_pass"), type="password")
         if st.button(tr(LANG_CODE, "admin_login"), key="btn_admin_login"):
             if pwd == ADMIN_PASSWORD:
+                metrics_inc("admin_logins_total", outcome="ok")
                 st.session_state["role"] = "admin"
                 st.session_state["current_name"] = "Admin"
+                set_session_user(None)
                 st.success(tr(LANG_CODE, "admin_ok"))
                 st.rerun()
             else:
+                metrics_inc("admin_logins_total", outcome="failed")
                 st.error(tr(LANG_CODE, "admin_bad"))
 
 
-def page_play_and_leaderboard(LANG_CODE: str, tz: ZoneInfo):
-    apply_theme()
-
-    season_name = ""
-    if os.path.exists(SEASON_FILE):
-        try:
-            with open(SEASON_FILE, "r", encoding="utf-8") as f:
-                season_name = f.read().strip()
-        except Exception:
-            pass
-
-    st.title(f"{tr(LANG_CODE, 'app_title')}" + (f" — {season_name}" if season_name else ""))
-    show_welcome_top_right(st.session_state.get("current_name"), LANG_CODE)
-
-    matches_df = load_csv(
-        MATCHES_FILE,
-        ["Match", "Kickoff", "Result", "HomeLogo", "AwayLogo", "BigGame", "RealWinner", "Occasion", "OccasionLogo", "Round"],
-    )
-    predictions_df = load_csv(PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
-
-    tab1, tab2 = st.tabs([f"🎮 {tr(LANG_CODE,'tab_play')}", f"🏆 {tr(LANG_CODE,'tab_leaderboard')}"])
-
-    with tab1:
-        current_name = st.session_state.get("current_name")
-
-        if matches_df.empty:
-            st.info(tr(LANG_CODE, "no_matches"))
-        else:
-            tmp = matches_df.copy()
-            tmp["KO"] = tmp["Kickoff"].apply(parse_iso_dt)
-            tmp = tmp.sort_values("KO").reset_index(drop=True)
-
-            for idx, row in tmp.iterrows():
-                match = row.get("Match")
-                team_a, team_b = split_match_name(match)
-                ko = row.get("KO")
-                big = bool(row.get("BigGame", False))
-
-                with st.container():
-                    c_logo_a, c_logo_mid, c_logo_b = st.columns([1, 1, 1])
-                    with c_logo_a:
-                        show_logo_safe(row.get("HomeLogo"), width=56, caption=team_a or " ")
-                    with c_logo_mid:
-                        show_logo_safe(row.get("OccasionLogo"), width=56, caption=row.get("Occasion") or " ")
-                    with c_logo_b:
-                        show_logo_safe(row.get("AwayLogo"), width=56, caption=team_b or " ")
-
-                    st.markdown(f"### {team_a} &nbsp;vs&nbsp; {team_b}")
-
-                    aux = []
-                    if row.get("Round"):
-                        aux.append(f"**{tr(LANG_CODE,'round')}**: {row.get('Round')}")
-                    if row.get("Occasion"):
-                        aux.append(f"**{tr(LANG_CODE,'occasion')}**: {row.get('Occasion')}")
-                    if aux:
-                        st.caption(" | ".join(aux))
-
-                    ko_txt = format_dt_ampm(ko, tz, LANG_CODE)
-                    st.caption(f"{tr(LANG_CODE,'kickoff')}: {ko_txt}")
-
-                    if big:
-                        st.markdown(f"<span class='badge-gold'>{tr(LANG_CODE,'gold_badge')}</span>", unsafe_allow_html=True)
-
-                    if ko:
-                        open_at = to_tz(ko, tz) - timedelta(hours=2)
-                        close_at = to_tz(ko, tz)
-                        now_local = datetime.now(tz)
-
-                        if now_local < open_at:
-                            remain = open_at - now_local
-                            st.info(f"{tr(LANG_CODE,'opens_in')}: {human_delta(remain, LANG_CODE)}")
-                        elif open_at <= now_local < close_at:
-                            if not current_name:
-                                st.warning(tr(LANG_CODE, "please_login_first"))
-                            else:
-                                already = predictions_df[
-                                    (predictions_df["User"].astype(str) == str(current_name)) &
-                                    (predictions_df["Match"].astype(str) == str(match))
-                                ]
-                                if not already.empty:
-                                    st.info(tr(LANG_CODE, "already_submitted"))
-                                else:
-                                    short_hash = abs(hash(str(match))) % 1_000_000_000
-                                    score_key = f"pred_score_{idx}_{short_hash}"
-                                    sel_key = f"pred_winner_{idx}_{short_hash}"
-                                    btn_key = f"btn_{idx}_{short_hash}"
-
-                                    raw = st.text_input(tr(LANG_CODE, "score"), key=score_key)
-                                    val = normalize_digits(raw or "").strip()
-
-                                    options = [team_a, team_b, tr(LANG_CODE, "draw")]
-                                    is_draw_typed = False
-                                    parsed = _parse_score(val) if val else None
-                                    if parsed and parsed[0] == parsed[1]:
-                                        is_draw_typed = True
-                                    default_ix = 2 if is_draw_typed else 0
-                                    winner = st.selectbox(
-                                        tr(LANG_CODE, "winner"),
-                                        options=options,
-                                        index=default_ix,
-                                        key=sel_key,
-                                        disabled=is_draw_typed,
-                                    )
-
-                                    if st.button(tr(LANG_CODE, "submit_btn"), key=btn_key):
-                                        parsed2 = _parse_score(val)
-                                        if not parsed2:
-                                            st.error(tr(LANG_CODE, "fmt_error"))
-                                        else:
-                                            h1, h2 = parsed2
-                                            if h1 == h2:
-                                                winner = tr(LANG_CODE, "draw")
-                                            new_pred = pd.DataFrame([{
-                                                "User": current_name,
-                                                "Match": match,
-                                                "Prediction": f"{h1}-{h2}",
-                                                "Winner": winner,
-                                                "SubmittedAt": datetime.now(ZoneInfo("UTC")).isoformat(),
-                                            }])
-                                            predictions_df = pd.concat([predictions_df, new_pred], ignore_index=True)
-                                            save_csv(predictions_df, PREDICTIONS_FILE)
-                                            recompute_leaderboard(predictions_df)
-                                            st.success(tr(LANG_CODE, "saved_ok"))
-                        else:
-                            st.caption(f"🔒 {tr(LANG_CODE,'closed')}")
-
-    with tab2:
-        preds = load_csv(PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
-        lb = recompute_leaderboard(preds)
-
-        st.subheader(tr(LANG_CODE, "leaderboard"))
-        if lb.empty:
-            st.info(tr(LANG_CODE, "no_scores_yet"))
-        else:
-            lb = lb.reset_index(drop=True)
-            lb.insert(0, tr(LANG_CODE, "lb_rank"), range(1, len(lb) + 1))
-
-            medals = []
-            for i in lb.index:
-                r_int = int(lb.loc[i, tr(LANG_CODE, "lb_rank")])
-                medals.append("🥇" if r_int == 1 else "🥈" if r_int == 2 else "🥉" if r_int == 3 else "")
-            lb[tr(LANG_CODE, "lb_rank")] = lb[tr(LANG_CODE, "lb_rank")].astype(str) + " " + pd.Series(medals)
-
-            col_map = {
-                "User": tr(LANG_CODE, "lb_user"),
-                "Predictions": tr(LANG_CODE, "lb_preds"),
-                "Exact": tr(LANG_CODE, "lb_exact"),
-                "Outcome": tr(LANG_CODE, "lb_outcome"),
-                "Points": tr(LANG_CODE, "lb_points"),
-            }
-            show = lb[[tr(LANG_CODE, "lb_rank"), "User", "Predictions", "Exact", "Outcome", "Points"]].rename(columns=col_map)
-            st.dataframe(show, use_container_width=True)
 # =========================
 # app.py (PART 5/6)
 # =========================
-def create_backup_zip() -> BytesIO:
-    buf = BytesIO()
-    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as z:
-        for path in BACKUP_FILES:
-            base = os.path.basename(path)
-            try:
-                if os.path.exists(path):
-                    z.write(path, arcname=base)
-                else:
-                    z.writestr(base, "")
-            except Exception:
-                try:
-                    z.writestr(base, "")
-                except Exception:
-                    pass
-
-        try:
-            if os.path.isdir(LOGO_DIR):
-                for root, _, files in os.walk(LOGO_DIR):
-                    for fn in files:
-                        full = os.path.join(root, fn)
-                        if os.path.isfile(full):
-                            arc = os.path.join("logos", fn)
-                            try:
-                                z.write(full, arcname=arc)
-                            except Exception:
-                                pass
-        except Exception:
-            pass
-
-    buf.seek(0)
-    return buf
-
-
-def restore_from_zip(filelike) -> None:
-    try:
-        filelike.seek(0)
-    except Exception:
-        pass
-
-    allowed = {os.path.basename(p) for p in BACKUP_FILES}
-    with zipfile.ZipFile(filelike, "r") as z:
-        for member in z.namelist():
-            base = os.path.basename(member)
-            if base in allowed:
-                try:
-                    out = os.path.join(DATA_DIR, base)
-                    try:
-                        if os.path.exists(out):
-                            os.remove(out)
-                    except Exception:
-                        pass
-                    with z.open(member) as src, open(out, "wb") as dst:
-                        dst.write(src.read())
-                except Exception:
-                    pass
-
-            if member.startswith("logos/") and not member.endswith("/"):
-                try:
-                    os.makedirs(LOGO_DIR, exist_ok=True)
-                    fn = os.path.basename(member)
-                    out = os.path.join(LOGO_DIR, fn)
-                    with z.open(member) as src, open(out, "wb") as dst:
-                        dst.write(src.read())
-                except Exception:
-                    pass
-
-
-def _parse_score(s: str) -> tuple[int, int] | None:
-    s = normalize_digits(str(s or "")).strip()
-    m = re.fullmatch(r"(\d{1,2})-(\d{1,2})", s)
-    if not m:
-        return None
-    a = int(m.group(1))
-    b = int(m.group(2))
-    if not (0 <= a <= 20 and 0 <= b <= 20):
-        return None
-    return (a, b)
-
-
-def _norm_draw(txt: str) -> bool:
-    t = str(txt or "").strip().casefold()
-    return t in {"draw", "تعادل", "التعادل"}
-
-
-def _winner_from_score(match_name: str, score: str) -> str:
-    team_a, team_b = split_match_name(match_name)
-    parsed = _parse_score(score)
-    if not parsed:
-        return "Draw"
-    a, b = parsed
-    if a == b:
-        return "Draw"
-    return team_a if a > b else team_b
-
-
-def points_for_prediction(match_row: pd.Series, pred: str, big_game: bool, chosen_winner: str) -> tuple[int, int, int]:
-    match_name = str(match_row.get("Match") or "")
-    real_score = match_row.get("Result")
-    if not isinstance(real_score, str) or "-" not in real_score:
-        return (0, 0, 0)
-
-    real_parsed = _parse_score(real_score)
-    pred_parsed = _parse_score(pred)
-    if not real_parsed or not pred_parsed:
-        return (0, 0, 0)
-
-    if real_parsed == pred_parsed:
-        return (6 if big_game else 3, 1, 0)
-
-    real_w = _winner_from_score(match_name, real_score)
-    pred_w = _winner_from_score(match_name, f"{pred_parsed[0]}-{pred_parsed[1]}")
-
-    cw = str(chosen_winner or "").strip()
-    if _norm_draw(cw):
-        cw = "Draw"
-
-    if real_w == "Draw" and (pred_w == "Draw" or cw == "Draw"):
-        return (2 if big_game else 1, 0, 1)
-
-    if real_w != "Draw":
-        if pred_w == real_w:
-            return (2 if big_game else 1, 0, 1)
-        if cw and cw != "Draw" and cw == real_w:
-            return (2 if big_game else 1, 0, 1)
-
-    return (0, 0, 0)
-
-
-def recompute_leaderboard(predictions_df: pd.DataFrame) -> pd.DataFrame:
-    cols = ["User", "Points", "Predictions", "Exact", "Outcome"]
-    empty = pd.DataFrame(columns=cols)
-
-    if predictions_df.empty:
-        save_csv(empty, LEADERBOARD_FILE)
-        return empty
-
-    matches_full = _load_all_matches_for_scoring()
-    if matches_full.empty:
-        save_csv(empty, LEADERBOARD_FILE)
-        return empty
-
-    preds = predictions_df.copy()
-    preds["SubmittedAt"] = pd.to_datetime(preds["SubmittedAt"], errors="coerce")
-    preds = preds.sort_values(["User", "Match", "SubmittedAt"])
-    latest = preds.drop_duplicates(subset=["User", "Match"], keep="last")
-
-    latest = latest.merge(
-        matches_full[["Match", "Result", "BigGame"]],
-        on="Match",
-        how="left",
-        suffixes=("", "_m"),
-    )
-
-    pred_counts = (
-        latest.groupby("User", as_index=False)
-        .agg(Predictions=("Match", "nunique"))
-    )
-
-    scored = latest[latest["Result"].astype(str).str.contains(r"\d{1,2}-\d{1,2}", regex=True, na=False)].copy()
-    if scored.empty:
-        lb = pred_counts.copy()
-        lb["Points"] = 0
-        lb["Exact"] = 0
-        lb["Outcome"] = 0
-        lb = lb[cols].sort_values(["Points", "Predictions", "Exact"], ascending=[False, True, False])
-        save_csv(lb, LEADERBOARD_FILE)
-        return lb
-
-    rows = []
-    for _, p in scored.iterrows():
-        mrow = matches_full[matches_full["Match"].astype(str) == str(p["Match"])]
-        if mrow.empty:
-            continue
-        m = mrow.iloc[0]
-        big = bool(m.get("BigGame", False))
-        chosen_winner = str(p.get("Winner") or "")
-        pts, ex, out = points_for_prediction(m, str(p.get("Prediction") or ""), big, chosen_winner)
-        rows.append({"User": p["User"], "Points": pts, "Exact": ex, "Outcome": out})
-
-    if not rows:
-        lb = pred_counts.copy()
-        lb["Points"] = 0
-        lb["Exact"] = 0
-        lb["Outcome"] = 0
-        lb = lb[cols].sort_values(["Points", "Predictions", "Exact"], ascending=[False, True, False])
-        save_csv(lb, LEADERBOARD_FILE)
-        return lb
-
-    per = pd.DataFrame(rows)
-    sums = (
-        per.groupby("User", as_index=False)
-        .agg(Points=("Points", "sum"), Exact=("Exact", "sum"), Outcome=("Outcome", "sum"))
-    )
-
-    lb = pred_counts.merge(sums, on="User", how="left")
-    lb["Points"] = pd.to_numeric(lb["Points"], errors="coerce").fillna(0).astype(int)
-    lb["Exact"] = pd.to_numeric(lb["Exact"], errors="coerce").fillna(0).astype(int)
-    lb["Outcome"] = pd.to_numeric(lb["Outcome"], errors="coerce").fillna(0).astype(int)
-
-    lb = lb[cols].sort_values(["Points", "Predictions", "Exact"], ascending=[False, True, False]).reset_index(drop=True)
-    save_csv(lb, LEADERBOARD_FILE)
-    return lb
-
-
-def _apply_overrides_to_lb(lb: pd.DataFrame) -> pd.DataFrame:
-    if lb.empty:
-        return lb
-    o = load_overrides()
-    if o.empty:
-        return lb
-    out = lb.merge(o, on="User", how="left", suffixes=("", "_ovr"))
-    if "Predictions_ovr" in out.columns:
-        out["Predictions"] = out["Predictions_ovr"].where(pd.notna(out["Predictions_ovr"]), out["Predictions"])
-    if "Points_ovr" in out.columns:
-        out["Points"] = out["Points_ovr"].where(pd.notna(out["Points_ovr"]), out["Points"])
-    out["Predictions"] = pd.to_numeric(out["Predictions"], errors="coerce").fillna(0).astype(int)
-    out["Points"] = pd.to_numeric(out["Points"], errors="coerce").fillna(0).astype(int)
-    out = out.drop(columns=[c for c in ["Predictions_ovr", "Points_ovr"] if c in out.columns], errors="ignore")
-    out = out.sort_values(["Points", "Predictions", "Exact"], ascending=[False, True, False]).reset_index(drop=True)
-    return out
-
-
 def page_play_and_leaderboard(LANG_CODE: str, tz: ZoneInfo):
     apply_theme()
 
+    user_rec = current_user_record()
+    if user_rec is None:
+        logout_session()
+        st.error("User not found. Please log in again." if LANG_CODE == "en"
+                 else "المستخدم غير موجود. الرجاء تسجيل الدخول مرة أخرى.")
+        return
+    if int(user_rec.get("IsBanned", 0)) == 1:
+        logout_session()
+        st.error("User is banned." if LANG_CODE == "en" else "المستخدم محظور.")
+        return
+
     season_name = ""
-    if os.path.exists(SEASON_FILE):
+    if os.path.exists(GAME.SEASON_FILE):
         try:
-            with open(SEASON_FILE, "r", encoding="utf-8") as f:
+            with open(GAME.SEASON_FILE, "r", encoding="utf-8") as f:
                 season_name = f.read().strip()
         except Exception:
             pass
@@ -1261,22 +381,29 @@ def page_play_and_leaderboard(LANG_CODE: str, tz: ZoneInfo):
     show_welcome_top_right(st.session_state.get("current_name"), LANG_CODE)
 
     matches_df = load_csv(
-        MATCHES_FILE,
+        GAME.MATCHES_FILE,
         ["Match", "Kickoff", "Result", "HomeLogo", "AwayLogo", "BigGame", "RealWinner", "Occasion", "OccasionLogo", "Round"],
     )
-    predictions_df = load_csv(PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
+    predictions_df = load_csv(GAME.PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
 
     tab1, tab2 = st.tabs([f"🎮 {tr(LANG_CODE,'tab_play')}", f"🏆 {tr(LANG_CODE,'tab_leaderboard')}"])
 
-    with tab1:
-        current_name = st.session_state.get("current_name")
+    with tab1, perf_span("section:play"):
+        current_name = user_rec["Name"]
+        predicted = session_predicted_matches(predictions_df)
+        board = ranked_leaderboard()
+        my_rank = board.rank(current_name)
+        if my_rank is not None:
+            st.markdown(f"**{tr(LANG_CODE, 'you_are_rank', rank=my_rank, n=len(board))}** {rank_medal(my_rank)}")
 
         if matches_df.empty:
             st.info(tr(LANG_CODE, "no_matches"))
         else:
             tmp = matches_df.copy()
-            tmp["KO"] = tmp["Kickoff"].apply(parse_iso_dt)
+            tmp["KO"] = to_utc_series(tmp["Kickoff"])
             tmp = tmp.sort_values("KO").reset_index(drop=True)
+            tmp["KO"] = tmp["KO"].dt.tz_convert(tz.key)
+            tmp["KO_txt"] = format_dt_column(tmp["Kickoff"], tz.key, LANG_CODE)
 
             for idx, row in tmp.iterrows():
                 match = row.get("Match")
@@ -1303,15 +430,14 @@ def page_play_and_leaderboard(LANG_CODE: str, tz: ZoneInfo):
                     if aux:
                         st.caption(" | ".join(aux))
 
-                    ko_txt = format_dt_ampm(ko, tz, LANG_CODE)
-                    st.caption(f"{tr(LANG_CODE,'kickoff')}: {ko_txt}")
+                    st.caption(f"{tr(LANG_CODE,'kickoff')}: {row.get('KO_txt')}")
 
                     if big:
                         st.markdown(f"<span class='badge-gold'>{tr(LANG_CODE,'gold_badge')}</span>", unsafe_allow_html=True)
 
-                    if ko:
-                        open_at = to_tz(ko, tz) - timedelta(hours=2)
-                        close_at = to_tz(ko, tz)
+                    if pd.notna(ko):
+                        open_at = ko - timedelta(hours=2)
+                        close_at = ko
                         now_local = datetime.now(tz)
 
                         if now_local < open_at:
@@ -1321,11 +447,7 @@ def page_play_and_leaderboard(LANG_CODE: str, tz: ZoneInfo):
                             if not current_name:
                                 st.warning(tr(LANG_CODE, "please_login_first"))
                             else:
-                                already = predictions_df[
-                                    (predictions_df["User"].astype(str) == str(current_name)) &
-                                    (predictions_df["Match"].astype(str) == str(match))
-                                ]
-                                if not already.empty:
+                                if str(match) in predicted:
                                     st.info(tr(LANG_CODE, "already_submitted"))
                                 else:
                                     short_hash = abs(hash(str(match))) % 1_000_000_000
@@ -1356,37 +478,119 @@ def page_play_and_leaderboard(LANG_CODE: str, tz: ZoneInfo):
                                             h1, h2 = parsed2
                                             if h1 == h2:
                                                 winner = tr(LANG_CODE, "draw")
-                                            new_pred = pd.DataFrame([{
+                                            predictions_df = append_prediction({
                                                 "User": current_name,
                                                 "Match": match,
                                                 "Prediction": f"{h1}-{h2}",
                                                 "Winner": winner,
                                                 "SubmittedAt": datetime.now(ZoneInfo("UTC")).isoformat(),
-                                            }])
-                                            predictions_df = pd.concat([predictions_df, new_pred], ignore_index=True)
-                                            save_csv(predictions_df, PREDICTIONS_FILE)
-                                            recompute_leaderboard(predictions_df)
+                                            })
+                                            predicted.add(str(match))
+                                            user_rec["_preds_sig"] = _file_sig(GAME.PREDICTIONS_FILE)
                                             st.success(tr(LANG_CODE, "saved_ok"))
                         else:
                             st.caption(f"🔒 {tr(LANG_CODE,'closed')}")
 
-    with tab2:
-        preds = load_csv(PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
-        base_lb = recompute_leaderboard(preds)
-        lb = _apply_overrides_to_lb(base_lb)
+    with tab2, perf_span("section:leaderboard"):
+        lb = None
 
         st.subheader(tr(LANG_CODE, "leaderboard"))
-        if lb.empty:
+
+        my_leagues = user_leagues(user_rec["Name"])
+        with st.expander(tr(LANG_CODE, "leagues")):
+            c_new, c_join = st.columns(2)
+            with c_new:
+                new_league = st.text_input(tr(LANG_CODE, "league_name"), key="league_new_name")
+                if st.button(tr(LANG_CODE, "league_create"), key="league_create_btn") and new_league.strip():
+                    rec = create_league(new_league, user_rec["Name"])
+                    st.session_state["lb_league_pick"] = rec["LeagueId"]
+                    st.success(tr(LANG_CODE, "league_created", code=rec["Code"]))
+                    my_leagues = user_leagues(user_rec["Name"])
+            with c_join:
+                join_code = st.text_input(tr(LANG_CODE, "league_code"), key="league_join_code")
+                if st.button(tr(LANG_CODE, "league_join"), key="league_join_btn") and join_code.strip():
+                    rec = join_league(join_code, user_rec["Name"])
+                    if rec is None:
+                        st.error(tr(LANG_CODE, "league_bad_code"))
+                    else:
+                        st.session_state["lb_league_pick"] = rec["LeagueId"]
+                        st.success(tr(LANG_CODE, "league_joined", name=rec["Name"]))
+                        my_leagues = user_leagues(user_rec["Name"])
+            if not my_leagues:
+                st.caption(tr(LANG_CODE, "league_none"))
+
+        league_pick = None
+        if my_leagues:
+            league_names = {l["LeagueId"]: l["Name"] for l in my_leagues}
+            choices = [None] + list(league_names)
+            if st.session_state.get("lb_league_pick") not in choices:
+                st.session_state.pop("lb_league_pick", None)
+            league_pick = st.selectbox(
+                tr(LANG_CODE, "league_pick"), choices,
+                format_func=lambda i: tr(LANG_CODE, "leaderboard") if i is None else f"👥 {league_names[i]}",
+                key="lb_league_pick",
+            )
+            if league_pick is not None:
+                league = next(l for l in my_leagues if l["LeagueId"] == league_pick)
+                c_cap, c_leave = st.columns([3, 1])
+                with c_cap:
+                    st.caption(tr(LANG_CODE, "league_code_caption", code=league["Code"], n=len(league_member_names(league_pick))))
+                with c_leave:
+                    if st.button(tr(LANG_CODE, "league_leave"), key="league_leave_btn"):
+                        leave_league(league_pick, user_rec["Name"])
+                        st.session_state.pop("lb_league_pick", None)
+                        st.rerun()
+
+        cube = points_cube()
+        f_round, f_occ = st.columns(2)
+        with f_round:
+            round_opts = sorted(r for r in cube["Round"].unique().tolist() if r)
+            pick_rounds = st.multiselect(tr(LANG_CODE, "round"), round_opts, key="lb_filter_rounds")
+        with f_occ:
+            occ_opts = sorted(o for o in cube["Occasion"].unique().tolist() if o)
+            pick_occs = st.multiselect(tr(LANG_CODE, "occasion"), occ_opts, key="lb_filter_occasions")
+
+        snaps = leaderboard_snapshots()
+        as_of_pick = None
+        if not snaps.empty and not (pick_rounds or pick_occs):
+            options = {tr(LANG_CODE, "lb_now"): None}
+            rounds = snaps["Round"].where(snaps["Round"].notna(), "").astype(str).str.strip()
+            for rnd in reversed(rounds[rounds != ""].drop_duplicates(keep="last").tolist()):
+                options[f"🏁 {tr(LANG_CODE, 'lb_after_round', round=rnd)}"] = ("round", rnd)
+            done_txt = format_dt_column(snaps["CompletedAt"], tz.key, LANG_CODE)
+            for i in reversed(snaps.index):
+                options[f"{snaps.at[i, 'Match']} · {done_txt[i]}"] = ("time", snaps.at[i, "CompletedAt"])
+            as_of_pick = options[st.selectbox(tr(LANG_CODE, "lb_as_of"), list(options), key="lb_as_of_pick")]
+
+        moves = {}
+        if pick_rounds or pick_occs:
+            lb = leaderboard_slice(pick_rounds, pick_occs, cube=cube)
+        elif as_of_pick is None:
+            moves = rank_movement()
+        elif as_of_pick[0] == "round":
+            lb = leaderboard_as_of(round_name=as_of_pick[1]).drop(columns=["Rank"])
+        else:
+            lb = leaderboard_as_of(as_of=as_of_pick[1]).drop(columns=["Rank"])
+        if league_pick is not None:
+            lb = league_leaderboard(league_pick, board.frame if lb is None else lb)
+            if moves:
+                moves = rank_movement(league_member_names(league_pick))
+        if lb is not None:
+            board = RankedBoard(lb)
+
+        if len(board) == 0:
             st.info(tr(LANG_CODE, "no_scores_yet"))
         else:
-            lb = lb.reset_index(drop=True)
-            lb.insert(0, tr(LANG_CODE, "lb_rank"), range(1, len(lb) + 1))
-
-            medals = []
-            for i in lb.index:
-                r_int = int(lb.loc[i, tr(LANG_CODE, "lb_rank")])
-                medals.append("🥇" if r_int == 1 else "🥈" if r_int == 2 else "🥉" if r_int == 3 else "")
-            lb[tr(LANG_CODE, "lb_rank")] = lb[tr(LANG_CODE, "lb_rank")].astype(str) + " " + pd.Series(medals)
+            # The season view reuses the Play tab's cached board. Past the
+            # top rows, only the user's neighbourhood is sent to the browser.
+            show_all = len(board) <= LEADERBOARD_TOP_K or st.checkbox(tr(LANG_CODE, "lb_show_all"), key="lb_show_all")
+            if show_all:
+                lb = board.top(len(board))
+            else:
+                st.caption(tr(LANG_CODE, "lb_top_and_you", k=LEADERBOARD_TOP_K))
+                lb = board.top_and_around(current_name)
+            lb = lb.rename(columns={"Rank": tr(LANG_CODE, "lb_rank")})
+            lb[tr(LANG_CODE, "lb_rank")] = (lb[tr(LANG_CODE, "lb_rank")].astype(str) + " " + lb[tr(LANG_CODE, "lb_rank")].map(rank_medal)).str.rstrip()
 
             col_map = {
                 "User": tr(LANG_CODE, "lb_user"),
@@ -1395,8 +599,40 @@ def page_play_and_leaderboard(LANG_CODE: str, tz: ZoneInfo):
                 "Outcome": tr(LANG_CODE, "lb_outcome"),
                 "Points": tr(LANG_CODE, "lb_points"),
             }
-            show = lb[[tr(LANG_CODE, "lb_rank"), "User", "Predictions", "Exact", "Outcome", "Points"]].rename(columns=col_map)
-            st.dataframe(show, use_container_width=True)
+            show_cols = [tr(LANG_CODE, "lb_rank"), "User", "Predictions", "Exact", "Outcome", "Points"]
+            if moves:
+                lb[tr(LANG_CODE, "lb_move")] = lb["User"].map(moves).map(movement_arrow).fillna("")
+                show_cols.insert(1, tr(LANG_CODE, "lb_move"))
+            show = lb[show_cols].rename(columns=col_map)
+            st.dataframe(show, use_container_width=True, hide_index=True)
+
+        seasons = list_seasons()
+        if seasons:
+            with st.expander(tr(LANG_CODE, "past_seasons")):
+                names = {m["id"]: m.get("name") or m["id"] for m in reversed(seasons)}
+                season_pick = st.selectbox(
+                    tr(LANG_CODE, "season_pick"), [None] + list(names),
+                    format_func=lambda i: "—" if i is None else names[i], key="lb_archive_pick",
+                )
+                archive = load_season_archive(season_pick) if season_pick else None
+                if archive is not None:
+                    meta = archive["meta"]
+                    st.caption(tr(
+                        LANG_CODE, "season_archive_caption",
+                        date=format_dt_column(pd.Series([meta.get("closed_at")]), tz.key, LANG_CODE)[0],
+                        matches=meta.get("matches", 0), players=meta.get("players", 0),
+                    ))
+                    past = archive["leaderboard"].reset_index(drop=True)
+                    if not past.empty:
+                        past.insert(0, tr(LANG_CODE, "lb_rank"), range(1, len(past) + 1))
+                        past = past.rename(columns={
+                            "User": tr(LANG_CODE, "lb_user"),
+                            "Predictions": tr(LANG_CODE, "lb_preds"),
+                            "Exact": tr(LANG_CODE, "lb_exact"),
+                            "Outcome": tr(LANG_CODE, "lb_outcome"),
+                            "Points": tr(LANG_CODE, "lb_points"),
+                        })
+                        st.dataframe(past, use_container_width=True, hide_index=True)
 
 
 def page_admin(LANG_CODE: str, tz: ZoneInfo):
@@ -1404,18 +640,18 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
     st.title(f"🔑 {tr(LANG_CODE,'admin_panel')}")
     show_welcome_top_right(st.session_state.get("current_name") or "Admin", LANG_CODE)
 
-    preds_all = load_csv(PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
-    recompute_leaderboard(preds_all)
+    materialized_leaderboard()
 
-    tab_matches, tab_predictions, tab_settings, tab_users, tab_manual = st.tabs([
+    tab_matches, tab_predictions, tab_settings, tab_users, tab_manual, tab_perf = st.tabs([
         "🏟️ Matches",
         "👀 Predictions",
         "⚙️ Settings",
         "👤 Users",
         "✏️ Manual Edit",
+        "📈 Performance",
     ])
 
-    with tab_matches:
+    with tab_matches, perf_span("section:admin_matches"):
         st.subheader("🏟️ Matches")
 
         with st.expander(f"{tr(LANG_CODE,'add_match')}", expanded=True):
@@ -1501,10 +737,10 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
                     if teamB and away_logo:
                         save_team_logo(teamB, away_logo)
 
-                    m = load_csv(MATCHES_FILE, ["Match", "Kickoff", "Result", "HomeLogo", "AwayLogo", "BigGame", "RealWinner", "Occasion", "OccasionLogo", "Round"])
+                    m = load_csv(GAME.MATCHES_FILE, ["Match", "Kickoff", "Result", "HomeLogo", "AwayLogo", "BigGame", "RealWinner", "Occasion", "OccasionLogo", "Round"])
                     row = pd.DataFrame([{
                         "Match": f"{teamA} vs {teamB}",
-                        "Kickoff": ko.isoformat(),
+                        "Kickoff": ko.astimezone(ZoneInfo("UTC")).isoformat(),
                         "Result": None,
                         "HomeLogo": home_logo,
                         "AwayLogo": away_logo,
@@ -1515,24 +751,26 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
                         "Round": rnd or "",
                     }])
                     m = pd.concat([m, row], ignore_index=True)
-                    save_csv(m, MATCHES_FILE)
+                    save_csv(m, GAME.MATCHES_FILE)
                     st.success(tr(LANG_CODE, "match_added"))
                     st.rerun()
 
         st.markdown("---")
 
         st.markdown(f"### {tr(LANG_CODE,'edit_matches')}")
-        mdf = load_csv(MATCHES_FILE, ["Match", "Kickoff", "Result", "HomeLogo", "AwayLogo", "BigGame", "RealWinner", "Occasion", "OccasionLogo", "Round"])
+        mdf = load_csv(GAME.MATCHES_FILE, ["Match", "Kickoff", "Result", "HomeLogo", "AwayLogo", "BigGame", "RealWinner", "Occasion", "OccasionLogo", "Round"])
         if mdf.empty:
             st.info(tr(LANG_CODE, "no_matches"))
         else:
-            mdf["KO"] = mdf["Kickoff"].apply(parse_iso_dt)
+            mdf["KO"] = to_utc_series(mdf["Kickoff"])
             mdf = mdf.sort_values("KO").reset_index(drop=True)
+            ko_local = mdf["KO"].dt.tz_convert(tz.key)
+            ko_txt = format_dt_column(mdf["Kickoff"], tz.key, LANG_CODE)
 
             for idx, row in mdf.iterrows():
                 st.markdown("---")
                 team_a, team_b = split_match_name(row["Match"])
-                st.markdown(f"**{row['Match']}**  \n{tr(LANG_CODE,'kickoff')}: {format_dt_ampm(row['KO'], tz, LANG_CODE)}")
+                st.markdown(f"**{row['Match']}**  \n{tr(LANG_CODE,'kickoff')}: {ko_txt[idx]}")
 
                 c1, c2, c3 = st.columns(3)
                 with c1:
@@ -1551,12 +789,11 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
                 rcol = st.columns(3)
                 with rcol[0]:
                     new_round = st.text_input(tr(LANG_CODE, "round"), value=str(row.get("Round") or ""), key=f"edit_round_{idx}")
+                local_ko = ko_local[idx] if pd.notna(ko_local[idx]) else None
                 with rcol[1]:
-                    local_ko = to_tz(row["KO"], tz) if row["KO"] else None
                     use_date = local_ko.date() if local_ko else datetime.now(tz).date()
                     nd = st.date_input(tr(LANG_CODE, "date_label"), value=use_date, key=f"edit_date_{idx}")
                 with rcol[2]:
-                    local_ko = to_tz(row["KO"], tz) if row["KO"] else None
                     hr12 = (local_ko.hour % 12) or 12 if local_ko else 9
                     minutes = local_ko.minute if local_ko else 0
                     ap = tr(LANG_CODE, "ampm_pm") if (local_ko and local_ko.hour >= 12) else tr(LANG_CODE, "ampm_am")
@@ -1596,9 +833,9 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
 
                         new_match_name = f"{new_team_a} vs {new_team_b}"
                         mdf.loc[mdf["Match"] == row["Match"], ["Match", "Kickoff", "HomeLogo", "AwayLogo", "BigGame", "Occasion", "OccasionLogo", "Round"]] = [
-                            new_match_name, new_ko.isoformat(), final_logo_a, final_logo_b, bool(big_val), new_occ or "", final_occ_logo, new_round or ""
+                            new_match_name, new_ko.astimezone(ZoneInfo("UTC")).isoformat(), final_logo_a, final_logo_b, bool(big_val), new_occ or "", final_occ_logo, new_round or ""
                         ]
-                        save_csv(mdf, MATCHES_FILE)
+                        save_csv(mdf, GAME.MATCHES_FILE)
                         st.success(tr(LANG_CODE, "updated"))
                         st.rerun()
 
@@ -1608,22 +845,23 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
                         if val and not _parse_score(val):
                             st.error(tr(LANG_CODE, "fmt_error"))
                         else:
+                            mdf[["Result", "RealWinner"]] = mdf[["Result", "RealWinner"]].astype(object)
                             mdf.loc[mdf["Match"] == row["Match"], ["Result", "RealWinner"]] = [(val if val else None), (realw or "")]
-                            save_csv(mdf, MATCHES_FILE)
-
-                            preds_now = load_csv(PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
-                            recompute_leaderboard(preds_now)
+                            save_csv(mdf, GAME.MATCHES_FILE)
+                            materialized_leaderboard()
 
                             if val:
-                                hist = load_csv(MATCH_HISTORY_FILE, ["Match", "Kickoff", "Result", "HomeLogo", "AwayLogo", "BigGame", "RealWinner", "Occasion", "OccasionLogo", "Round", "CompletedAt"])
+                                preds_now = load_csv(GAME.PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
+                                hist = load_csv(GAME.MATCH_HISTORY_FILE, ["Match", "Kickoff", "Result", "HomeLogo", "AwayLogo", "BigGame", "RealWinner", "Occasion", "OccasionLogo", "Round", "CompletedAt"])
                                 hist = ensure_history_schema(hist)
                                 current_row = mdf[mdf["Match"] == row["Match"]].copy()
                                 current_row["CompletedAt"] = datetime.now(ZoneInfo("UTC")).isoformat()
-                                hist = pd.concat([hist, current_row], ignore_index=True)
-                                save_csv(hist, MATCH_HISTORY_FILE)
+                                hist = pd.concat([hist, ensure_history_schema(current_row)], ignore_index=True)
+                                save_csv(hist, GAME.MATCH_HISTORY_FILE)
+                                record_leaderboard_snapshot(row["Match"], preds_now)
 
                                 mdf = mdf[mdf["Match"] != row["Match"]]
-                                save_csv(mdf, MATCHES_FILE)
+                                save_csv(mdf, GAME.MATCHES_FILE)
 
                             st.success(tr(LANG_CODE, "updated"))
                             st.rerun()
@@ -1631,39 +869,52 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
                 with col_actions3:
                     if st.button(tr(LANG_CODE, "delete"), key=f"btn_del_{idx}"):
                         mdf = mdf[mdf["Match"] != row["Match"]]
-                        save_csv(mdf, MATCHES_FILE)
+                        save_csv(mdf, GAME.MATCHES_FILE)
 
-                        p = load_csv(PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
+                        p = load_csv(GAME.PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
+                        gone = p[p["Match"] == row["Match"]]
                         p = p[p["Match"] != row["Match"]]
-                        save_csv(p, PREDICTIONS_FILE)
-                        recompute_leaderboard(p)
+                        save_predictions(p, effective_prediction_rows(p, zip(gone["User"], gone["Match"])))
 
                         st.success(tr(LANG_CODE, "deleted"))
                         st.rerun()
 
         st.markdown("---")
         st.markdown(f"### {tr(LANG_CODE,'match_history')}")
-        hist = load_csv(MATCH_HISTORY_FILE, ["Match", "Kickoff", "Result", "HomeLogo", "AwayLogo", "BigGame", "RealWinner", "Occasion", "OccasionLogo", "Round", "CompletedAt"])
+        hist = load_csv(GAME.MATCH_HISTORY_FILE, ["Match", "Kickoff", "Result", "HomeLogo", "AwayLogo", "BigGame", "RealWinner", "Occasion", "OccasionLogo", "Round", "CompletedAt"])
         hist = ensure_history_schema(hist)
 
         if hist.empty:
             st.info(tr(LANG_CODE, "no_matches"))
         else:
-            tz_local = ZoneInfo("Asia/Riyadh")
             view = hist.copy()
-            view["Kickoff"] = view["Kickoff"].apply(parse_iso_dt)
-            view["CompletedAt"] = pd.to_datetime(view["CompletedAt"], errors="coerce")
-            view = view.sort_values("CompletedAt", ascending=False)
-            view["Kickoff"] = view["Kickoff"].apply(lambda x: format_dt_ampm(x, tz_local, LANG_CODE))
-            view["CompletedAt"] = view["CompletedAt"].dt.strftime("%Y-%m-%d %H:%M")
+            view["CompletedAt"] = to_utc_series(view["CompletedAt"])
+            view = view.sort_values("CompletedAt", ascending=False).reset_index(drop=True)
+            view["Kickoff"] = format_dt_column(view["Kickoff"], tz.key, LANG_CODE)
+            view["CompletedAt"] = view["CompletedAt"].dt.tz_convert(tz.key).dt.strftime("%Y-%m-%d %H:%M")
             st.dataframe(view[["Match", "Kickoff", "Result", "RealWinner", "Occasion", "Round", "CompletedAt"]], use_container_width=True)
 
-    with tab_predictions:
+    with tab_predictions, perf_span("section:admin_predictions"):
         st.subheader("👀 Predictions (View & Delete)")
 
-        preds_view = load_csv(PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
-        matches_view = load_csv(MATCHES_FILE, ["Match", "Kickoff", "Result", "Round"])
-        hist_view = load_csv(MATCH_HISTORY_FILE, ["Match", "Kickoff", "Result", "Round", "CompletedAt"])
+        with st.expander("🗜️ Compaction & audit log", expanded=False):
+            st.caption("Compaction keeps only the latest prediction per user and match in predictions.csv and moves superseded rows to predictions_audit.csv. It also runs before every scheduled snapshot.")
+            c_cmp1, c_cmp2 = st.columns([1, 2])
+            with c_cmp1:
+                if st.button("Compact now", key="btn_compact_predictions"):
+                    try:
+                        st.success(f"Moved {compact_predictions()} superseded row(s) to the audit log ✅")
+                    except Exception as e:
+                        st.error(f"Compaction failed: {e}")
+            with c_cmp2:
+                st.caption("Hot file is compacted ✅" if predictions_compacted() else "Hot file may contain superseded rows.")
+            audit = load_csv(GAME.PREDICTIONS_AUDIT_FILE, PREDICTION_AUDIT_COLS)
+            if not audit.empty:
+                st.dataframe(audit.iloc[::-1].head(500), use_container_width=True, hide_index=True)
+
+        preds_view = load_csv(GAME.PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
+        matches_view = load_csv(GAME.MATCHES_FILE, ["Match", "Kickoff", "Result", "Round"])
+        hist_view = load_csv(GAME.MATCH_HISTORY_FILE, ["Match", "Kickoff", "Result", "Round", "CompletedAt"])
 
         all_matches_for_view = pd.concat([
             matches_view.assign(Status="Open"),
@@ -1704,19 +955,20 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
         else:
             delm = st.selectbox("Select match", options=all_matches_list, key="del_all_match_pick")
             if st.button("Delete ALL predictions for this match", key="btn_del_all_match_preds"):
-                p = load_csv(PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
+                p = load_csv(GAME.PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
                 before = len(p)
+                gone = p[p["Match"] == delm]
                 p = p[p["Match"] != delm]
                 after = len(p)
-                save_csv(p, PREDICTIONS_FILE)
-                recompute_leaderboard(p)
+                save_predictions(p, effective_prediction_rows(p, zip(gone["User"], gone["Match"])))
+                rebuild_leaderboard_history(p)
                 st.success(f"Deleted {before-after} predictions ✅")
                 st.rerun()
 
         st.markdown("---")
         st.markdown("### 🎯 Delete a selected prediction")
 
-        preds_now = load_csv(PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
+        preds_now = load_csv(GAME.PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
         if preds_now.empty:
             st.info("No predictions to delete.")
         else:
@@ -1741,7 +993,7 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
                         st.error("Selection out of range.")
                     else:
                         row = preds_now.iloc[i]
-                        p = load_csv(PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
+                        p = load_csv(GAME.PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
 
                         mask = (
                             (p["User"].astype(str) == str(row["User"])) &
@@ -1752,21 +1004,21 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
                         )
                         removed = int(mask.sum())
                         p = p[~mask]
-                        save_csv(p, PREDICTIONS_FILE)
-                        recompute_leaderboard(p)
+                        save_predictions(p, effective_prediction_rows(p, [(row["User"], row["Match"])]))
+                        rebuild_leaderboard_history(p)
                         st.success(f"Deleted {removed} row(s) ✅")
                         st.rerun()
 # =========================
 # app.py (PART 6/6)
 # =========================
-    with tab_settings:
+    with tab_settings, perf_span("section:admin_settings"):
         st.subheader("⚙️ Settings")
 
         with st.expander("🏁 Season", expanded=True):
             current_season = ""
-            if os.path.exists(SEASON_FILE):
+            if os.path.exists(GAME.SEASON_FILE):
                 try:
-                    with open(SEASON_FILE, "r", encoding="utf-8") as f:
+                    with open(GAME.SEASON_FILE, "r", encoding="utf-8") as f:
                         current_season = f.read().strip()
                 except Exception:
                     pass
@@ -1777,40 +1029,33 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
                 key="season_name_settings_tab",
             )
 
-            c1, c2, c3 = st.columns([1, 1, 2])
-            with c1:
-                if st.button("Save season name", key="btn_save_season_settings_tab"):
+            if st.button("Save season name", key="btn_save_season_settings_tab"):
+                try:
+                    with open(GAME.SEASON_FILE, "w", encoding="utf-8") as f:
+                        f.write((season_name or "").strip())
+                    st.success(tr(LANG_CODE, "season_saved"))
+                except Exception as e:
+                    st.error(str(e))
+
+            st.markdown("---")
+            a1, a2 = st.columns([1, 2])
+            with a1:
+                next_season = st.text_input("Next season name", key="next_season_name_settings_tab")
+                if st.button("Close & archive season", key="btn_close_season_settings_tab"):
                     try:
-                        with open(SEASON_FILE, "w", encoding="utf-8") as f:
-                            f.write((season_name or "").strip())
-                        st.success(tr(LANG_CODE, "season_saved"))
+                        meta = close_season(next_season)
+                        st.success(f"Archived season '{meta['name']}' ({meta['matches']} matches, {meta['players']} players) ✅")
+                        st.rerun()
                     except Exception as e:
-                        st.error(str(e))
-
-            with c2:
-                if st.button("Reset season (danger)", key="btn_reset_season_settings_tab"):
-                    def _safe_remove(p):
-                        try:
-                            if os.path.exists(p):
-                                os.remove(p)
-                        except Exception:
-                            pass
-
-                    for f in [
-                        USERS_FILE, MATCHES_FILE, MATCH_HISTORY_FILE,
-                        PREDICTIONS_FILE, LEADERBOARD_FILE,
-                        SEASON_FILE, LEADERBOARD_OVERRIDES_FILE,
-                        OTP_FILE
-                    ]:
-                        _safe_remove(f)
-
-                    st.session_state.pop("role", None)
-                    st.session_state.pop("current_name", None)
-                    st.success(tr(LANG_CODE, "reset_confirm"))
-                    st.rerun()
-
-            with c3:
-                st.caption("Reset clears users/matches/predictions/leaderboard/overrides/OTP. Team logos are kept.")
+                        st.error(f"Archive failed: {e}")
+            with a2:
+                st.caption("Close freezes matches, predictions and the final leaderboard into a read-only archive and starts an empty season. Users, leagues and logos carry over.")
+                seasons = list_seasons()
+                if seasons:
+                    st.dataframe(
+                        pd.DataFrame(seasons)[["name", "closed_at", "matches", "players", "winner"]].iloc[::-1],
+                        use_container_width=True, hide_index=True,
+                    )
 
         with st.expander("🧪 Insert Test Data", expanded=False):
             if st.button(tr(LANG_CODE, "test_data"), key="btn_test_data_settings_tab"):
@@ -1830,7 +1075,7 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
                 ]
 
                 cols = ["Match","Kickoff","Result","HomeLogo","AwayLogo","BigGame","RealWinner","Occasion","OccasionLogo","Round"]
-                m = load_csv(MATCHES_FILE, cols)
+                m = load_csv(GAME.MATCHES_FILE, cols)
 
                 for A, B, Au, Bu, dt_, hr, mi, ap, big, occ, occlogo, rnd in samples:
                     is_pm = (ap in ["PM","مساء"])
@@ -1846,7 +1091,7 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
 
                     row = pd.DataFrame([{
                         "Match": f"{A} vs {B}",
-                        "Kickoff": ko.isoformat(),
+                        "Kickoff": ko.astimezone(ZoneInfo("UTC")).isoformat(),
                         "Result": None,
                         "HomeLogo": A_logo,
                         "AwayLogo": B_logo,
@@ -1858,7 +1103,7 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
                     }])
                     m = pd.concat([m, row], ignore_index=True)
 
-                save_csv(m, MATCHES_FILE)
+                save_csv(m, GAME.MATCHES_FILE)
                 st.success(tr(LANG_CODE, "test_done"))
                 st.rerun()
 
@@ -1868,16 +1113,23 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
             with bcol1:
                 if st.button("⬇️ Backup Now", key="btn_backup_now_settings_tab"):
                     buf = create_backup_zip()
+                    job = enqueue_backup_upload(buf)
+                    if job:
+                        st.info(f"Queued for upload as {job['key']}.")
+
+                    # Handed over only when the download is clicked, straight
+                    # from the spooled archive.
+                    def backup_download(buf=buf):
+                        buf.seek(0)
+                        return buf
                     st.download_button(
                         "Download prediction_backup.zip",
-                        data=buf.getvalue(),
+                        data=backup_download,
                         file_name="prediction_backup.zip",
                         mime="application/zip",
                         key="dl_backup_zip_settings_tab",
+                        on_click="ignore",
                     )
-                    loc = upload_backup_to_supabase(buf)
-                    if loc:
-                        st.info(f"Also saved to Supabase Storage at: {loc}")
 
             with bcol2:
                 up = st.file_uploader(
@@ -1886,16 +1138,102 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
                     key="upload_restore_zip_settings_tab",
                 )
                 if up and st.button("Restore Now", key="btn_restore_now_settings_tab"):
-                    restore_from_zip(up)
-                    restored_preds = load_csv(PREDICTIONS_FILE, ["User","Match","Prediction","Winner","SubmittedAt"])
-                    recompute_leaderboard(restored_preds)
-                    st.success("Backup restored. Reloading…")
-                    st.rerun()
+                    try:
+                        restore_from_zip(up)
+                    except Exception as e:
+                        st.error(f"Restore failed, nothing was changed: {e}")
+                    else:
+                        invalidate_users_index()
+                        materialized_leaderboard()
+                        rebuild_leaderboard_history()
+                        st.success("Backup restored. Reloading…")
+                        st.rerun()
+
+        with st.expander("☁️ Backup uploads", expanded=False):
+            if _backup_target() is None:
+                st.caption("No upload target configured (set BACKUP_TARGET or the Supabase secrets).")
+            worker = _upload_worker(DATA_DIR)
+            if worker.get("last_error"):
+                st.error(f"Upload worker error: {worker['last_error']}")
+            jobs = list_upload_jobs()
+            if not jobs:
+                st.info("No uploads yet.")
+            else:
+                st.dataframe(pd.DataFrame([{
+                    "Archive": j["key"],
+                    "Status": j["status"],
+                    "Attempts": j["attempts"],
+                    "Location": j.get("location") or "",
+                    "Last error": j.get("last_error") or "",
+                } for j in reversed(jobs)]), use_container_width=True)
+                if any(j["status"] == "failed" for j in jobs):
+                    if st.button("Retry failed uploads", key="btn_retry_failed_uploads"):
+                        retry_failed_uploads()
+                        st.rerun()
 
-    with tab_users:
+        with st.expander("🖥️ Standings pages", expanded=False):
+            pages = standings_status()
+            st.caption("Static English/Arabic standings for TV displays and sharing, re-rendered when results change "
+                       + (f"(checked every {STANDINGS_CHECK_SECONDS:g}s). " if STANDINGS_CHECK_SECONDS > 0
+                          else "(background checks off). ")
+                       + f"Last rendered: {pages['generated'] or '—'}")
+            st.code("\n".join(pages["pages"]), language=None)
+            if pages["last_error"]:
+                st.error(f"Last render failed: {pages['last_error']}")
+            if st.button("Re-render now", key="btn_publish_standings"):
+                try:
+                    publish_standings(force=True)
+                    st.success("Standings pages written.")
+                except Exception as e:
+                    st.error(str(e))
+
+        with st.expander("🕒 Scheduled snapshots", expanded=False):
+            sched = _snapshot_scheduler(DATA_DIR)
+            st.caption(
+                f"Every {SNAPSHOT_INTERVAL_MINUTES:g} min · keeps last {SNAPSHOT_KEEP_RECENT}, {SNAPSHOT_KEEP_HOURLY} hourly / {SNAPSHOT_KEEP_DAILY} daily · "
+                f"last run: {sched.get('last_run') or '—'} ({sched.get('last_result') or '—'})"
+            )
+            if sched.get("last_error"):
+                st.error(f"Last scheduled snapshot failed: {sched['last_error']}")
+
+            if st.button("Snapshot now", key="btn_snapshot_now_settings_tab"):
+                try:
+                    snap = take_snapshot(force=True)
+                    metrics_inc("backups_total", kind="snapshot", outcome="created")
+                    st.success(f"Snapshot {snap['id']} written ({len(snap['changed'])} changed file(s)).")
+                except Exception as e:
+                    metrics_inc("backups_total", kind="snapshot", outcome="failed")
+                    st.error(str(e))
+
+            snaps = list_snapshots()
+            if not snaps:
+                st.info("No snapshots yet.")
+            else:
+                snap_view = pd.DataFrame([{
+                    "Snapshot": sn["id"],
+                    "Created": sn.get("created"),
+                    "Files": len(sn.get("files", {})),
+                    "Changed": len(sn.get("changed", [])),
+                    "Removed": len(sn.get("removed", [])),
+                } for sn in reversed(snaps)])
+                st.dataframe(snap_view, use_container_width=True)
+                snap_pick = st.selectbox("Restore snapshot", options=snap_view["Snapshot"].tolist(), key="snapshot_restore_pick")
+                if st.button("Restore selected snapshot", key="btn_snapshot_restore"):
+                    try:
+                        restore_snapshot(snap_pick)
+                    except Exception as e:
+                        st.error(f"Restore failed: {e}")
+                    else:
+                        invalidate_users_index()
+                        materialized_leaderboard()
+                        rebuild_leaderboard_history()
+                        st.success(f"Snapshot {snap_pick} restored. Reloading…")
+                        st.rerun()
+
+    with tab_users, perf_span("section:admin_users"):
         st.subheader("👤 Users")
 
-        users_df = load_users()
+        users_df = pd.DataFrame(list(_users_index()["by_key"].values()), columns=USER_COLS)
         if users_df.empty:
             st.info("No users yet." if LANG_CODE=="en" else "لا يوجد مستخدمون بعد.")
         else:
@@ -1913,31 +1251,27 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
             act1, act2, act3 = st.columns([1, 1, 2])
             with act1:
                 if st.button(tr(LANG_CODE, "terminate"), key="btn_terminate_tab_users"):
-                    u = load_users()
-                    mask = u["Name"].astype(str).str.strip().str.casefold() == str(target_name).strip().casefold()
-                    if not mask.any():
+                    if not update_user(target_name, IsBanned=1):
                         st.error("User not found." if LANG_CODE=="en" else "المستخدم غير موجود.")
                     else:
-                        u.loc[mask, "IsBanned"] = 1
-                        save_users(u)
                         st.success(tr(LANG_CODE, "terminated"))
                         st.rerun()
 
             with act2:
                 del_label = "Delete user" if LANG_CODE == "en" else "حذف المستخدم"
                 if st.button(del_label, key="btn_delete_user_tab_users"):
-                    u = load_users()
-                    mask_keep = u["Name"].astype(str).str.strip().str.casefold() != str(target_name).strip().casefold()
-                    if mask_keep.all():
+                    if not remove_user(target_name):
                         st.error("User not found." if LANG_CODE=="en" else "المستخدم غير موجود.")
                     else:
-                        u = u[mask_keep]
-                        save_users(u)
-                        p = load_csv(PREDICTIONS_FILE, ["User","Match","Prediction","Winner","SubmittedAt"])
-                        p = p[p["User"].astype(str).str.strip().str.casefold() != str(target_name).strip().casefold()]
-                        save_csv(p, PREDICTIONS_FILE)
-                        recompute_leaderboard(p)
+                        p = load_csv(GAME.PREDICTIONS_FILE, ["User","Match","Prediction","Winner","SubmittedAt"])
+                        mine = p["User"].astype(str).str.strip().str.casefold() == _user_key(target_name)
+                        gone = p[mine]
+                        p = p[~mine]
+                        save_predictions(p, effective_prediction_rows(p, zip(gone["User"], gone["Match"])))
+                        rebuild_leaderboard_history(p)
                         otp_revoke(str(target_name))
+                        for league in user_leagues(target_name):
+                            leave_league(league["LeagueId"], target_name)
                         st.success("User deleted." if LANG_CODE=="en" else "تم حذف المستخدم.")
                         st.rerun()
 
@@ -1971,11 +1305,21 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
             if last_user and last_code and str(last_user) == str(target_name):
                 st.code(f"OTP for {target_name}: {last_code}")
 
-    with tab_manual:
+        st.markdown("---")
+        with st.expander("🛡️ Login & OTP throttling", expanded=False):
+            counters, blocked = throttle_snapshot()
+            if counters:
+                st.dataframe(pd.DataFrame(sorted(counters.items()), columns=["Counter", "Count"]), use_container_width=True)
+            else:
+                st.caption("No login or OTP attempts since the server started.")
+            if blocked:
+                st.markdown("**Currently locked out**")
+                st.dataframe(pd.DataFrame(blocked), use_container_width=True)
+
+    with tab_manual, perf_span("section:admin_manual"):
         st.subheader("✏️ Manual Overrides (Predictions & Points)")
 
-        preds_now_for_edit = load_csv(PREDICTIONS_FILE, ["User","Match","Prediction","Winner","SubmittedAt"])
-        lb_current = recompute_leaderboard(preds_now_for_edit).copy()
+        lb_current = materialized_leaderboard()
         overrides = load_overrides()
 
         if lb_current.empty:
@@ -2052,9 +1396,54 @@ def page_admin(LANG_CODE: str, tz: ZoneInfo):
                     applied["Points"] = applied.apply(lambda r: _coalesce(r.get("Points"), r.get("Points_ovr")), axis=1)
                     applied = applied[["User", "Points", "Predictions", "Exact", "Outcome"]]
                     applied = applied.sort_values(["Points", "Predictions", "Exact"], ascending=[False, True, False])
-                    save_csv(applied, LEADERBOARD_FILE)
+                    save_csv(applied, GAME.LEADERBOARD_FILE)
                     st.success("Applied overrides to leaderboard.csv")
 
+    with tab_perf:
+        st.subheader("📈 Performance")
+        exporter = _metrics_exporter()
+        if exporter["address"] or exporter["textfile"]:
+            st.caption("Prometheus metrics: " + " · ".join(
+                x for x in [exporter["address"] and f"http://{exporter['address']}/metrics",
+                            exporter["textfile"] and f"textfile {exporter['textfile']}"] if x))
+        if exporter["last_error"]:
+            st.warning(f"Metrics exporter: {exporter['last_error']}")
+        feed = _feed_exporter()
+        if feed["address"]:
+            st.caption(f"Spectator feed: http://{feed['address']}/leaderboard.json (also rounds, matches; .csv)")
+        if feed["last_error"]:
+            st.warning(f"Spectator feed: {feed['last_error']}")
+        store = _perf_store(DATA_DIR)
+        enabled = st.checkbox("Profile reruns (all sessions of this game)", value=store["enabled"], key="perf_enabled_toggle")
+        if enabled != store["enabled"]:
+            store["enabled"] = enabled
+            st.rerun()
+        if not enabled:
+            st.caption("Profiling is off. Turn it on here or set PROFILE_RERUNS=1; timings are kept in memory only.")
+        else:
+            ops, slow = perf_summary()
+            st.caption(f"Last {PERF_WINDOW_MINUTES} min · {store['reruns']} reruns profiled since reset · "
+                       f"reruns slower than {PERF_SLOW_RERUN_MS:.0f} ms are kept below. Percentiles are histogram bucket bounds.")
+            st.markdown("**Slowest operations**")
+            if ops.empty:
+                st.caption("Nothing recorded yet.")
+            else:
+                st.dataframe(ops, use_container_width=True, hide_index=True)
+
+            st.markdown(f"**Last {len(slow)} slow reruns**")
+            for r in slow:
+                with st.expander(f"{r['started']} · {r['page']} · {r['ms']:.0f} ms" + ("" if r["end"] == "done" else f" · {r['end']}")):
+                    parts = pd.DataFrame(
+                        [{"Operation": op, "Calls": a[0], "ms": round(a[1] * 1000, 1), "KB read": round(a[2] / 1024, 1), "KB written": round(a[3] / 1024, 1)}
+                         for op, a in r["ops"].items()],
+                        columns=["Operation", "Calls", "ms", "KB read", "KB written"],
+                    )
+                    st.dataframe(parts.sort_values("ms", ascending=False), use_container_width=True, hide_index=True)
+
+            if st.button("Reset profiling data", key="btn_perf_reset"):
+                perf_reset()
+                st.rerun()
+
     return
 
 
@@ -2088,15 +1477,31 @@ def run_app():
         st.query_params["tz"] = tz_str
     except Exception:
         try:
-            st.query_params = {"tz": tz_str}
+            st.query_params = {"tz": tz_str, **({"game": TENANT_ID} if TENANT_ID else {})}
         except Exception:
             pass
 
+    if TENANTS and TENANT_ID not in TENANTS:
+        st.error("Unknown game. Pick one below." if LANG_CODE == "en" else "لعبة غير معروفة. اختر من القائمة.")
+        for tid, cfg in TENANTS.items():
+            st.markdown(f"- [{cfg.get('title') or tid}](?game={tid})")
+        return
+    if st.session_state.get("tenant") != TENANT_ID:
+        logout_session()
+        st.session_state["tenant"] = TENANT_ID
+    if TENANT_ID:
+        st.sidebar.caption(f"🏟️ {TENANT.get('title') or TENANT_ID}")
+
     tz = ZoneInfo(tz_str)
+    _snapshot_scheduler(DATA_DIR)
+    _upload_worker(DATA_DIR)
+    _metrics_exporter()
+    _feed_exporter()
+    _standings_publisher(DATA_DIR)
+    metrics_register_files(GAME.BACKUP_FILES + [GAME.EVENTS_FILE, GAME.LEADERBOARD_CHECKPOINT_FILE])
 
     if st.sidebar.button("Logout" if LANG_CODE == "en" else "تسجيل الخروج"):
-        st.session_state.pop("role", None)
-        st.session_state.pop("current_name", None)
+        logout_session()
         st.rerun()
 
     role = st.session_state.get("role", None)
@@ -2111,7 +1516,8 @@ def run_app():
 
 if __name__ == "__main__":
     try:
-        run_app()
+        with perf_rerun(lambda: st.session_state.get("role") or "login"):
+            run_app()
     except Exception as e:
         st.error("App crashed")
         st.exception(e)
\ No newline at end of file
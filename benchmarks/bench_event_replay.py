@@ -0,0 +1,82 @@
+"""Replay throughput of the prediction event log vs. a full leaderboard recompute.
+
+Builds a synthetic season in a temporary directory, appends one
+"predictions" event per submission, then times replaying the log tail from
+the checkpoint against rescoring every prediction with recompute_leaderboard.
+
+    python benchmarks/bench_event_replay.py --users 2000 --matches 380 --events 200000
+"""
+import argparse, json, os, random, sys, tempfile, time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=2000)
+    ap.add_argument("--matches", type=int, default=380)
+    ap.add_argument("--events", type=int, default=200000)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="bench-replay-"))
+    sys.path.insert(0, ROOT)
+    import pandas as pd
+    from prediction_core import scoring, use_game
+
+    game = use_game()
+    rnd = random.Random(args.seed)
+    start = datetime(2025, 8, 1, tzinfo=timezone.utc)
+    teams = [f"Team {i:02d}" for i in range(20)]
+    matches = []
+    for i in range(args.matches):
+        a, b = rnd.sample(teams, 2)
+        matches.append({
+            "Match": f"{a} vs {b} #{i}", "Kickoff": (start + timedelta(hours=i)).isoformat(),
+            "Result": f"{rnd.randint(0, 4)}-{rnd.randint(0, 4)}", "BigGame": i % 10 == 0,
+            "RealWinner": "", "Round": f"R{i // 10 + 1}", "Occasion": "League",
+        })
+    pd.DataFrame(matches).to_csv(game.MATCHES_FILE, index=False)
+
+    scoring.materialized_leaderboard()
+    store = scoring._lb_store(game.DATA_DIR)
+    scoring._lb_write_checkpoint(store["state"])
+    seq = store["state"]["seq"]
+
+    rows = []
+    with open(game.EVENTS_FILE, "a", encoding="utf-8") as f:
+        for i in range(args.events):
+            user = f"user{rnd.randrange(args.users)}"
+            m = rnd.choice(matches)["Match"]
+            pred = f"{rnd.randint(0, 4)}-{rnd.randint(0, 4)}"
+            winner = rnd.choice(m.split(" #")[0].split(" vs ") + ["Draw"])
+            rows.append([user, m, pred, winner, (start + timedelta(seconds=i)).isoformat()])
+            seq += 1
+            f.write(json.dumps({"seq": seq, "type": "predictions", "rows": [[user, m, pred, winner]]}) + "\n")
+    preds = pd.DataFrame(rows, columns=["User", "Match", "Prediction", "Winner", "SubmittedAt"])
+    preds.to_csv(game.PREDICTIONS_FILE, index=False)
+
+    t0 = time.perf_counter()
+    state = scoring._lb_load_checkpoint()
+    t1 = time.perf_counter()
+    applied = scoring._lb_replay(state)
+    t2 = time.perf_counter()
+    replayed = scoring._lb_frame(state, False)
+    t3 = time.perf_counter()
+    full = scoring.recompute_leaderboard(preds)
+    t4 = time.perf_counter()
+
+    cols = ["User", "Points", "Predictions", "Exact", "Outcome"]
+    same = full[cols].reset_index(drop=True).astype(str).equals(replayed[cols].astype(str))
+    print(f"events replayed      {applied}")
+    print(f"checkpoint load      {t1 - t0:8.3f} s")
+    print(f"replay               {t2 - t1:8.3f} s  ({applied / max(t2 - t1, 1e-9):,.0f} events/s)")
+    print(f"leaderboard frame    {t3 - t2:8.3f} s")
+    print(f"full recompute       {t4 - t3:8.3f} s")
+    print(f"results match        {same}")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
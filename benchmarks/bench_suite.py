@@ -0,0 +1,197 @@
+"""Benchmark suite for the scoring, storage, login, OTP and backup paths.
+
+Generates a synthetic season (see generate_season.py) in a temporary
+directory, times each operation and writes the results as JSON so runs can
+be compared between commits:
+
+    python benchmarks/bench_suite.py --users 50000 --matches 400 --json before.json
+    python benchmarks/bench_suite.py --users 50000 --matches 400 --json after.json --compare before.json
+
+--compare prints the median ratio per benchmark and exits non-zero when any
+benchmark is slower than --fail-over times the baseline.
+"""
+import argparse, io, json, os, platform, random, statistics, subprocess, sys, tempfile, threading, time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+PRED_COLS = ["User", "Match", "Prediction", "Winner", "SubmittedAt"]
+
+
+def _timeit(fn, repeat: int, setup=None) -> dict:
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return {"median_s": statistics.median(runs), "min_s": min(runs), "max_s": max(runs), "runs": repeat}
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_suite(args) -> dict:
+    sys.path.insert(0, HERE)
+    from generate_season import generate
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="bench-season-")
+    season = generate(data_dir, args.users, args.matches, args.coverage, args.resubmit, seed=args.seed)
+    os.chdir(data_dir)
+    sys.path.insert(0, ROOT)
+    import pandas as pd
+    import prediction_core as core
+    from prediction_core import accounts, scoring
+
+    game = core.use_game()
+    rnd = random.Random(args.seed)
+    names = pd.read_csv(game.USERS_FILE, usecols=["Name"])["Name"].tolist()
+    preds = core.load_csv(game.PREDICTIONS_FILE, PRED_COLS)
+    matches_full = scoring._load_all_matches_for_scoring()
+    scratch = os.path.join(data_dir, "bench_scratch.csv")
+    r = args.repeat
+    results = {}
+
+    def bench(name, fn, repeat=r, setup=None):
+        results[name] = _timeit(fn, repeat, setup)
+        print(f"{name:32s} {results[name]['median_s'] * 1000:10.2f} ms", file=sys.stderr)
+
+    bench("import.prediction_core", lambda: subprocess.run([sys.executable, "-c", "import prediction_core"], cwd=ROOT, check=True))
+    bench("load_csv.predictions", lambda: core.load_csv(game.PREDICTIONS_FILE, PRED_COLS))
+    bench("save_csv.predictions", lambda: core.save_csv(preds, scratch))
+    bench("load_all_matches", scoring._load_all_matches_for_scoring)
+    bench("score_predictions", lambda: core.score_predictions(preds, matches_full))
+    bench("recompute_leaderboard", lambda: core.recompute_leaderboard(preds))
+    bench("points_cube.cold", core.points_cube, setup=scoring._points_cube_cached.clear)
+    bench("points_cube.warm", core.points_cube)
+
+    def reset_view():
+        scoring._lb_store(game.DATA_DIR)["state"] = None
+        for f in (game.EVENTS_FILE, game.LEADERBOARD_CHECKPOINT_FILE):
+            if os.path.exists(f):
+                os.remove(f)
+    bench("materialized_lb.rebase", core.materialized_leaderboard, setup=reset_view)
+    bench("materialized_lb.checkpoint", core.materialized_leaderboard,
+          setup=lambda: scoring._lb_store(game.DATA_DIR).update(state=None))
+    bench("materialized_lb.warm", core.materialized_leaderboard)
+    bench("leaderboard_history.rebuild", lambda: core.rebuild_leaderboard_history(preds))
+    bench("leaderboard_as_of", lambda: core.leaderboard_as_of(round_name="Round 1"))
+
+    bench("users_index.cold", accounts._users_index, setup=core.invalidate_users_index)
+    lookups = [rnd.choice(names) for _ in range(1000)]
+    bench("find_user.x1000", lambda: [core.find_user(n) for n in lookups])
+    rec = core.find_user(names[0])
+    bench("verify_pin", lambda: accounts._verify_pin(rec["PinHash"], season["pin"]))
+
+    otp_users = names[:100]
+    codes = {}
+    bench("otp_generate.x100", lambda: codes.update({u: core.otp_generate(u) for u in otp_users}))
+    bench("otp_validate.x100", lambda: [core.otp_validate(u, codes[u]) for u in otp_users], repeat=1)
+    accounts._otp_flush(accounts._otp_store_resource(game.DATA_DIR))
+
+    def backup():
+        buf = core.create_backup_zip()
+        buf.seek(0, io.SEEK_END)
+        buf.close()
+    bench("create_backup_zip", backup)
+    bench("take_snapshot.force", lambda: core.take_snapshot(force=True))
+    bench("compact_predictions", core.compact_predictions, repeat=1)
+
+    from http.client import HTTPConnection
+    from prediction_core import feed
+    server = core.feed_server("127.0.0.1", 0, game)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    conn = HTTPConnection(*server.server_address[:2])
+
+    def feed_get(path, etag=None):
+        conn.request("GET", path, headers={"If-None-Match": etag} if etag else {})
+        resp = conn.getresponse()
+        resp.read()
+        return resp.getheader("ETag")
+    bench("feed.leaderboard.render", lambda: feed.feed_body("leaderboard", "json"),
+          setup=lambda: feed._feed_store(os.path.abspath(game.DATA_DIR))["bodies"].clear())
+    etag = feed_get("/leaderboard.json")
+    bench("feed.request_200.x1000", lambda: [feed_get("/leaderboard.json") for _ in range(1000)])
+    bench("feed.request_304.x1000", lambda: [feed_get("/leaderboard.json", etag) for _ in range(1000)])
+    conn.close()
+    server.shutdown()
+
+    if args.apptest:
+        from streamlit.testing.v1 import AppTest
+
+        def render_play():
+            at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600)
+            at.session_state["tenant"] = game.TENANT_ID
+            at.session_state["role"] = "user"
+            at.session_state["current_name"] = rnd.choice(names)
+            at.run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].value)
+            if not at.tabs:
+                raise RuntimeError("Play page did not render")
+        bench("apptest.play_tab_render", render_play)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "params": {k: v for k, v in vars(args).items() if k not in ("json", "compare", "data_dir")},
+        "season": season,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, fail_over: float) -> int:
+    worst = 0.0
+    print(f"{'benchmark':32s} {'base ms':>10s} {'now ms':>10s} {'ratio':>7s}")
+    for name, res in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"{name:32s} {'-':>10s} {res['median_s'] * 1000:10.2f} {'new':>7s}")
+            continue
+        ratio = res["median_s"] / max(base["median_s"], 1e-9)
+        worst = max(worst, ratio)
+        flag = "  <-- slower" if ratio > fail_over else ""
+        print(f"{name:32s} {base['median_s'] * 1000:10.2f} {res['median_s'] * 1000:10.2f} {ratio:7.2f}{flag}")
+    return 1 if worst > fail_over else 0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--users", type=int, default=2000)
+    ap.add_argument("--matches", type=int, default=400)
+    ap.add_argument("--coverage", type=float, default=0.5)
+    ap.add_argument("--resubmit", type=float, default=0.05)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--apptest", action="store_true", help="also time a Play tab render through AppTest")
+    ap.add_argument("--data-dir", default=None, help="where to generate the season (default: a temp dir)")
+    ap.add_argument("--json", default=None, help="write results to this file (default: stdout)")
+    ap.add_argument("--compare", default=None, help="baseline JSON from an earlier run")
+    ap.add_argument("--fail-over", type=float, default=1.25)
+    args = ap.parse_args(argv)
+
+    out = run_suite(args)
+    text = json.dumps(out, indent=2)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            return compare(out, json.load(f), args.fail_over)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""Reproducible synthetic season for benchmarks and load tests.
+
+Writes users.csv, matches.csv, match_history.csv, predictions.csv and
+season.txt into a data directory, in the same layout the app uses. Every
+user's PIN is "1234". No network access is needed (matches carry no logos).
+Open matches are scheduled from --now, the first one kicking off an hour
+later so its prediction window is open.
+
+    python benchmarks/generate_season.py /tmp/season --users 50000 --matches 400 --resubmit 0.05
+"""
+import argparse, hashlib, json, os, sys
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+PIN = "1234"
+
+
+def _pin_hashes(n: int, rng: np.random.Generator) -> list:
+    out = []
+    for salt in rng.integers(0, 2 ** 63, size=n):
+        s = f"{int(salt):016x}"
+        out.append(f"{s}:{hashlib.sha256((s + PIN).encode('utf-8')).hexdigest()}")
+    return out
+
+
+def _fixtures(n_matches: int) -> list:
+    n_teams = 2
+    while n_teams * (n_teams - 1) < n_matches:
+        n_teams += 1
+    teams = [f"Team {i:02d}" for i in range(n_teams)]
+    pairs = [(a, b) for a in teams for b in teams if a != b]
+    return pairs[:n_matches], max(1, n_teams // 2)
+
+
+def generate(out_dir: str, users: int = 2000, matches: int = 400, coverage: float = 0.5,
+             resubmit: float = 0.05, played: float = 0.75, seed: int = 42, now: datetime | None = None) -> dict:
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    if now is None:
+        now = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    pairs, per_round = _fixtures(matches)
+    n_played = int(round(matches * played))
+    start = now - timedelta(days=7 * (n_played // per_round + 1))
+
+    names = [f"player{i:06d}" for i in range(users)]
+    created = [(start - timedelta(minutes=int(m))).isoformat() for m in rng.integers(0, 60 * 24 * 30, size=users)]
+    pd.DataFrame({"Name": names, "CreatedAt": created, "IsBanned": 0, "PinHash": _pin_hashes(users, rng)}).to_csv(
+        os.path.join(out_dir, "users.csv"), index=False)
+
+    rows = []
+    for i, (a, b) in enumerate(pairs):
+        ko = start + timedelta(days=7 * (i // per_round), hours=int(i % per_round) * 2)
+        if i >= n_played:
+            j = i - n_played
+            ko = now + timedelta(days=7 * (j // per_round), hours=1 + (j % per_round) * 2)
+        ha, hb = (int(x) for x in rng.integers(0, 4, size=2))
+        real = "Draw" if ha == hb else (a if ha > hb else b)
+        rows.append({
+            "Match": f"{a} vs {b}", "Kickoff": ko.isoformat(),
+            "Result": f"{ha}-{hb}" if i < n_played else None, "HomeLogo": None, "AwayLogo": None,
+            "BigGame": i % 10 == 0, "RealWinner": real if i < n_played else "",
+            "Occasion": "League", "OccasionLogo": None, "Round": f"Round {i // per_round + 1}",
+            "CompletedAt": (ko + timedelta(hours=2)).isoformat() if i < n_played else None,
+        })
+    mdf = pd.DataFrame(rows)
+    hist_cols = list(mdf.columns)
+    open_cols = [c for c in hist_cols if c != "CompletedAt"]
+    mdf.iloc[:n_played][hist_cols].to_csv(os.path.join(out_dir, "match_history.csv"), index=False)
+    mdf.iloc[n_played:][open_cols].to_csv(os.path.join(out_dir, "matches.csv"), index=False)
+
+    # Played matches get predictions; open ones are left for the Play tab.
+    predictable = n_played
+    take = rng.random((users, predictable)) < coverage
+    ui, mi = np.nonzero(take)
+    n = len(ui)
+    h1, h2 = rng.integers(0, 4, size=n), rng.integers(0, 4, size=n)
+    ko_ts = pd.to_datetime(mdf["Kickoff"].iloc[:predictable].to_numpy(), utc=True)
+    submitted = ko_ts[mi] - pd.to_timedelta(rng.integers(60, 7200, size=n), unit="s")
+    home = np.array([p[0] for p in pairs[:predictable]], dtype=object)[mi]
+    away = np.array([p[1] for p in pairs[:predictable]], dtype=object)[mi]
+    winner = np.where(h1 > h2, home, np.where(h1 < h2, away, "Draw"))
+    preds = pd.DataFrame({
+        "User": np.array(names, dtype=object)[ui],
+        "Match": mdf["Match"].to_numpy()[mi],
+        "Prediction": [f"{x}-{y}" for x, y in zip(h1, h2)],
+        "Winner": winner,
+        "SubmittedAt": submitted,
+    })
+
+    n_re = int(round(n * resubmit))
+    if n_re:
+        re_rows = preds.iloc[rng.choice(n, size=n_re, replace=False)].copy()
+        re_rows["SubmittedAt"] = re_rows["SubmittedAt"] - pd.to_timedelta(rng.integers(7201, 14400, size=n_re), unit="s")
+        preds = pd.concat([preds, re_rows], ignore_index=True)
+    preds = preds.sort_values("SubmittedAt", kind="stable").reset_index(drop=True)
+    preds["SubmittedAt"] = preds["SubmittedAt"].map(lambda t: t.isoformat())
+    preds.to_csv(os.path.join(out_dir, "predictions.csv"), index=False)
+
+    with open(os.path.join(out_dir, "season.txt"), "w", encoding="utf-8") as f:
+        f.write("Synthetic season")
+
+    return {"users": users, "matches": matches, "played": n_played, "predictions": int(len(preds)),
+            "resubmits": n_re, "seed": seed, "pin": PIN}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("out_dir")
+    ap.add_argument("--users", type=int, default=2000)
+    ap.add_argument("--matches", type=int, default=400)
+    ap.add_argument("--coverage", type=float, default=0.5, help="share of played matches each user predicted")
+    ap.add_argument("--resubmit", type=float, default=0.05, help="extra superseded rows, as a share of predictions")
+    ap.add_argument("--played", type=float, default=0.75, help="share of matches already completed")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--now", default=None, help="ISO anchor for open kickoffs (default: today 00:00 UTC)")
+    args = ap.parse_args(argv)
+    now = datetime.fromisoformat(args.now) if args.now else None
+    info = generate(args.out_dir, args.users, args.matches, args.coverage, args.resubmit, args.played, args.seed, now)
+    print(json.dumps(info, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""Concurrent-session load test driving the real app through Streamlit's AppTest.
+
+Each simulated session is its own AppTest (own session state, same process
+and shared caches, like browser tabs on one server; see _share_runtime for
+what it takes to let AppTest runs overlap). Phases run with --concurrency
+sessions in parallel:
+
+  login    every session logs in with the synthetic PIN
+  play     every session reruns the Play page --renders times
+  submit   every session submits a prediction for the match kicking off soon
+  result   the admin posts that match's result while sessions keep rerunning
+
+Reported per phase: p50/p95/p99 rerun latency, files opened for writing
+under the data dir per action (counted with an audit hook), and lost writes
+(submissions acknowledged on screen but missing from predictions.csv).
+
+    python benchmarks/load_test.py --sessions 40 --concurrency 8 --json load.json
+"""
+import argparse, json, logging, os, statistics, sys, tempfile, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+APP = os.path.join(ROOT, "app.py")
+ADMIN_PASSWORD = "load-test-admin"
+
+
+class WriteCounter:
+    def __init__(self, root: str):
+        self.root = os.path.realpath(root)
+        self.count = 0
+        self.lock = threading.Lock()
+        sys.addaudithook(self._hook)
+
+    def _hook(self, event, args):
+        if event != "open" or not args or not isinstance(args[0], (str, bytes, os.PathLike)):
+            return
+        mode, flags = (args[1], args[2]) if len(args) > 2 else (None, 0)
+        writing = any(c in mode for c in "wax+") if isinstance(mode, str) else bool((flags or 0) & (os.O_WRONLY | os.O_RDWR))
+        if writing and os.path.realpath(os.fsdecode(args[0])).startswith(self.root):
+            with self.lock:
+                self.count += 1
+
+
+def _share_runtime():
+    # AppTest installs a fresh mock Runtime (and patches config.get_option) for
+    # every run and clears it afterwards, so overlapping runs in threads tear
+    # each other's runtime down mid-script; it also recompiles the script per
+    # run, and concurrent ast.parse is not thread-safe on older 3.11 builds.
+    # Install one of each for the whole process instead -- one server, one
+    # Runtime, one script cache -- and point AppTest at a private subclass so
+    # its per-run swap is a no-op.
+    import contextlib
+    from unittest.mock import MagicMock
+    from streamlit import config
+    from streamlit.components.v2.component_manager import BidiComponentManager
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+    from streamlit.testing.v1.util import build_mock_config_get_option
+
+    shared = MagicMock(spec=Runtime)
+    shared.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared.dataframe_source_mgr = DataframeSourceManager()
+    shared.cache_storage_manager = MemoryCacheStorageManager()
+    shared.bidi_component_registry = BidiComponentManager()
+    shared.bidi_component_registry.discover_and_register_components(start_file_watching=False)
+    Runtime._instance = shared
+    app_test.Runtime = type("_PerRunRuntime", (Runtime,), {})
+    config.get_option = build_mock_config_get_option({"global.appTest": True, "logger.level": "error"})
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+    app_test.patch_config_options = lambda overrides: contextlib.nullcontext()
+    script_cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+
+
+def _pct(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+class Session:
+    def __init__(self, name: str | None):
+        from streamlit.testing.v1 import AppTest
+        self.name = name
+        self.at = AppTest.from_file(APP, default_timeout=600)
+        self.latencies = []
+        self.errors = []
+
+    def _timed(self, fn):
+        t0 = time.perf_counter()
+        fn()
+        self.latencies.append(time.perf_counter() - t0)
+        if self.at.exception:
+            self.errors.append(str(self.at.exception[0].value))
+
+    def start(self):
+        self._timed(self.at.run)
+
+    def login(self, pin: str):
+        self.at.text_input(key="login_name").input(self.name)
+        self.at.text_input(key="login_pin").input(pin)
+        self._timed(self.at.button(key="btn_user_login").click().run)
+        if "role" not in self.at.session_state or self.at.session_state["role"] != "user":
+            shown = [str(e.value) for e in self.at.error] + [str(w.value) for w in self.at.warning]
+            self.errors.append("login failed" + (": " + " | ".join(shown) if shown else ""))
+
+    def admin_login(self):
+        r = self.at.radio(key="login_role_selector")
+        self._timed(r.set_value(r.options[1]).run)
+        for ti in self.at.text_input:
+            if ti.label.startswith("Admin"):
+                ti.input(ADMIN_PASSWORD)
+        self._timed(self.at.button(key="btn_admin_login").click().run)
+
+    def rerun(self):
+        self._timed(self.at.run)
+
+    def submit(self, score: str) -> bool:
+        boxes = [t for t in self.at.text_input if (t.key or "").startswith("pred_score_")]
+        buttons = [b for b in self.at.button if (b.key or "").startswith("btn_") and b.key.count("_") == 2]
+        if not boxes or not buttons:
+            self.errors.append("no open prediction form")
+            return False
+        boxes[0].input(score)
+        self._timed(buttons[0].click().run)
+        return any("saved" in str(s.value).lower() or "تم" in str(s.value) for s in self.at.success)
+
+    def post_result(self, match: str, score: str):
+        team_a, team_b = match.split(" vs ", 1)
+        for ti in self.at.text_input:
+            idx = (ti.key or "").rpartition("_")[2]
+            if (ti.key or "").startswith("edit_team_a_") and ti.value == team_a \
+                    and self.at.text_input(key=f"edit_team_b_{idx}").value == team_b:
+                self.at.text_input(key=f"edit_res_{idx}").input(score)
+                self._timed(self.at.button(key=f"btn_save_score_{idx}").click().run)
+                return
+        self.errors.append(f"no result form for {match}")
+
+
+def _prepare(args) -> dict:
+    sys.path.insert(0, HERE)
+    from generate_season import generate
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="load-season-")
+    info = generate(data_dir, args.users, args.matches, args.coverage, args.resubmit, seed=args.seed)
+    import pandas as pd
+    mpath = os.path.join(data_dir, "matches.csv")
+    m = pd.read_csv(mpath)
+    kickoff = datetime.now(timezone.utc) + timedelta(seconds=args.kickoff_in)
+    m.loc[0, "Kickoff"] = kickoff.isoformat()
+    m.to_csv(mpath, index=False)
+    info.update(data_dir=data_dir, match=str(m.loc[0, "Match"]), kickoff=kickoff.isoformat())
+    return info
+
+
+def run(args) -> dict:
+    os.environ["ADMIN_PASSWORD"] = ADMIN_PASSWORD
+    os.environ["SNAPSHOT_INTERVAL_MINUTES"] = "0"
+    season = _prepare(args)
+    os.chdir(season["data_dir"])
+    _share_runtime()
+    counter = WriteCounter(season["data_dir"])
+
+    names = [f"player{i:06d}" for i in range(min(args.sessions, args.users))]
+    pool = ThreadPoolExecutor(max_workers=args.concurrency)
+    sessions = list(pool.map(Session, names))
+    admin = Session(None)
+    phases = {}
+
+    def phase(label, fn, targets, actions_per_target=1):
+        before_lat = {id(s): len(s.latencies) for s in targets}
+        writes0 = counter.count
+        t0 = time.perf_counter()
+        out = list(pool.map(fn, targets))
+        wall = time.perf_counter() - t0
+        lat = [x for s in targets for x in s.latencies[before_lat[id(s)]:]]
+        actions = len(targets) * actions_per_target
+        phases[label] = {
+            "actions": actions, "wall_s": wall, "reruns": len(lat),
+            "p50_s": _pct(lat, 50), "p95_s": _pct(lat, 95), "p99_s": _pct(lat, 99),
+            "mean_s": statistics.mean(lat) if lat else None,
+            "writes": counter.count - writes0, "writes_per_action": (counter.count - writes0) / max(actions, 1),
+        }
+        return out
+
+    phase("start", Session.start, sessions + [admin])
+    phase("login", lambda s: s.login(season["pin"]), sessions)
+    phase("play", lambda s: [s.rerun() for _ in range(args.renders)], sessions, args.renders)
+    scores = {s.name: f"{i % 4}-{(i // 4) % 4}" for i, s in enumerate(sessions)}
+    acked = phase("submit", lambda s: s.submit(scores[s.name]), sessions)
+
+    admin.admin_login()
+    result_done = threading.Event()
+
+    def match_day(s):
+        if s is admin:
+            s.post_result(season["match"], "2-1")
+            result_done.set()
+        else:
+            while not result_done.is_set():
+                s.rerun()
+    phase("result", match_day, [admin] + sessions)
+    pool.shutdown()
+
+    import pandas as pd
+    preds = pd.read_csv(os.path.join(season["data_dir"], "predictions.csv"))
+    stored = set(zip(preds["User"].astype(str), preds["Match"].astype(str), preds["Prediction"].astype(str)))
+    expected = [(s.name, season["match"], scores[s.name]) for s, ok in zip(sessions, acked) if ok]
+    lost = [e for e in expected if e not in stored]
+    hist = pd.read_csv(os.path.join(season["data_dir"], "match_history.csv"))
+    errors = [e for s in sessions + [admin] for e in s.errors]
+
+    return {
+        "params": {k: v for k, v in vars(args).items() if k not in ("json", "data_dir")},
+        "season": season,
+        "phases": phases,
+        "submissions": {"attempted": len(sessions), "acknowledged": len(expected), "lost_writes": len(lost),
+                        "lost": [list(x) for x in lost[:20]]},
+        "result_posted": bool((hist["Match"].astype(str) == season["match"]).any()),
+        "errors": errors[:20],
+        "error_count": len(errors),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sessions", type=int, default=20)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--renders", type=int, default=3, help="Play page reruns per session")
+    ap.add_argument("--users", type=int, default=500)
+    ap.add_argument("--matches", type=int, default=60)
+    ap.add_argument("--coverage", type=float, default=0.5)
+    ap.add_argument("--resubmit", type=float, default=0.05)
+    ap.add_argument("--kickoff-in", type=int, default=300, help="seconds until the contested kickoff")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--data-dir", default=None)
+    ap.add_argument("--json", default=None)
+    args = ap.parse_args(argv)
+
+    out = run(args)
+    for label, p in out["phases"].items():
+        fmt = lambda v: f"{v * 1000:8.1f}" if v is not None else "       -"
+        print(f"{label:8s} reruns={p['reruns']:5d} p50={fmt(p['p50_s'])} p95={fmt(p['p95_s'])} p99={fmt(p['p99_s'])} ms"
+              f"  writes/action={p['writes_per_action']:.2f}", file=sys.stderr)
+    sub = out["submissions"]
+    print(f"submissions acknowledged={sub['acknowledged']}/{sub['attempted']} lost_writes={sub['lost_writes']}"
+          f" result_posted={out['result_posted']} errors={out['error_count']}", file=sys.stderr)
+    text = json.dumps(out, indent=2)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 1 if sub["lost_writes"] or out["error_count"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
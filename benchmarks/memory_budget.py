@@ -0,0 +1,201 @@
+"""Memory budget check for page renders, measured with tracemalloc through AppTest.
+
+Generates a large synthetic season (see generate_season.py), then renders the
+login page, the Play page (Play and Leaderboard tabs) and the admin page
+(every tab) with tracemalloc on, and records in KiB:
+
+  render.<page>.cold   peak allocated during the first render of that page
+  render.<page>.warm   peak during a later render, with shared caches hot
+  tab.<page>.<tab>     peak inside each tab's block of the warm render
+  session.<page>       memory still held after one more session renders the
+                       page (its session state plus its element tree)
+
+Every figure is compared with memory_budget.json next to this script and the
+run fails when one goes over budget. After an intentional change, store new
+budgets (measured value plus --headroom) with --update-budget:
+
+    python benchmarks/memory_budget.py
+    python benchmarks/memory_budget.py --update-budget
+"""
+import argparse, gc, json, os, re, sys, tempfile, time, tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+APP = os.path.join(ROOT, "app.py")
+BUDGET_FILE = os.path.join(HERE, "memory_budget.json")
+ADMIN_PASSWORD = "memory-budget-admin"
+SEASON_PARAMS = ("users", "matches", "coverage", "resubmit", "seed")
+
+
+class _TabProbe:
+    # Stands in for one st.tabs() container and measures the peak inside its
+    # with-block. reset_peak() is process-wide, so the peak seen before the
+    # reset is handed back to the page-level measurement in `page`.
+    def __init__(self, container, name: str, sink: dict, page: dict):
+        self._container, self._name, self._sink, self._page = container, name, sink, page
+
+    def __getattr__(self, attr):
+        return getattr(self._container, attr)
+
+    def __enter__(self):
+        current, peak = tracemalloc.get_traced_memory()
+        self._page["peak"] = max(self._page["peak"], peak)
+        self._start = current
+        tracemalloc.reset_peak()
+        return self._container.__enter__()
+
+    def __exit__(self, *exc):
+        out = self._container.__exit__(*exc)
+        _, peak = tracemalloc.get_traced_memory()
+        self._sink[self._name] = max(self._sink.get(self._name, 0), peak - self._start)
+        self._page["peak"] = max(self._page["peak"], peak)
+        return out
+
+
+def _probe_tabs(sink: dict, page: dict):
+    import streamlit as st
+    original = st.tabs
+
+    def tabs(labels, *args, **kwargs):
+        names = [re.sub(r"[^a-z0-9]+", "_", str(label).lower()).strip("_") or f"tab{i}" for i, label in enumerate(labels)]
+        return [_TabProbe(c, n, sink, page) for c, n in zip(original(labels, *args, **kwargs), names)]
+    st.tabs = tabs
+
+
+def _share_script_cache():
+    # AppTest compiles app.py on every run, and that parse peak would swamp
+    # the page's own allocations. Compile once up front, as a server does.
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+    cache = ScriptCache()
+    cache.get_bytecode(APP)
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: cache
+
+
+def _render(at, tabs: dict, page: dict) -> int:
+    gc.collect()
+    start = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    page["peak"] = 0
+    tabs.clear()
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    page["peak"] = max(page["peak"], tracemalloc.get_traced_memory()[1])
+    return page["peak"] - start
+
+
+def _session(role: str | None, name: str | None):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP, default_timeout=600)
+    at.session_state["tenant"] = ""
+    if role:
+        at.session_state["role"] = role
+        at.session_state["current_name"] = name
+    return at
+
+
+def measure(args) -> dict:
+    sys.path.insert(0, HERE)
+    from generate_season import generate
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="memory-season-")
+    season = generate(data_dir, args.users, args.matches, args.coverage, args.resubmit, seed=args.seed)
+    os.chdir(data_dir)
+    os.environ["ADMIN_PASSWORD"] = ADMIN_PASSWORD
+    os.environ["SNAPSHOT_INTERVAL_MINUTES"] = "0"
+    os.environ["STANDINGS_CHECK_SECONDS"] = "0"
+
+    tabs, page = {}, {"peak": 0}
+    _probe_tabs(tabs, page)
+    _share_script_cache()
+    tracemalloc.start(args.frames)
+    kib = lambda b: round(b / 1024, 1)
+    results = {}
+    pages = [("login", None, None), ("play", "user", "player000000"), ("admin", "admin", "Admin")]
+    t0 = time.perf_counter()
+    for label, role, name in pages:
+        at = _session(role, name)
+        results[f"render.{label}.cold"] = kib(_render(at, tabs, page))
+        for _ in range(max(1, args.renders - 1)):
+            warm = _render(at, tabs, page)
+        results[f"render.{label}.warm"] = kib(warm)
+        for tab, peak in sorted(tabs.items()):
+            results[f"tab.{label}.{tab}"] = kib(peak)
+        if label == "play" and "leaderboard" not in tabs:
+            raise RuntimeError("Play page did not render its tabs")
+
+        gc.collect()
+        before = tracemalloc.get_traced_memory()[0]
+        extra = _session(role, "player000001" if role == "user" else name)
+        _render(extra, tabs, page)
+        gc.collect()
+        results[f"session.{label}"] = kib(tracemalloc.get_traced_memory()[0] - before)
+        del extra, at
+        print(f"{label:6s} cold={results[f'render.{label}.cold']:>10.1f} KiB  warm={results[f'render.{label}.warm']:>10.1f} KiB"
+              f"  session={results[f'session.{label}']:>9.1f} KiB", file=sys.stderr)
+    tracemalloc.stop()
+
+    return {
+        "params": {k: getattr(args, k) for k in SEASON_PARAMS + ("renders", "frames")},
+        "season": {k: season[k] for k in season if k != "pin"},
+        "elapsed_s": round(time.perf_counter() - t0, 2),
+        "kib": results,
+    }
+
+
+def check(out: dict, budget: dict) -> list:
+    if {k: budget["params"].get(k) for k in SEASON_PARAMS} != {k: out["params"][k] for k in SEASON_PARAMS}:
+        raise SystemExit(f"budget was recorded for {budget['params']}; rerun with the same season parameters or --update-budget")
+    over = []
+    print(f"{'figure':40s} {'budget KiB':>11s} {'now KiB':>11s}", file=sys.stderr)
+    for name, value in out["kib"].items():
+        limit = budget["kib"].get(name)
+        flag = "" if limit is None or value <= limit else "  <-- over budget"
+        if flag:
+            over.append(name)
+        print(f"{name:40s} {('-' if limit is None else f'{limit:.1f}'):>11s} {value:11.1f}{flag}", file=sys.stderr)
+    return over
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--users", type=int, default=1000)
+    ap.add_argument("--matches", type=int, default=60)
+    ap.add_argument("--coverage", type=float, default=0.6)
+    ap.add_argument("--resubmit", type=float, default=0.05)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--renders", type=int, default=2, help="renders per page; the last one is the warm figure")
+    ap.add_argument("--frames", type=int, default=1, help="tracemalloc traceback depth")
+    ap.add_argument("--data-dir", default=None)
+    ap.add_argument("--budget", default=BUDGET_FILE)
+    ap.add_argument("--update-budget", action="store_true")
+    ap.add_argument("--headroom", type=float, default=0.25, help="slack stored on top of measured values")
+    ap.add_argument("--json", default=None, help="also write the measurements here")
+    args = ap.parse_args(argv)
+
+    out = measure(args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=2)
+    if args.update_budget:
+        budget = {"params": {k: out["params"][k] for k in SEASON_PARAMS},
+                  "headroom": args.headroom,
+                  "kib": {k: round(v * (1 + args.headroom) + 64, 0) for k, v in out["kib"].items()}}
+        with open(args.budget, "w", encoding="utf-8") as f:
+            json.dump(budget, f, indent=2)
+            f.write("\n")
+        print(f"budget written to {args.budget}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.budget):
+        print(f"no budget at {args.budget}; create one with --update-budget", file=sys.stderr)
+        return 2
+    with open(args.budget, "r", encoding="utf-8") as f:
+        over = check(out, json.load(f))
+    if over:
+        print(f"{len(over)} figure(s) over budget: {', '.join(over)}", file=sys.stderr)
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
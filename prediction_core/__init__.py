@@ -0,0 +1,34 @@
+"""Domain logic of the prediction game, importable without Streamlit.
+
+app.py is the Streamlit UI on top of this package; batch jobs, workers and
+benchmarks use it directly:
+
+    import prediction_core as core
+    core.use_game("tenants/office", "office")   # or use_game() for ./
+    lb = core.materialized_leaderboard(with_overrides=True)
+
+Every function works on the game selected with use_game() in the calling
+thread (see game.py).
+"""
+from .settings import TENANTS, load_tenants, secret, tenant_data_dir
+from .i18n import LANG, tr
+from .game import GAME, Game, bind_game, current_game, open_game, use_game
+from .instrument import (metrics_inc, metrics_observe, metrics_text, perf_reset, perf_rerun, perf_span,
+                         perf_summary)
+from .storage import (cache_logo_from_url, ensure_history_schema, get_saved_logo, load_csv, load_overrides,
+                      normalize_digits, parse_iso_dt, save_csv, save_overrides, save_team_logo, save_uploaded_logo)
+from .accounts import (add_user, create_league, find_user, invalidate_users_index, join_league, league_leaderboard,
+                       league_member_names, leave_league, load_users, otp_generate, otp_revoke, otp_validate,
+                       remove_user, save_users, throttle_acquire, throttle_result, throttle_snapshot, update_user,
+                       user_exists, user_leagues, users_version)
+from .scoring import (RankedBoard, append_prediction, compact_predictions, competition_ranks, effective_prediction_rows,
+                      get_real_winner, leaderboard_as_of, leaderboard_history, leaderboard_slice, leaderboard_snapshots,
+                      materialized_leaderboard, movement_arrow, points_cube, points_for_prediction,
+                      predictions_compacted, rank_medal, rank_movement, ranked_leaderboard, rebuild_leaderboard_history,
+                      recompute_leaderboard, record_leaderboard_snapshot, save_predictions, score_predictions,
+                      split_match_name)
+from .backup import (close_season, create_backup_zip, enqueue_backup_upload, list_seasons, list_snapshots,
+                     list_upload_jobs, load_season_archive, make_backup_target, restore_from_zip, restore_snapshot,
+                     retry_failed_uploads, take_snapshot)
+from .standings import publish_standings, render_standings_html, season_standings, standings_status
+from .feed import feed_body, feed_server
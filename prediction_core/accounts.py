@@ -0,0 +1,498 @@
+"""Users, PINs, one-time codes, login throttling and mini-leagues."""
+import atexit, hashlib, heapq, logging, os, re, secrets, threading, time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from .game import GAME, bind_game, tenant_store
+from .instrument import metrics_inc
+from .storage import _append_row, _file_sig, load_csv, normalize_digits, parse_iso_dt, save_csv
+
+def _hash_pin(pin: str) -> str:
+    salt = secrets.token_hex(8)
+    h = hashlib.sha256((salt + pin).encode("utf-8")).hexdigest()
+    return f"{salt}:{h}"
+
+def _verify_pin(stored: str | None, pin: str) -> bool:
+    try:
+        if stored is None:
+            return False
+        if isinstance(stored, float) and pd.isna(stored):
+            return False
+        s = str(stored)
+        if ":" not in s:
+            return False
+        salt, h = s.split(":", 1)
+        return hashlib.sha256((salt + pin).encode("utf-8")).hexdigest() == h
+    except Exception:
+        return False
+
+log = logging.getLogger(__name__)
+
+def _otp_hash(code: str, salt: str) -> str:
+    return hashlib.sha256((salt + code).encode("utf-8")).hexdigest()
+
+# OTP store: one live code per normalized user, held in memory and shared by
+# all sessions. Expiries sit in a min-heap so cleanup only pops what is due;
+# otp.csv is rewritten at most once per OTP_FLUSH_DELAY (and at exit); a
+# failed write is logged and retried after OTP_FLUSH_RETRY.
+OTP_COLS = ["User", "Salt", "Hash", "ExpiresAt", "CreatedAt"]
+OTP_FLUSH_DELAY = 2.0
+OTP_FLUSH_RETRY = 30.0
+
+def _otp_unload(store: dict):
+    _otp_flush(store)
+    if not store["dirty"]:  # a failed flush keeps the codes until its retry
+        store.update(sig="unloaded", by_user={}, heap=[])
+
+@tenant_store(_otp_unload)
+def _otp_store_resource(data_dir: str) -> dict:
+    store = {"lock": threading.RLock(), "sig": "unloaded", "by_user": {}, "heap": [], "dirty": False, "timer": None}
+    atexit.register(bind_game(_otp_flush), store)
+    return store
+
+def _otp_load(store: dict):
+    by_user = {}
+    for rec in load_csv(GAME.OTP_FILE, OTP_COLS).to_dict("records"):
+        # Naive times are UTC, as everywhere else; an unreadable one has expired.
+        exp = parse_iso_dt(rec.get("ExpiresAt"))
+        if exp is not None and exp.tzinfo is None:
+            exp = exp.replace(tzinfo=ZoneInfo("UTC"))
+        rec["_exp"] = exp.timestamp() if exp else 0.0
+        by_user[_user_key(rec.get("User"))] = rec
+    heap = [(rec["_exp"], key) for key, rec in by_user.items()]
+    heapq.heapify(heap)
+    store.update(by_user=by_user, heap=heap, dirty=False, sig=_file_sig(GAME.OTP_FILE))
+
+def _otp_store() -> dict:
+    store = _otp_store_resource(GAME.DATA_DIR)
+    sig = _file_sig(GAME.OTP_FILE)
+    if store["sig"] != sig:
+        with store["lock"]:
+            if store["sig"] != sig:
+                _otp_load(store)
+    with store["lock"]:
+        now = time.time()
+        heap = store["heap"]
+        while heap and heap[0][0] <= now:
+            exp, key = heapq.heappop(heap)
+            rec = store["by_user"].get(key)
+            if rec is not None and rec["_exp"] == exp:
+                del store["by_user"][key]
+                store["dirty"] = True
+        if len(heap) > 2 * len(store["by_user"]) + 64:
+            store["heap"] = [(r["_exp"], k) for k, r in store["by_user"].items()]
+            heapq.heapify(store["heap"])
+    return store
+
+def _otp_flush(store: dict):
+    with store["lock"]:
+        store["timer"] = None
+        if not store["dirty"]:
+            return
+        rows = [{c: r.get(c) for c in OTP_COLS} for r in store["by_user"].values()]
+        try:
+            tmp = GAME.OTP_FILE + ".tmp"
+            pd.DataFrame(rows, columns=OTP_COLS).to_csv(tmp, index=False)
+            os.replace(tmp, GAME.OTP_FILE)
+            store["sig"] = _file_sig(GAME.OTP_FILE)
+            store["dirty"] = False
+        except Exception:
+            log.exception("Writing %s failed; retrying in %gs", GAME.OTP_FILE, OTP_FLUSH_RETRY)
+            metrics_inc("otp_operations_total", op="flush", outcome="failed")
+            _otp_mark_dirty(store, OTP_FLUSH_RETRY)
+
+def _otp_mark_dirty(store: dict, delay: float = OTP_FLUSH_DELAY):
+    store["dirty"] = True
+    if store["timer"] is None:
+        t = threading.Timer(delay, bind_game(_otp_flush), args=(store,))
+        t.daemon = True
+        store["timer"] = t
+        t.start()
+
+def otp_revoke(user: str) -> None:
+    store = _otp_store()
+    with store["lock"]:
+        if store["by_user"].pop(_user_key(user), None) is not None:
+            _otp_mark_dirty(store)
+    metrics_inc("otp_operations_total", op="revoke", outcome="ok")
+
+def otp_generate(user: str, minutes_valid: int = 10) -> str:
+    code = f"{secrets.randbelow(1_000_000):06d}"
+    salt = secrets.token_hex(8)
+    now = datetime.now(ZoneInfo("UTC"))
+    expires = now + timedelta(minutes=int(minutes_valid))
+    key = _user_key(user)
+    store = _otp_store()
+    with store["lock"]:
+        store["by_user"][key] = {
+            "User": str(user).strip(),
+            "Salt": salt,
+            "Hash": _otp_hash(code, salt),
+            "ExpiresAt": expires.isoformat(),
+            "CreatedAt": now.isoformat(),
+            "_exp": expires.timestamp(),
+        }
+        heapq.heappush(store["heap"], (expires.timestamp(), key))
+        _otp_mark_dirty(store)
+    metrics_inc("otp_operations_total", op="generate", outcome="ok")
+    return code
+
+def otp_validate(user: str, code: str) -> bool:
+    ok = _otp_validate(user, code)
+    metrics_inc("otp_operations_total", op="validate", outcome="ok" if ok else "failed")
+    return ok
+
+def _otp_validate(user: str, code: str) -> bool:
+    code = normalize_digits(str(code or "")).strip()
+    if not re.fullmatch(r"\d{6}", code):
+        return False
+    key = _user_key(user)
+    store = _otp_store()
+    with store["lock"]:
+        row = store["by_user"].get(key)
+        if row is None:
+            return False
+        salt = str(row.get("Salt") or "")
+        h = str(row.get("Hash") or "")
+        if not salt or not h:
+            return False
+        if _otp_hash(code, salt) == h:
+            del store["by_user"][key]
+            _otp_mark_dirty(store)
+            return True
+    return False
+
+def load_users():
+    cols = ["Name","CreatedAt","IsBanned","PinHash"]
+    if os.path.exists(GAME.USERS_FILE) and os.path.getsize(GAME.USERS_FILE) > 0:
+        df = pd.read_csv(GAME.USERS_FILE)
+        for c in cols:
+            if c not in df.columns:
+                df[c] = None
+        df["IsBanned"] = pd.to_numeric(df["IsBanned"], errors="coerce").fillna(0).astype(int)
+        df["PinHash"] = df["PinHash"].astype("string")
+        df.loc[df["PinHash"].isin([None, pd.NA, "nan", "NaN", "None"]), "PinHash"] = None
+        return df[cols]
+    return pd.DataFrame(columns=cols)
+
+def save_users(df):
+    cols = ["Name","CreatedAt","IsBanned","PinHash"]
+    for c in cols:
+        if c not in df.columns:
+            df[c] = None
+    df["IsBanned"] = pd.to_numeric(df.get("IsBanned", 0), errors="coerce").fillna(0).astype(int)
+    df[cols].to_csv(GAME.USERS_FILE, index=False)
+
+# Users index: normalized name -> user record, shared by all sessions.
+# It is rebuilt only when users.csv changes behind our back (restore, reset,
+# manual edit); our own writes update it in place.
+USER_COLS = ["Name","CreatedAt","IsBanned","PinHash"]
+
+def _user_key(name) -> str:
+    return str(name or "").strip().casefold()
+
+def _users_index_unload(store: dict):
+    store.update(sig="unloaded", by_key={})
+    store["version"] += 1
+
+@tenant_store(_users_index_unload)
+def _users_index_store(data_dir: str) -> dict:
+    return {"lock": threading.RLock(), "sig": "unloaded", "by_key": {}, "version": time.time_ns()}
+
+def _users_index() -> dict:
+    store = _users_index_store(GAME.DATA_DIR)
+    sig = _file_sig(GAME.USERS_FILE)
+    if store["sig"] == sig:
+        metrics_inc("cache_requests_total", cache="users", result="hit")
+        return store
+    metrics_inc("cache_requests_total", cache="users", result="miss")
+    with store["lock"]:
+        if store["sig"] != sig:
+            by_key = {}
+            for rec in load_users().to_dict("records"):
+                by_key.setdefault(_user_key(rec.get("Name")), rec)
+            store["by_key"] = by_key
+            store["sig"] = sig
+            store["version"] += 1
+    return store
+
+def users_version() -> int:
+    return _users_index_store(GAME.DATA_DIR)["version"]
+
+def invalidate_users_index():
+    store = _users_index_store(GAME.DATA_DIR)
+    with store["lock"]:
+        store["sig"] = "unloaded"
+        store["version"] += 1
+
+def _users_index_write(store: dict):
+    save_users(pd.DataFrame(list(store["by_key"].values()), columns=USER_COLS))
+    store["sig"] = _file_sig(GAME.USERS_FILE)
+
+def find_user(name) -> dict | None:
+    return _users_index()["by_key"].get(_user_key(name))
+
+def user_exists(name) -> bool:
+    return _user_key(name) in _users_index()["by_key"]
+
+def add_user(name: str, pin_hash: str) -> dict | None:
+    """Register a new user; None if the name is already taken."""
+    store = _users_index()
+    rec = {
+        "Name": str(name).strip(),
+        "CreatedAt": datetime.now(ZoneInfo("UTC")).isoformat(),
+        "IsBanned": 0,
+        "PinHash": pin_hash,
+    }
+    with store["lock"]:
+        if _user_key(name) in store["by_key"]:
+            return None
+        store["by_key"][_user_key(name)] = rec
+        header = ""
+        if os.path.exists(GAME.USERS_FILE) and os.path.getsize(GAME.USERS_FILE) > 0:
+            with open(GAME.USERS_FILE, "r", encoding="utf-8") as f:
+                header = f.readline().strip()
+        if header == ",".join(USER_COLS):
+            pd.DataFrame([rec], columns=USER_COLS).to_csv(GAME.USERS_FILE, mode="a", header=False, index=False)
+            store["sig"] = _file_sig(GAME.USERS_FILE)
+        else:
+            _users_index_write(store)
+    return rec
+
+def update_user(name, **fields) -> bool:
+    store = _users_index()
+    with store["lock"]:
+        rec = store["by_key"].get(_user_key(name))
+        if rec is None:
+            return False
+        rec.update(fields)
+        _users_index_write(store)
+        if "IsBanned" in fields:
+            store["version"] += 1
+    return True
+
+def remove_user(name) -> bool:
+    store = _users_index()
+    with store["lock"]:
+        if store["by_key"].pop(_user_key(name), None) is None:
+            return False
+        _users_index_write(store)
+        store["version"] += 1
+    return True
+
+# Attempt throttling for login and OTP reset: every attempt takes a token from
+# a per-name and a per-session bucket; repeated failures add an exponential
+# lockout on top. Checked before any file or hash work.
+THROTTLE_CAPACITY = 5
+THROTTLE_REFILL_SECONDS = 30.0
+THROTTLE_FREE_FAILURES = 3
+THROTTLE_BACKOFF_BASE = 2.0
+THROTTLE_BACKOFF_MAX = 900.0
+THROTTLE_MAX_BUCKETS = 20_000
+
+@tenant_store(lambda store: _throttle_prune(store, time.time()))
+def _throttle_store(data_dir: str) -> dict:
+    return {"lock": threading.Lock(), "buckets": {}, "counters": {}}
+
+def _throttle_keys(action: str, name, session: str) -> list:
+    return [(action, "name", _user_key(name)), (action, "session", session)]
+
+def _throttle_count(store: dict, counter: str):
+    store["counters"][counter] = store["counters"].get(counter, 0) + 1
+    action, _, stage = counter.rpartition("_")
+    metrics_inc("auth_attempts_total", action=action, stage=stage)
+
+def _throttle_prune(store: dict, now: float):
+    idle = THROTTLE_REFILL_SECONDS * THROTTLE_CAPACITY + THROTTLE_BACKOFF_MAX
+    buckets = store["buckets"]
+    for k in [k for k, b in buckets.items() if now - b["ts"] > idle and b["blocked_until"] <= now]:
+        del buckets[k]
+
+def throttle_acquire(action: str, name, session: str) -> float:
+    store = _throttle_store(GAME.DATA_DIR)
+    keys = _throttle_keys(action, name, session)
+    now = time.time()
+    with store["lock"]:
+        buckets = store["buckets"]
+        if len(buckets) > THROTTLE_MAX_BUCKETS:
+            _throttle_prune(store, now)
+        wait = 0.0
+        for k in keys:
+            b = buckets.setdefault(k, {"tokens": float(THROTTLE_CAPACITY), "ts": now, "failures": 0, "blocked_until": 0.0})
+            b["tokens"] = min(float(THROTTLE_CAPACITY), b["tokens"] + (now - b["ts"]) / THROTTLE_REFILL_SECONDS)
+            b["ts"] = now
+            if b["blocked_until"] > now:
+                wait = max(wait, b["blocked_until"] - now)
+            elif b["tokens"] < 1:
+                wait = max(wait, (1 - b["tokens"]) * THROTTLE_REFILL_SECONDS)
+        if wait > 0:
+            _throttle_count(store, f"{action}_rejected")
+            return wait
+        for k in keys:
+            buckets[k]["tokens"] -= 1
+        _throttle_count(store, f"{action}_allowed")
+    return 0.0
+
+def throttle_result(action: str, name, session: str, ok: bool):
+    store = _throttle_store(GAME.DATA_DIR)
+    now = time.time()
+    with store["lock"]:
+        _throttle_count(store, f"{action}_{'ok' if ok else 'failed'}")
+        for k in _throttle_keys(action, name, session):
+            b = store["buckets"].get(k)
+            if b is None:
+                continue
+            if ok:
+                b["failures"] = 0
+                b["blocked_until"] = 0.0
+                continue
+            b["failures"] += 1
+            extra = b["failures"] - THROTTLE_FREE_FAILURES
+            if extra > 0:
+                b["blocked_until"] = now + min(THROTTLE_BACKOFF_MAX, THROTTLE_BACKOFF_BASE * 2 ** (extra - 1))
+
+def throttle_snapshot() -> tuple[dict, list]:
+    store = _throttle_store(GAME.DATA_DIR)
+    now = time.time()
+    with store["lock"]:
+        counters = dict(store["counters"])
+        blocked = [
+            {"Action": k[0], "Scope": k[1], "Key": k[2], "Failures": b["failures"], "RetryIn(s)": int(b["blocked_until"] - now) + 1}
+            for k, b in store["buckets"].items() if b["blocked_until"] > now
+        ]
+    return counters, blocked
+
+# Mini-leagues: leagues.csv holds one row per league, league_members.csv is
+# an append-only log of joins and leaves (a leave is a row with LeftAt set),
+# rewritten to the live members only once leaves outnumber them. Both are
+# indexed in memory (code -> league, league -> members, user -> leagues) and
+# shared by all sessions. A league leaderboard is just the season
+# leaderboard filtered to its members.
+LEAGUE_COLS = ["LeagueId", "Name", "Code", "Owner", "CreatedAt"]
+LEAGUE_MEMBER_COLS = ["LeagueId", "User", "JoinedAt", "LeftAt"]
+LEAGUE_CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+
+def _leagues_unload(store: dict):
+    store.update(sig="unloaded", leagues={}, by_code={}, members={}, by_user={}, left=0)
+
+@tenant_store(_leagues_unload)
+def _leagues_store(data_dir: str) -> dict:
+    return {"lock": threading.RLock(), "sig": "unloaded", "leagues": {}, "by_code": {}, "members": {}, "by_user": {}, "left": 0}
+
+def _leagues_index() -> dict:
+    store = _leagues_store(GAME.DATA_DIR)
+    sig = (_file_sig(GAME.LEAGUES_FILE), _file_sig(GAME.LEAGUE_MEMBERS_FILE))
+    if store["sig"] == sig:
+        metrics_inc("cache_requests_total", cache="leagues", result="hit")
+        return store
+    metrics_inc("cache_requests_total", cache="leagues", result="miss")
+    with store["lock"]:
+        if store["sig"] != sig:
+            leagues, by_code, members, by_user, left = {}, {}, {}, {}, 0
+            for rec in load_csv(GAME.LEAGUES_FILE, LEAGUE_COLS).astype(str).to_dict("records"):
+                leagues[rec["LeagueId"]] = rec
+                by_code[rec["Code"].upper()] = rec["LeagueId"]
+                members[rec["LeagueId"]] = {}
+            for rec in load_csv(GAME.LEAGUE_MEMBERS_FILE, LEAGUE_MEMBER_COLS).fillna("").astype(str).to_dict("records"):
+                if rec["LeagueId"] not in members:
+                    continue
+                key = _user_key(rec["User"])
+                if rec["LeftAt"]:
+                    members[rec["LeagueId"]].pop(key, None)
+                    by_user.get(key, set()).discard(rec["LeagueId"])
+                    left += 1
+                else:
+                    members[rec["LeagueId"]][key] = rec
+                    by_user.setdefault(key, set()).add(rec["LeagueId"])
+            store.update(leagues=leagues, by_code=by_code, members=members, by_user=by_user, left=left, sig=sig)
+    return store
+
+def _leagues_sig() -> tuple:
+    return (_file_sig(GAME.LEAGUES_FILE), _file_sig(GAME.LEAGUE_MEMBERS_FILE))
+
+def _league_members_write(store: dict):
+    rows = [m for mm in store["members"].values() for m in mm.values()]
+    save_csv(pd.DataFrame(rows, columns=LEAGUE_MEMBER_COLS), GAME.LEAGUE_MEMBERS_FILE)
+    store["left"] = 0
+
+def _league_members_append(store: dict, rec: dict):
+    # Caller holds store["lock"] and has already applied rec to the index.
+    header = ""
+    if os.path.exists(GAME.LEAGUE_MEMBERS_FILE) and os.path.getsize(GAME.LEAGUE_MEMBERS_FILE) > 0:
+        with open(GAME.LEAGUE_MEMBERS_FILE, "r", encoding="utf-8") as f:
+            header = f.readline().strip()
+    if header and header != ",".join(LEAGUE_MEMBER_COLS):
+        _league_members_write(store)  # older file without LeftAt
+    elif store["left"] > sum(len(mm) for mm in store["members"].values()):
+        _league_members_write(store)
+    else:
+        _append_row(GAME.LEAGUE_MEMBERS_FILE, rec, LEAGUE_MEMBER_COLS)
+
+def _league_add_member(store: dict, league_id: str, user: str):
+    rec = {"LeagueId": league_id, "User": str(user).strip(), "JoinedAt": datetime.now(ZoneInfo("UTC")).isoformat(), "LeftAt": ""}
+    store["members"][league_id][_user_key(user)] = rec
+    store["by_user"].setdefault(_user_key(user), set()).add(league_id)
+    _league_members_append(store, rec)
+
+def create_league(name: str, owner: str) -> dict:
+    store = _leagues_index()
+    with store["lock"]:
+        code = "".join(secrets.choice(LEAGUE_CODE_ALPHABET) for _ in range(6))
+        while code in store["by_code"]:
+            code = "".join(secrets.choice(LEAGUE_CODE_ALPHABET) for _ in range(6))
+        rec = {
+            "LeagueId": secrets.token_hex(6),
+            "Name": str(name).strip(),
+            "Code": code,
+            "Owner": str(owner).strip(),
+            "CreatedAt": datetime.now(ZoneInfo("UTC")).isoformat(),
+        }
+        _append_row(GAME.LEAGUES_FILE, rec, LEAGUE_COLS)
+        store["leagues"][rec["LeagueId"]] = rec
+        store["by_code"][code] = rec["LeagueId"]
+        store["members"][rec["LeagueId"]] = {}
+        _league_add_member(store, rec["LeagueId"], owner)
+        store["sig"] = _leagues_sig()
+    return rec
+
+def join_league(code: str, user: str) -> dict | None:
+    store = _leagues_index()
+    with store["lock"]:
+        league_id = store["by_code"].get(str(code or "").strip().upper())
+        if league_id is None:
+            return None
+        if _user_key(user) not in store["members"][league_id]:
+            _league_add_member(store, league_id, user)
+            store["sig"] = _leagues_sig()
+        return store["leagues"][league_id]
+
+def leave_league(league_id: str, user: str) -> bool:
+    store = _leagues_index()
+    with store["lock"]:
+        rec = store["members"].get(league_id, {}).pop(_user_key(user), None)
+        if rec is None:
+            return False
+        store["by_user"].get(_user_key(user), set()).discard(league_id)
+        store["left"] += 1
+        _league_members_append(store, dict(rec, LeftAt=datetime.now(ZoneInfo("UTC")).isoformat()))
+        store["sig"] = _leagues_sig()
+    return True
+
+def user_leagues(user: str) -> list[dict]:
+    store = _leagues_index()
+    ids = store["by_user"].get(_user_key(user), set())
+    return sorted((store["leagues"][i] for i in ids if i in store["leagues"]), key=lambda r: r["Name"].casefold())
+
+def league_member_names(league_id: str) -> list[str]:
+    return [m["User"] for m in _leagues_index()["members"].get(league_id, {}).values()]
+
+def league_leaderboard(league_id: str, season_lb: pd.DataFrame) -> pd.DataFrame:
+    members = league_member_names(league_id)
+    lb = season_lb[season_lb["User"].isin(members)]
+    present = set(lb["User"])
+    missing = [u for u in members if u not in present]
+    if missing:
+        lb = pd.concat([lb, pd.DataFrame({"User": missing, "Points": 0, "Predictions": 0, "Exact": 0, "Outcome": 0})], ignore_index=True)
+    return lb.sort_values(["Points", "Predictions", "Exact"], ascending=[False, True, False]).reset_index(drop=True)
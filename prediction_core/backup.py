@@ -0,0 +1,579 @@
+"""Backup archives, upload targets, differential snapshots and season archives."""
+import gzip, hashlib, json, os, re, shutil, tempfile, threading, time, zipfile
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from .game import GAME, cache_data, cache_resource, tenant_worker
+from .instrument import metrics_inc
+from .scoring import _apply_overrides_to_lb, _lb_store, _lb_unload, compact_predictions, recompute_leaderboard
+from .settings import MAX_ACTIVE_TENANTS, secret
+from .storage import _file_sig, _read_json, _write_json_atomic, load_csv, parse_iso_dt
+
+def _get_supabase_client():
+    try:
+        from supabase import create_client
+        url = secret("SUPABASE_URL")
+        key = secret("SUPABASE_SERVICE_ROLE") or secret("SUPABASE_ANON_KEY")
+        if not url or not key:
+            return None
+        return create_client(url, key)
+    except Exception:
+        return None
+
+# Backup upload targets. BACKUP_TARGET selects one: "supabase" (default when
+# SUPABASE_URL is set), "dir:<path>" for a local directory, or an http(s) URL
+# that accepts PUT <url>/<key>. A target is a callable (key, path) -> location
+# that raises on failure. Queued uploads wait in the game's backups/outbox/.
+UPLOAD_MAX_ATTEMPTS = 8
+UPLOAD_BACKOFF_BASE = 5.0
+UPLOAD_BACKOFF_MAX = 1800.0
+UPLOAD_KEEP_DONE = 20
+
+def _supabase_target(bucket: str = "backups"):
+    sb = _get_supabase_client()
+    if not sb:
+        return None
+    try:
+        sb.storage.create_bucket(bucket, public=False)
+    except Exception:
+        pass
+
+    def upload(key: str, path: str) -> str:
+        with open(path, "rb") as f:
+            sb.storage.from_(bucket).upload(key, f, {"content-type": "application/zip"})
+        return f"{bucket}/{key}"
+    return upload
+
+def _dir_target(root: str):
+    def upload(key: str, path: str) -> str:
+        dest = os.path.join(root, key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copyfile(path, dest + ".part")
+        os.replace(dest + ".part", dest)
+        return dest
+    return upload
+
+def _http_target(base_url: str):
+    import requests
+    session = requests.Session()
+
+    def upload(key: str, path: str) -> str:
+        url = f"{base_url.rstrip('/')}/{key}"
+        with open(path, "rb") as f:
+            r = session.put(url, data=f, headers={"content-type": "application/zip"}, timeout=60)
+        r.raise_for_status()
+        return url
+    return upload
+
+def make_backup_target(spec: str | None):
+    spec = (spec or "").strip()
+    if spec.startswith("dir:"):
+        return _dir_target(spec[4:])
+    if spec.lower().startswith(("http://", "https://")):
+        return _http_target(spec)
+    if spec in ("", "supabase"):
+        return _supabase_target()
+    return None
+
+@cache_resource
+def _backup_target():
+    return make_backup_target(secret("BACKUP_TARGET", ""))
+
+def _upload_job_path(job_id: str, ext: str) -> str:
+    return os.path.join(GAME.UPLOAD_QUEUE_DIR, f"{job_id}.{ext}")
+
+def list_upload_jobs() -> list[dict]:
+    jobs = []
+    if os.path.isdir(GAME.UPLOAD_QUEUE_DIR):
+        for fn in sorted(os.listdir(GAME.UPLOAD_QUEUE_DIR)):
+            if fn.endswith(".json"):
+                job = _read_json(os.path.join(GAME.UPLOAD_QUEUE_DIR, fn), None)
+                if job:
+                    jobs.append(job)
+    return jobs
+
+def enqueue_backup_upload(buf) -> dict | None:
+    if _backup_target() is None:
+        return None
+    now = datetime.now(ZoneInfo("UTC"))
+    job_id = now.strftime("%Y%m%d_%H%M%S_%f")
+    os.makedirs(GAME.UPLOAD_QUEUE_DIR, exist_ok=True)
+    buf.seek(0)
+    part = _upload_job_path(job_id, "zip.part")
+    with open(part, "wb") as dst:
+        shutil.copyfileobj(buf, dst, BACKUP_CHUNK)
+    os.replace(part, _upload_job_path(job_id, "zip"))
+    job = {
+        "id": job_id,
+        "key": f"prediction_backups/{GAME.TENANT_ID + '/' if GAME.TENANT_ID else ''}backup_{job_id}.zip",
+        "created": now.isoformat(),
+        "status": "pending",
+        "attempts": 0,
+        "next_try": 0.0,
+        "last_error": None,
+        "location": None,
+    }
+    _write_json_atomic(_upload_job_path(job_id, "json"), job)
+    _upload_worker(GAME.DATA_DIR)["wake"].set()
+    return job
+
+def retry_failed_uploads():
+    worker = _upload_worker(GAME.DATA_DIR)
+    with worker["lock"]:
+        for job in list_upload_jobs():
+            if job["status"] == "failed":
+                job.update(status="pending", attempts=0, next_try=0.0)
+                _write_json_atomic(_upload_job_path(job["id"], "json"), job)
+    worker["wake"].set()
+
+def _upload_claim(state: dict) -> tuple[dict | None, float]:
+    # Caller holds state["lock"]: the first due pending job, marked in flight.
+    now = time.time()
+    next_due = now + 60
+    for job in list_upload_jobs():
+        if job["status"] != "pending" or job["id"] in state["uploading"]:
+            continue
+        if job["next_try"] > now:
+            next_due = min(next_due, job["next_try"])
+            continue
+        state["uploading"].add(job["id"])
+        return job, next_due
+    return None, next_due
+
+def _upload_record(job: dict, location, error: Exception | None):
+    # Caller holds the worker's lock.
+    if error is None:
+        job["location"] = location
+        job["status"] = "done"
+        job["last_error"] = None
+        os.remove(_upload_job_path(job["id"], "zip"))
+        metrics_inc("backups_total", kind="upload", outcome="done")
+    else:
+        job["attempts"] += 1
+        job["last_error"] = f"{type(error).__name__}: {error}"
+        if job["attempts"] >= UPLOAD_MAX_ATTEMPTS:
+            job["status"] = "failed"
+            metrics_inc("backups_total", kind="upload", outcome="failed")
+        else:
+            metrics_inc("backups_total", kind="upload", outcome="retry")
+            job["next_try"] = time.time() + min(UPLOAD_BACKOFF_MAX, UPLOAD_BACKOFF_BASE * 2 ** (job["attempts"] - 1))
+    _write_json_atomic(_upload_job_path(job["id"], "json"), job)
+
+def _upload_run_due(target, state: dict) -> float:
+    # The lock is held only to claim a job and to record its result, never
+    # during the upload itself, so retry_failed_uploads does not wait on it.
+    while True:
+        with state["lock"]:
+            job, next_due = _upload_claim(state)
+        if job is None:
+            break
+        location, error = None, None
+        try:
+            location = target(job["key"], _upload_job_path(job["id"], "zip"))
+        except Exception as e:
+            error = e
+        with state["lock"]:
+            state["uploading"].discard(job["id"])
+            _upload_record(job, location, error)
+
+    with state["lock"]:
+        done = [j for j in list_upload_jobs() if j["status"] == "done"]
+        for job in done[:-UPLOAD_KEEP_DONE]:
+            try:
+                os.remove(_upload_job_path(job["id"], "json"))
+            except OSError:
+                pass
+    return next_due
+
+def _upload_loop(state: dict, stop: threading.Event):
+    while not stop.is_set():
+        target = _backup_target()
+        next_due = time.time() + 60
+        if target is not None:
+            try:
+                next_due = _upload_run_due(target, state)
+                state["last_error"] = None
+            except Exception as e:
+                state["last_error"] = str(e)
+        state["wake"].wait(timeout=max(0.5, next_due - time.time()))
+        state["wake"].clear()
+
+@tenant_worker(_upload_loop, name="backup-uploader")
+def _upload_worker(data_dir: str) -> dict:
+    return {"wake": threading.Event(), "lock": threading.Lock(), "uploading": set(), "last_error": None}
+
+# Backups are streamed: members are copied in BACKUP_CHUNK pieces into a
+# spooled temp file, and a MANIFEST.json of SHA-256 digests lets restore
+# verify every member before it replaces anything on disk.
+BACKUP_CHUNK = 1 << 20
+BACKUP_SPOOL_MAX = 8 << 20
+BACKUP_MANIFEST = "MANIFEST.json"
+
+def _copy_hashed(src, dst) -> str:
+    h = hashlib.sha256()
+    while True:
+        chunk = src.read(BACKUP_CHUNK)
+        if not chunk:
+            break
+        h.update(chunk)
+        dst.write(chunk)
+    return h.hexdigest()
+
+def _backup_members():
+    for path in GAME.BACKUP_FILES:
+        yield os.path.basename(path), path
+    if os.path.isdir(GAME.LOGO_DIR):
+        for root, _, files in os.walk(GAME.LOGO_DIR):
+            for fn in sorted(files):
+                full = os.path.join(root, fn)
+                if os.path.isfile(full):
+                    yield f"logos/{fn}", full
+    if os.path.isdir(GAME.SEASONS_DIR):
+        for fn in sorted(os.listdir(GAME.SEASONS_DIR)):
+            full = os.path.join(GAME.SEASONS_DIR, fn)
+            if os.path.isfile(full) and not fn.startswith("."):
+                yield f"seasons/{fn}", full
+
+def _restore_target(arc: str) -> str | None:
+    base = os.path.basename(arc)
+    if arc.endswith("/") or not base:
+        return None
+    for prefix, folder in (("logos/", GAME.LOGO_DIR), ("seasons/", GAME.SEASONS_DIR)):
+        if arc.startswith(prefix):
+            os.makedirs(folder, exist_ok=True)
+            return os.path.join(folder, base)
+    if base in {os.path.basename(p) for p in GAME.BACKUP_FILES} and arc != BACKUP_MANIFEST:
+        return os.path.join(GAME.DATA_DIR, base)
+    return None
+
+def create_backup_zip():
+    out = tempfile.SpooledTemporaryFile(max_size=BACKUP_SPOOL_MAX, suffix=".zip")
+    digests = {}
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        for arc, path in _backup_members():
+            if not os.path.exists(path):
+                continue  # an empty member would truncate the file on restore
+            try:
+                with open(path, "rb") as src, z.open(arc, "w", force_zip64=True) as dst:
+                    digests[arc] = _copy_hashed(src, dst)
+            except Exception:
+                pass
+        z.writestr(BACKUP_MANIFEST, json.dumps({
+            "created": datetime.now(ZoneInfo("UTC")).isoformat(),
+            "sha256": digests,
+        }, indent=2))
+
+    out.seek(0)
+    metrics_inc("backups_total", kind="zip", outcome="created")
+    return out
+
+
+def restore_from_zip(filelike) -> None:
+    try:
+        filelike.seek(0)
+    except Exception:
+        pass
+
+    staged = []
+    try:
+        with zipfile.ZipFile(filelike, "r") as z:
+            names = z.namelist()
+            digests = {}
+            if BACKUP_MANIFEST in names:
+                try:
+                    with z.open(BACKUP_MANIFEST) as mf:
+                        digests = json.load(mf).get("sha256", {})
+                except Exception:
+                    digests = {}
+
+            for member in names:
+                target = _restore_target(member)
+                # Older backups stored missing files as empty members.
+                if target is None or z.getinfo(member).file_size == 0:
+                    continue
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target) or ".", prefix=".restore-")
+                staged.append((tmp, target))
+                with z.open(member) as src, os.fdopen(fd, "wb") as dst:
+                    digest = _copy_hashed(src, dst)
+                expected = digests.get(member)
+                if expected and digest != expected:
+                    raise ValueError(f"Checksum mismatch for {member}")
+
+        for tmp, target in staged:
+            os.replace(tmp, target)
+        staged = []
+    finally:
+        for tmp, _ in staged:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+# Differential snapshots: file contents are stored once under
+# backups/objects/<sha256> (gzip), and each snapshot is a small JSON map of
+# member -> digest that names its parent. Unchanged files are recognised by
+# (mtime, size) from manifest.json and are neither re-read nor re-written,
+# so a snapshot costs what was written since the last one.
+SNAPSHOT_INTERVAL_MINUTES = float(secret("SNAPSHOT_INTERVAL_MINUTES", 5))
+SNAPSHOT_KEEP_RECENT = int(secret("SNAPSHOT_KEEP_RECENT", 12))
+SNAPSHOT_KEEP_HOURLY = int(secret("SNAPSHOT_KEEP_HOURLY", 24))
+SNAPSHOT_KEEP_DAILY = int(secret("SNAPSHOT_KEEP_DAILY", 14))
+
+def _snap_path(*parts) -> str:
+    return os.path.join(GAME.SNAPSHOT_DIR, *parts)
+
+@cache_resource
+def _snapshot_lock(data_dir: str):
+    return threading.Lock()
+
+def _snap_object_path(sha: str) -> str:
+    return _snap_path("objects", sha[:2], sha)
+
+def _snap_store_object(path: str) -> str:
+    os.makedirs(_snap_path("objects"), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=_snap_path("objects"), prefix=".obj-")
+    try:
+        with open(path, "rb") as src, os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as dst:
+            sha = _copy_hashed(src, dst)
+        target = _snap_object_path(sha)
+        if os.path.exists(target):
+            os.remove(tmp)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(tmp, target)
+        return sha
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+def list_snapshots() -> list[dict]:
+    snaps = []
+    sdir = _snap_path("snapshots")
+    if os.path.isdir(sdir):
+        for fn in sorted(os.listdir(sdir)):
+            if fn.endswith(".json"):
+                snap = _read_json(os.path.join(sdir, fn), None)
+                if snap:
+                    snaps.append(snap)
+    return snaps
+
+def take_snapshot(force: bool = False) -> dict | None:
+    with _snapshot_lock(GAME.DATA_DIR):
+        manifest = _read_json(_snap_path("manifest.json"), {"last": None, "stat": {}})
+        last = _read_json(_snap_path("snapshots", f"{manifest['last']}.json"), None) if manifest.get("last") else None
+        last_files = (last or {}).get("files", {})
+
+        files, stat_cache, changed, written = {}, {}, [], 0
+        for arc, path in _backup_members():
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            sig = [info.st_mtime_ns, info.st_size]
+            cached = manifest["stat"].get(arc)
+            if cached and cached[:2] == sig:
+                sha = cached[2]
+            else:
+                sha = _snap_store_object(path)
+                written += info.st_size
+            files[arc] = sha
+            stat_cache[arc] = sig + [sha]
+            if last_files.get(arc) != sha:
+                changed.append(arc)
+        removed = [arc for arc in last_files if arc not in files]
+
+        if last is not None and not changed and not removed and not force:
+            manifest["stat"] = stat_cache
+            _write_json_atomic(_snap_path("manifest.json"), manifest)
+            return None
+
+        now = datetime.now(ZoneInfo("UTC"))
+        snap = {
+            "id": now.strftime("%Y%m%dT%H%M%S_%fZ"),
+            "created": now.isoformat(),
+            "parent": manifest.get("last"),
+            "files": files,
+            "changed": changed,
+            "removed": removed,
+            "bytes_read": written,
+        }
+        _write_json_atomic(_snap_path("snapshots", f"{snap['id']}.json"), snap)
+        _write_json_atomic(_snap_path("manifest.json"), {"last": snap["id"], "stat": stat_cache})
+        _snapshot_apply_retention()
+        return snap
+
+def _snapshot_apply_retention():
+    snaps = list_snapshots()
+    if not snaps:
+        return
+    keep = {snap["id"] for snap in snaps[-max(1, SNAPSHOT_KEEP_RECENT):]}
+    hours, days = [], []
+    for snap in reversed(snaps):
+        created = parse_iso_dt(snap.get("created"))
+        if not created:
+            keep.add(snap["id"])
+            continue
+        hour_key = created.strftime("%Y%m%d%H")
+        day_key = created.strftime("%Y%m%d")
+        if hour_key not in hours and len(hours) < SNAPSHOT_KEEP_HOURLY:
+            hours.append(hour_key)
+            keep.add(snap["id"])
+        if day_key not in days and len(days) < SNAPSHOT_KEEP_DAILY:
+            days.append(day_key)
+            keep.add(snap["id"])
+
+    dropped = [snap for snap in snaps if snap["id"] not in keep]
+    if not dropped:
+        return
+    for snap in dropped:
+        try:
+            os.remove(_snap_path("snapshots", f"{snap['id']}.json"))
+        except OSError:
+            pass
+
+    live = {sha for snap in snaps if snap["id"] in keep for sha in snap.get("files", {}).values()}
+    odir = _snap_path("objects")
+    for root, _, fnames in os.walk(odir):
+        for fn in fnames:
+            if not fn.startswith(".") and fn not in live:
+                try:
+                    os.remove(os.path.join(root, fn))
+                except OSError:
+                    pass
+
+def restore_snapshot(snap_id: str) -> None:
+    snap = _read_json(_snap_path("snapshots", f"{snap_id}.json"), None)
+    if not snap:
+        raise ValueError(f"Unknown snapshot {snap_id}")
+    staged = []
+    with _snapshot_lock(GAME.DATA_DIR):
+        try:
+            for arc, sha in snap.get("files", {}).items():
+                target = _restore_target(arc)
+                if target is None:
+                    continue
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target) or ".", prefix=".restore-")
+                staged.append((tmp, target))
+                with gzip.open(_snap_object_path(sha), "rb") as src, os.fdopen(fd, "wb") as dst:
+                    digest = _copy_hashed(src, dst)
+                if digest != sha:
+                    raise ValueError(f"Checksum mismatch for {arc}")
+
+            for tmp, target in staged:
+                os.replace(tmp, target)
+            staged = []
+            for path in GAME.BACKUP_FILES:
+                if os.path.basename(path) not in snap.get("files", {}) and os.path.exists(path):
+                    os.remove(path)
+        finally:
+            for tmp, _ in staged:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+def _snapshot_loop(state: dict, stop: threading.Event):
+    while not stop.wait(max(1.0, SNAPSHOT_INTERVAL_MINUTES * 60)):
+        try:
+            compact_predictions()
+            snap = take_snapshot()
+            state["last_result"] = snap["id"] if snap else "unchanged"
+            state["last_error"] = None
+            metrics_inc("backups_total", kind="snapshot", outcome="created" if snap else "unchanged")
+        except Exception as e:
+            state["last_error"] = str(e)
+            metrics_inc("backups_total", kind="snapshot", outcome="failed")
+        state["last_run"] = datetime.now(ZoneInfo("UTC")).isoformat()
+
+@tenant_worker(_snapshot_loop, name="snapshot-scheduler", enabled=SNAPSHOT_INTERVAL_MINUTES > 0)
+def _snapshot_scheduler(data_dir: str) -> dict:
+    return {"lock": threading.Lock(), "last_run": None, "last_result": None, "last_error": None}
+
+# Season partitions: closing a season freezes its files plus the final
+# leaderboard into a read-only seasons/<id>.zip and clears them, so the live
+# files only ever hold the current season. seasons/index.json lists closed
+# seasons without opening any archive. Users and leagues carry over.
+def list_seasons() -> list[dict]:
+    return _read_json(GAME.SEASON_INDEX, [])
+
+def close_season(new_season_name: str = "") -> dict:
+    # Under the leaderboard store lock, like append_prediction, so a prediction
+    # submitted while the season closes is neither lost nor archived half-way.
+    store = _lb_store(GAME.DATA_DIR)
+    with store["lock"]:
+        take_snapshot(force=True)
+        preds = load_csv(GAME.PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
+        final_lb = _apply_overrides_to_lb(recompute_leaderboard(preds))
+        name = ""
+        if os.path.exists(GAME.SEASON_FILE):
+            with open(GAME.SEASON_FILE, "r", encoding="utf-8") as f:
+                name = f.read().strip()
+        now = datetime.now(ZoneInfo("UTC"))
+        season_id = now.strftime("%Y%m%d_%H%M%S") + ("_" + re.sub(r"[^A-Za-z0-9_-]+", "_", name)[:40] if name else "")
+        meta = {
+            "id": season_id,
+            "name": name or season_id,
+            "closed_at": now.isoformat(),
+            "matches": int(len(load_csv(GAME.MATCH_HISTORY_FILE, ["Match"]))),
+            "players": int(len(final_lb)),
+            "winner": str(final_lb["User"].iloc[0]) if not final_lb.empty else "",
+        }
+
+        with _snapshot_lock(GAME.DATA_DIR):
+            os.makedirs(GAME.SEASONS_DIR, exist_ok=True)
+            path = os.path.join(GAME.SEASONS_DIR, f"{season_id}.zip")
+            fd, tmp = tempfile.mkstemp(dir=GAME.SEASONS_DIR, prefix=".season-")
+            try:
+                with os.fdopen(fd, "wb") as out, zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as z:
+                    for f in GAME.SEASON_ARCHIVE_FILES:
+                        if os.path.exists(f):
+                            z.write(f, os.path.basename(f))
+                    z.writestr("final_leaderboard.csv", final_lb.to_csv(index=False))
+                    z.writestr("season.json", json.dumps(meta, ensure_ascii=False, indent=2))
+                os.chmod(tmp, 0o444)
+                os.replace(tmp, path)
+            except Exception:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                raise
+            _write_json_atomic(GAME.SEASON_INDEX, list_seasons() + [meta])
+
+            for f in GAME.SEASON_ARCHIVE_FILES:
+                try:
+                    os.remove(f)
+                except OSError:
+                    pass
+            if new_season_name.strip():
+                with open(GAME.SEASON_FILE, "w", encoding="utf-8") as f:
+                    f.write(new_season_name.strip())
+        _lb_unload(store)
+    return meta
+
+@cache_data(max_entries=4 * MAX_ACTIVE_TENANTS)
+def _season_archive_cached(path: str, sig) -> dict:
+    out = {}
+    with zipfile.ZipFile(path, "r") as z:
+        names = set(z.namelist())
+        out["meta"] = json.loads(z.read("season.json")) if "season.json" in names else {}
+        for key, member in (("leaderboard", "final_leaderboard.csv"), ("matches", os.path.basename(GAME.MATCH_HISTORY_FILE))):
+            try:
+                with z.open(member) as f:
+                    out[key] = pd.read_csv(f)
+            except Exception:
+                out[key] = pd.DataFrame()
+    return out
+
+def load_season_archive(season_id: str) -> dict | None:
+    path = os.path.join(GAME.SEASONS_DIR, f"{os.path.basename(str(season_id))}.zip")
+    sig = _file_sig(path)
+    if sig is None:
+        return None
+    return _season_archive_cached(path, sig)
@@ -0,0 +1,335 @@
+"""Command-line admin tool: the page_admin operations over a data directory.
+
+    python -m prediction_core [--data-dir DIR | --game ID] COMMAND ...
+
+    recompute                     rebuild leaderboard.csv and the leaderboard history
+    post-results FILE             CSV of Match,Result[,RealWinner]; closes the matches
+    delete-predictions MATCH ...  delete every prediction for the named matches
+    import-matches FILE           CSV of Match,Kickoff[,BigGame,Occasion,Round,...]
+    import-predictions FILE       CSV of User,Match,Prediction[,Winner,SubmittedAt]
+    test-data                     insert the two sample matches of the admin page
+    backup [OUT]                  write prediction_backup.zip (or OUT); --upload queues it
+    restore ZIP                   restore a backup zip, then recompute
+    publish [--force]             re-render the static standings pages (see standings.py)
+    feed [--host H] [--port P]    serve the read-only spectator feed (see feed.py)
+
+FILE may be "-" for stdin. Input files are read --batch-size rows at a time
+and each batch is written before the next is read. Commands that change
+predictions or results recompute the leaderboard once, after the last batch,
+and republish the standings pages if the standings changed.
+
+Exit codes: 0 success, 1 failure (nothing after the failing batch was
+written), 2 bad usage, 3 some input rows were rejected (the rest applied).
+
+The CLI writes the same CSVs as the app without its in-process locks; run
+heavy imports when players are not submitting.
+"""
+import argparse, os, shutil, sys
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from .game import GAME, use_game
+from .settings import BASE_DIR, TENANTS, tenant_data_dir
+from .storage import _append_rows, cache_logo_from_url, ensure_history_schema, load_csv, normalize_digits, \
+    parse_iso_dt, save_csv, save_team_logo
+from .accounts import invalidate_users_index
+from .scoring import _parse_score, _winner_from_score, effective_prediction_rows, rebuild_leaderboard_history, \
+    recompute_leaderboard, save_predictions
+from .backup import create_backup_zip, enqueue_backup_upload, restore_from_zip
+from .feed import feed_server
+from .standings import publish_standings, standings_status
+
+EXIT_OK, EXIT_FAILED, EXIT_REJECTED = 0, 1, 3   # argparse exits with 2 on bad usage
+
+PRED_COLS = ["User", "Match", "Prediction", "Winner", "SubmittedAt"]
+MATCH_COLS = ["Match", "Kickoff", "Result", "HomeLogo", "AwayLogo", "BigGame", "RealWinner", "Occasion", "OccasionLogo", "Round"]
+HIST_COLS = MATCH_COLS + ["CompletedAt"]
+
+
+class _Report:
+    def __init__(self):
+        self.applied = 0
+        self.rejected = 0
+
+    def reject(self, line: int, reason: str):
+        self.rejected += 1
+        print(f"line {line}: {reason}", file=sys.stderr)
+
+
+def _batches(path: str, size: int, required: list):
+    # Rows come back as strings with their 1-based line number in the file
+    # (header is line 1), so rejections can point at the input.
+    reader = pd.read_csv(sys.stdin if path == "-" else path, dtype=str, keep_default_na=False, chunksize=size)
+    line = 2
+    for chunk in reader:
+        missing = [c for c in required if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"missing column(s): {', '.join(missing)}")
+        chunk = chunk.apply(lambda s: s.str.strip())
+        chunk.index = range(line, line + len(chunk))
+        line += len(chunk)
+        yield chunk
+
+
+def _recompute() -> pd.DataFrame:
+    preds = load_csv(GAME.PREDICTIONS_FILE, PRED_COLS)
+    lb = recompute_leaderboard(preds)
+    rebuild_leaderboard_history(preds)
+    publish_standings()
+    return lb
+
+
+def cmd_recompute(args, report: _Report):
+    lb = _recompute()
+    print(f"leaderboard: {len(lb)} player(s)")
+
+
+def cmd_post_results(args, report: _Report):
+    # Same effect as "Save (Score)" on the admin page for each row: the match
+    # gets its result, moves to match_history.csv and leaves matches.csv.
+    now = datetime.now(ZoneInfo("UTC")).isoformat()
+    for batch in _batches(args.file, args.batch_size, ["Match", "Result"]):
+        mdf = load_csv(GAME.MATCHES_FILE, MATCH_COLS)
+        open_names = set(mdf["Match"].astype(str))
+        done = {}
+        for line, r in batch.iterrows():
+            if r["Match"] not in open_names:
+                report.reject(line, f"no open match named {r['Match']!r}")
+            elif not _parse_score(r["Result"]):
+                report.reject(line, f"bad result {r['Result']!r}")
+            else:
+                done[r["Match"]] = (normalize_digits(r["Result"]), r.get("RealWinner", ""))
+        if not done:
+            continue
+        closed = mdf[mdf["Match"].isin(list(done))].copy()
+        closed[["Result", "RealWinner"]] = closed[["Result", "RealWinner"]].astype(object)
+        closed[["Result", "RealWinner"]] = [list(done[m]) for m in closed["Match"]]
+        closed["CompletedAt"] = now
+        hist = ensure_history_schema(load_csv(GAME.MATCH_HISTORY_FILE, HIST_COLS))
+        save_csv(pd.concat([hist, ensure_history_schema(closed)], ignore_index=True), GAME.MATCH_HISTORY_FILE)
+        save_csv(mdf[~mdf["Match"].isin(list(done))], GAME.MATCHES_FILE)
+        report.applied += len(done)
+    if report.applied:
+        _recompute()
+    print(f"posted {report.applied} result(s)")
+
+
+def cmd_delete_predictions(args, report: _Report):
+    matches = set(args.match)
+    p = load_csv(GAME.PREDICTIONS_FILE, PRED_COLS)
+    gone = p[p["Match"].astype(str).isin(matches)]
+    for m in sorted(matches - set(gone["Match"].astype(str))):
+        print(f"no predictions for {m!r}", file=sys.stderr)
+    if not gone.empty:
+        p = p.drop(index=gone.index)
+        save_predictions(p, effective_prediction_rows(p, zip(gone["User"], gone["Match"])))
+        _recompute()
+    report.applied = len(gone)
+    print(f"deleted {len(gone)} prediction(s)")
+
+
+def cmd_import_matches(args, report: _Report):
+    tz = ZoneInfo(args.tz)
+    for batch in _batches(args.file, args.batch_size, ["Match", "Kickoff"]):
+        m = load_csv(GAME.MATCHES_FILE, MATCH_COLS)
+        taken = set(m["Match"].astype(str)) | set(load_csv(GAME.MATCH_HISTORY_FILE, ["Match"])["Match"].astype(str))
+        rows = []
+        for line, r in batch.iterrows():
+            ko = parse_iso_dt(r["Kickoff"])
+            if " vs " not in r["Match"]:
+                report.reject(line, f"match name must be 'Team A vs Team B': {r['Match']!r}")
+            elif r["Match"] in taken:
+                report.reject(line, f"match already exists: {r['Match']!r}")
+            elif ko is None:
+                report.reject(line, f"bad kickoff {r['Kickoff']!r}")
+            else:
+                ko = ko if ko.tzinfo else ko.replace(tzinfo=tz)
+                taken.add(r["Match"])
+                rows.append({
+                    "Match": r["Match"],
+                    "Kickoff": ko.astimezone(ZoneInfo("UTC")).isoformat(),
+                    "Result": None,
+                    "HomeLogo": r.get("HomeLogo") or None,
+                    "AwayLogo": r.get("AwayLogo") or None,
+                    "BigGame": str(r.get("BigGame", "")).lower() in ("1", "true", "yes", "y"),
+                    "RealWinner": "",
+                    "Occasion": r.get("Occasion", ""),
+                    "OccasionLogo": r.get("OccasionLogo") or None,
+                    "Round": r.get("Round", ""),
+                })
+        if rows:
+            save_csv(pd.concat([m, pd.DataFrame(rows, columns=MATCH_COLS)], ignore_index=True), GAME.MATCHES_FILE)
+            report.applied += len(rows)
+    print(f"added {report.applied} match(es)")
+
+
+def cmd_import_predictions(args, report: _Report):
+    # Rows are appended to predictions.csv batch by batch; the leaderboard
+    # view notices the file changed outside its event log and rebases once.
+    known = set(load_csv(GAME.MATCHES_FILE, ["Match"])["Match"].astype(str)) \
+        | set(load_csv(GAME.MATCH_HISTORY_FILE, ["Match"])["Match"].astype(str))
+    now = datetime.now(ZoneInfo("UTC")).isoformat()
+    for batch in _batches(args.file, args.batch_size, ["User", "Match", "Prediction"]):
+        rows = []
+        for line, r in batch.iterrows():
+            parsed = _parse_score(r["Prediction"])
+            if not r["User"]:
+                report.reject(line, "empty user")
+            elif r["Match"] not in known:
+                report.reject(line, f"unknown match {r['Match']!r}")
+            elif not parsed:
+                report.reject(line, f"bad prediction {r['Prediction']!r}")
+            else:
+                score = f"{parsed[0]}-{parsed[1]}"
+                rows.append({
+                    "User": r["User"],
+                    "Match": r["Match"],
+                    "Prediction": score,
+                    "Winner": "Draw" if parsed[0] == parsed[1] else (r.get("Winner") or _winner_from_score(r["Match"], score)),
+                    "SubmittedAt": r.get("SubmittedAt") or now,
+                })
+        if rows:
+            _append_rows(GAME.PREDICTIONS_FILE, pd.DataFrame(rows), PRED_COLS)
+            report.applied += len(rows)
+    if report.applied:
+        _recompute()
+    print(f"imported {report.applied} prediction(s)")
+
+
+def cmd_test_data(args, report: _Report):
+    tz_local = ZoneInfo("Asia/Riyadh")
+    now = datetime.now(tz_local)
+    trophy = "https://upload.wikimedia.org/wikipedia/commons/8/8f/Trophy_icon.png"
+    samples = [
+        ("Real Madrid", "Barcelona",
+         "https://upload.wikimedia.org/wikipedia/en/5/56/Real_Madrid_CF.svg",
+         "https://upload.wikimedia.org/wikipedia/en/4/47/FC_Barcelona_%28crest%29.svg",
+         now + timedelta(days=1), True, "El Clásico", "Round 1"),
+        ("Al Hilal", "Al Nassr",
+         "https://upload.wikimedia.org/wikipedia/en/f/f1/Al_Hilal_SFC_Logo.svg",
+         "https://upload.wikimedia.org/wikipedia/en/5/53/Al-Nassr_logo_2020.svg",
+         now + timedelta(days=3), False, "Saudi Derby", "Round 2"),
+    ]
+    m = load_csv(GAME.MATCHES_FILE, MATCH_COLS)
+    for A, B, Au, Bu, day, big, occ, rnd in samples:
+        ko = datetime(day.year, day.month, day.day, 21, 0, tzinfo=tz_local)
+        A_logo = cache_logo_from_url(Au) or Au
+        B_logo = cache_logo_from_url(Bu) or Bu
+        save_team_logo(A, A_logo)
+        save_team_logo(B, B_logo)
+        row = pd.DataFrame([{
+            "Match": f"{A} vs {B}", "Kickoff": ko.astimezone(ZoneInfo("UTC")).isoformat(), "Result": None,
+            "HomeLogo": A_logo, "AwayLogo": B_logo, "BigGame": big, "RealWinner": "",
+            "Occasion": occ, "OccasionLogo": cache_logo_from_url(trophy) or trophy, "Round": rnd,
+        }])
+        m = pd.concat([m, row], ignore_index=True)
+    save_csv(m, GAME.MATCHES_FILE)
+    report.applied = len(samples)
+    print(f"added {len(samples)} test match(es)")
+
+
+def cmd_backup(args, report: _Report):
+    buf = create_backup_zip()
+    with open(args.out, "wb") as f:
+        shutil.copyfileobj(buf, f)
+    print(f"wrote {args.out}")
+    if args.upload:
+        job = enqueue_backup_upload(buf)
+        if not job:
+            raise RuntimeError("no upload target configured (set BACKUP_TARGET or the Supabase secrets)")
+        print(f"queued for upload as {job['key']}")
+
+
+def cmd_restore(args, report: _Report):
+    with open(args.zip, "rb") as f:
+        restore_from_zip(f)
+    invalidate_users_index()
+    lb = _recompute()
+    print(f"restored {args.zip}; leaderboard: {len(lb)} player(s)")
+
+
+def cmd_publish(args, report: _Report):
+    written = publish_standings(force=args.force)
+    status = standings_status()
+    print(("wrote " if written else "unchanged: ") + ", ".join(status["pages"]))
+
+
+def cmd_feed(args, report: _Report):
+    server = feed_server(args.host, args.port)
+    print("serving http://{}:{}/leaderboard.json".format(*server.server_address[:2]), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m prediction_core", description=__doc__.splitlines()[0],
+                                 formatter_class=argparse.RawDescriptionHelpFormatter,
+                                 epilog="\n".join(__doc__.splitlines()[2:]))
+    where = ap.add_mutually_exclusive_group()
+    where.add_argument("--data-dir", default=BASE_DIR, help="game data directory (default: current directory)")
+    where.add_argument("--game", default=None, help="tenant id from TENANTS; uses tenants/<id>/")
+    ap.add_argument("--batch-size", type=int, default=5000, help="input rows per batch")
+    sub = ap.add_subparsers(dest="command", required=True, metavar="COMMAND")
+
+    sub.add_parser("recompute", help="rebuild leaderboard.csv and the leaderboard history").set_defaults(fn=cmd_recompute)
+    p = sub.add_parser("post-results", help="post results from a CSV of Match,Result[,RealWinner]")
+    p.add_argument("file")
+    p.set_defaults(fn=cmd_post_results)
+    p = sub.add_parser("delete-predictions", help="delete every prediction for the named matches")
+    p.add_argument("match", nargs="+")
+    p.set_defaults(fn=cmd_delete_predictions)
+    p = sub.add_parser("import-matches", help="add matches from a CSV of Match,Kickoff[,BigGame,Occasion,Round,...]")
+    p.add_argument("file")
+    p.add_argument("--tz", default="Asia/Riyadh", help="time zone for kickoffs without an offset")
+    p.set_defaults(fn=cmd_import_matches)
+    p = sub.add_parser("import-predictions", help="add predictions from a CSV of User,Match,Prediction[,Winner,SubmittedAt]")
+    p.add_argument("file")
+    p.set_defaults(fn=cmd_import_predictions)
+    sub.add_parser("test-data", help="insert the sample matches").set_defaults(fn=cmd_test_data)
+    p = sub.add_parser("backup", help="write a backup zip")
+    p.add_argument("out", nargs="?", default="prediction_backup.zip")
+    p.add_argument("--upload", action="store_true", help="also queue the zip for the configured upload target")
+    p.set_defaults(fn=cmd_backup)
+    p = sub.add_parser("restore", help="restore a backup zip and recompute")
+    p.add_argument("zip")
+    p.set_defaults(fn=cmd_restore)
+    p = sub.add_parser("publish", help="re-render the static standings pages if results changed")
+    p.add_argument("--force", action="store_true", help="render even if nothing changed")
+    p.set_defaults(fn=cmd_publish)
+    p = sub.add_parser("feed", help="serve the read-only spectator feed over HTTP")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8502)
+    p.set_defaults(fn=cmd_feed)
+    return ap
+
+
+def main(argv=None) -> int:
+    ap = build_parser()
+    args = ap.parse_args(argv)
+    if args.batch_size < 1:
+        ap.error("--batch-size must be at least 1")
+    if args.game is not None:
+        if args.game not in TENANTS:
+            ap.error(f"unknown game {args.game!r}")
+        use_game(tenant_data_dir(args.game), args.game)
+    elif not os.path.isdir(args.data_dir):
+        ap.error(f"no such data directory: {args.data_dir}")
+    else:
+        use_game(args.data_dir)
+
+    report = _Report()
+    try:
+        args.fn(args, report)
+    except Exception as e:
+        print(f"{args.command} failed: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    if report.rejected:
+        print(f"{report.rejected} row(s) rejected", file=sys.stderr)
+        return EXIT_REJECTED
+    return EXIT_OK
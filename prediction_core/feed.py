@@ -0,0 +1,172 @@
+"""Read-only spectator feed: standings and matches over HTTP, without Streamlit."""
+import hashlib, json, os, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from .game import GAME, Game, cache_resource, current_game, open_game, tenant_store, use_game
+from .instrument import metrics_inc
+from .settings import TENANTS, secret, tenant_data_dir
+from .storage import _file_sig, load_csv
+from .scoring import competition_ranks, points_cube
+from .standings import STANDINGS_LANGS, season_standings, standings_page_path
+
+# Spectator feed: /leaderboard, /rounds and /matches as .json or .csv, for
+# the game picked with ?game=<id> (or DEFAULT_TENANT). Each body is rendered
+# once per change of the game's data files and then served from memory with
+# an ETag, so repeat clients get 304s. The files are stat()ed at most every
+# FEED_CHECK_SECONDS per game; in between a request is a dict lookup.
+# /standings.<lang>.html serves the pre-rendered pages (see standings.py)
+# straight from disk. FEED_PORT starts the feed inside the app process on FEED_HOST (default
+# 127.0.0.1); `python -m prediction_core feed` runs it on its own.
+FEED_CHECK_SECONDS = float(secret("FEED_CHECK_SECONDS", 1))
+FEED_MAX_AGE = int(secret("FEED_MAX_AGE", 5))
+FEED_TYPES = {"json": "application/json; charset=utf-8", "csv": "text/csv; charset=utf-8"}
+FEED_MATCH_COLS = ["Match", "Kickoff", "Result", "RealWinner", "BigGame", "Occasion", "Round", "CompletedAt"]
+
+def _feed_sigs() -> tuple:
+    return tuple(_file_sig(f) for f in (GAME.PREDICTIONS_FILE, GAME.MATCHES_FILE, GAME.MATCH_HISTORY_FILE,
+                                        GAME.LEADERBOARD_OVERRIDES_FILE))
+
+def feed_leaderboard() -> pd.DataFrame:
+    return season_standings()
+
+def feed_rounds() -> pd.DataFrame:
+    cube = points_cube()
+    cube = cube[cube["Round"] != ""]
+    per_round = (cube.groupby(["Round", "User"], as_index=False)
+                 .agg(Points=("Points", "sum"), Predictions=("Predictions", "sum"),
+                      Exact=("Exact", "sum"), Outcome=("Outcome", "sum"))
+                 .sort_values(["Round", "Points", "Predictions", "Exact"], ascending=[True, False, True, False]))
+    per_round.insert(1, "Rank", competition_ranks(per_round, by="Round"))
+    return per_round.reset_index(drop=True)
+
+def feed_matches() -> pd.DataFrame:
+    open_m = load_csv(GAME.MATCHES_FILE, FEED_MATCH_COLS).assign(Status="open")
+    done_m = load_csv(GAME.MATCH_HISTORY_FILE, FEED_MATCH_COLS).assign(Status="done")
+    frames = [m for m in (done_m, open_m) if not m.empty]
+    if not frames:
+        return pd.DataFrame(columns=FEED_MATCH_COLS + ["Status"])
+    out = pd.concat(frames, ignore_index=True)
+    return out.drop_duplicates("Match", keep="last").reset_index(drop=True)
+
+FEED_RESOURCES = {"leaderboard": feed_leaderboard, "rounds": feed_rounds, "matches": feed_matches}
+
+def _feed_render(resource: str, fmt: str) -> tuple[str, bytes]:
+    df = FEED_RESOURCES[resource]()
+    if fmt == "csv":
+        body = df.to_csv(index=False).encode("utf-8")
+    else:
+        body = json.dumps({
+            "game": GAME.TENANT_ID or None,
+            "rows": json.loads(df.to_json(orient="records", force_ascii=False)),
+        }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return f'"{resource}-{fmt}-{hashlib.sha1(body).hexdigest()[:20]}"', body
+
+@tenant_store(lambda store: store.update(checked=float("-inf"), sigs=None, bodies={}))
+def _feed_store(data_dir: str) -> dict:
+    return {"lock": threading.Lock(), "checked": float("-inf"), "sigs": None, "bodies": {}}
+
+def feed_body(resource: str, fmt: str) -> tuple[str, bytes]:
+    """(etag, body) of one feed resource for the current game."""
+    store = _feed_store(os.path.abspath(GAME.DATA_DIR))
+    now = time.monotonic()
+    if now - store["checked"] < FEED_CHECK_SECONDS:
+        hit = store["bodies"].get((resource, fmt))
+        if hit is not None:
+            return hit
+    with store["lock"]:
+        if now - store["checked"] >= FEED_CHECK_SECONDS:
+            sigs = _feed_sigs()
+            if sigs != store["sigs"]:
+                store["sigs"], store["bodies"] = sigs, {}
+            store["checked"] = now
+        hit = store["bodies"].get((resource, fmt))
+        if hit is None:
+            hit = store["bodies"][(resource, fmt)] = _feed_render(resource, fmt)
+        return hit
+
+def _feed_page(lang: str) -> tuple[str, bytes]:
+    with open(standings_page_path(lang), "rb") as f:
+        st = os.fstat(f.fileno())
+        return f'"standings-{lang}-{st.st_mtime_ns:x}-{st.st_size:x}"', f.read()
+
+def _feed_handler(default: Game):
+    class FeedHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _game(self, query: dict) -> bool:
+            tid = (query.get("game") or [""])[0].strip() or default.TENANT_ID
+            if tid == default.TENANT_ID:
+                use_game(default.DATA_DIR, default.TENANT_ID)
+            elif tid in TENANTS:
+                use_game(tenant_data_dir(tid), tid)
+            else:
+                return False
+            return True
+
+        def _reply(self, code: int, headers: dict, body: bytes = b"", head: bool = False):
+            self.send_response(code)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body and not head:
+                self.wfile.write(body)
+
+        def do_GET(self, head: bool = False):
+            url = urlparse(self.path)
+            resource, _, fmt = url.path.strip("/").partition(".")
+            page = resource == "standings" and fmt.removesuffix(".html") in STANDINGS_LANGS and fmt.endswith(".html")
+            if not (page or resource in FEED_RESOURCES and fmt in FEED_TYPES) or not self._game(parse_qs(url.query)):
+                self._reply(404, {"Content-Type": "text/plain; charset=utf-8"}, b"not found\n", head)
+                return
+            try:
+                etag, body = _feed_page(fmt.removesuffix(".html")) if page else feed_body(resource, fmt)
+            except FileNotFoundError:
+                self._reply(404, {"Content-Type": "text/plain; charset=utf-8"}, b"not published yet\n", head)
+                return
+            except Exception:
+                metrics_inc("feed_requests_total", resource=resource, status="500")
+                self._reply(500, {"Content-Type": "text/plain; charset=utf-8"}, b"feed unavailable\n", head)
+                return
+            headers = {"ETag": etag, "Cache-Control": f"public, max-age={FEED_MAX_AGE}",
+                       "Access-Control-Allow-Origin": "*"}
+            wanted = self.headers.get("If-None-Match", "")
+            if wanted.strip() == "*" or etag in [t.strip().removeprefix("W/") for t in wanted.split(",")]:
+                metrics_inc("feed_requests_total", resource=resource, status="304")
+                self._reply(304, headers, head=head)
+                return
+            metrics_inc("feed_requests_total", resource=resource, status="200")
+            ctype = "text/html; charset=utf-8" if page else FEED_TYPES[fmt]
+            self._reply(200, {"Content-Type": ctype, **headers}, body, head)
+
+        def do_HEAD(self):
+            self.do_GET(head=True)
+
+        def log_message(self, *args):
+            pass
+    return FeedHandler
+
+def feed_server(host: str, port: int, default: Game | None = None) -> ThreadingHTTPServer:
+    """An HTTP server for the feed; call serve_forever() on it."""
+    server = ThreadingHTTPServer((host, port), _feed_handler(default or current_game()))
+    server.daemon_threads = True
+    return server
+
+@cache_resource
+def _feed_exporter() -> dict:
+    state = {"address": None, "last_error": None}
+    port = int(secret("FEED_PORT", 0) or 0)
+    if port:
+        tid = str(secret("DEFAULT_TENANT", "") or "").strip()
+        tid = tid if tid in TENANTS else ""
+        try:
+            server = feed_server(str(secret("FEED_HOST", "127.0.0.1")), port, open_game(tenant_data_dir(tid), tid))
+            threading.Thread(target=server.serve_forever, daemon=True, name="feed-http").start()
+            state["address"] = "{}:{}".format(*server.server_address[:2])
+        except OSError as e:
+            state["last_error"] = str(e)
+    return state
@@ -0,0 +1,235 @@
+"""The current game (tenant) and the in-process caches shared by its callers."""
+import contextvars, copy, functools, os, threading
+from collections import OrderedDict
+
+from .settings import BASE_DIR, MAX_ACTIVE_TENANTS, SHARED_LOGO_DIR
+
+class Game:
+    """File layout of one game: every data file lives under data_dir."""
+
+    def __init__(self, data_dir: str = BASE_DIR, tenant_id: str = ""):
+        self.DATA_DIR = data_dir
+        self.TENANT_ID = tenant_id
+        self.USERS_FILE = os.path.join(data_dir, "users.csv")
+        self.MATCHES_FILE = os.path.join(data_dir, "matches.csv")
+        self.MATCH_HISTORY_FILE = os.path.join(data_dir, "match_history.csv")
+        self.PREDICTIONS_FILE = os.path.join(data_dir, "predictions.csv")
+        self.LEADERBOARD_FILE = os.path.join(data_dir, "leaderboard.csv")
+        self.SEASON_FILE = os.path.join(data_dir, "season.txt")
+        self.TEAM_LOGOS_FILE = os.path.join(data_dir, "team_logos.json")
+        self.LOGO_DIR = os.path.join(data_dir, "logos")
+        self.LEADERBOARD_OVERRIDES_FILE = os.path.join(data_dir, "leaderboard_overrides.csv")
+        self.OTP_FILE = os.path.join(data_dir, "otp.csv")
+        self.LEADERBOARD_HISTORY_FILE = os.path.join(data_dir, "leaderboard_history.csv")
+        self.LEAGUES_FILE = os.path.join(data_dir, "leagues.csv")
+        self.LEAGUE_MEMBERS_FILE = os.path.join(data_dir, "league_members.csv")
+        self.SNAPSHOT_DIR = os.path.join(data_dir, "backups")
+        self.SEASONS_DIR = os.path.join(data_dir, "seasons")
+        self.EVENTS_FILE = os.path.join(data_dir, "events.jsonl")
+        self.PREDICTIONS_AUDIT_FILE = os.path.join(data_dir, "predictions_audit.csv")
+        self.PREDICTIONS_COMPACT_MARK = os.path.join(data_dir, "predictions.compacted.json")
+        self.LEADERBOARD_CHECKPOINT_FILE = os.path.join(data_dir, "leaderboard_checkpoint.json")
+        self.UPLOAD_QUEUE_DIR = os.path.join(self.SNAPSHOT_DIR, "outbox")
+        self.SEASON_INDEX = os.path.join(self.SEASONS_DIR, "index.json")
+        self.PUBLIC_DIR = os.path.join(data_dir, "public")
+
+        self.BACKUP_FILES = [
+            self.USERS_FILE,
+            self.MATCHES_FILE,
+            self.MATCH_HISTORY_FILE,
+            self.PREDICTIONS_FILE,
+            self.LEADERBOARD_FILE,
+            self.SEASON_FILE,
+            self.TEAM_LOGOS_FILE,
+            self.LEADERBOARD_OVERRIDES_FILE,
+            self.OTP_FILE,
+            self.LEADERBOARD_HISTORY_FILE,
+            self.LEAGUES_FILE,
+            self.LEAGUE_MEMBERS_FILE,
+            self.PREDICTIONS_AUDIT_FILE,
+        ]
+        self.SEASON_ARCHIVE_FILES = [
+            self.SEASON_FILE, self.MATCHES_FILE, self.MATCH_HISTORY_FILE, self.PREDICTIONS_FILE, self.LEADERBOARD_FILE,
+            self.LEADERBOARD_OVERRIDES_FILE, self.LEADERBOARD_HISTORY_FILE, self.EVENTS_FILE, self.LEADERBOARD_CHECKPOINT_FILE,
+            self.PREDICTIONS_AUDIT_FILE, self.PREDICTIONS_COMPACT_MARK,
+        ]
+
+    def __repr__(self):
+        return f"Game({self.DATA_DIR!r}, {self.TENANT_ID!r})"
+
+# The current game is a context variable: each Streamlit rerun, CLI command or
+# request handler selects its game with use_game(), and everything in the
+# core reads paths through GAME. Threads start with an empty context, so
+# background work is wrapped with bind_game() by whoever starts it.
+_current = contextvars.ContextVar("prediction_game")
+_games = {}
+_games_lock = threading.Lock()
+
+def open_game(data_dir: str = BASE_DIR, tenant_id: str = "") -> Game:
+    key = (os.path.abspath(data_dir), tenant_id)
+    game = _games.get(key)
+    if game is None:
+        with _games_lock:
+            game = _games.get(key)
+            if game is None:
+                game = Game(data_dir, tenant_id)
+                os.makedirs(game.LOGO_DIR, exist_ok=True)
+                os.makedirs(SHARED_LOGO_DIR, exist_ok=True)
+                _games[key] = game
+    return game
+
+def use_game(data_dir: str = BASE_DIR, tenant_id: str = "") -> Game:
+    game = open_game(data_dir, tenant_id)
+    _current.set(game)
+    return game
+
+def current_game() -> Game:
+    try:
+        return _current.get()
+    except LookupError:
+        raise RuntimeError("No game selected; call prediction_core.use_game(data_dir) first") from None
+
+def bind_game(fn):
+    return functools.partial(contextvars.copy_context().run, fn)
+
+class _CurrentGame:
+    def __getattr__(self, name):
+        return getattr(current_game(), name)
+
+    def __repr__(self):
+        return f"<current {current_game()!r}>"
+
+GAME = _CurrentGame()
+
+# In-process caches with the call semantics of st.cache_resource and
+# st.cache_data: results are keyed by the (hashable) arguments and shared by
+# every caller in the process, least recently used entries are dropped past
+# max_entries, and cache_data hands each caller its own copy.
+_MISSING = object()
+
+def _memo(fn, max_entries, copy_out):
+    entries, computing, lock = OrderedDict(), {}, threading.Lock()
+
+    @functools.wraps(fn)
+    def cached(*args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+        with lock:
+            value = entries.get(key, _MISSING)
+            if value is not _MISSING:
+                entries.move_to_end(key)
+            else:
+                key_lock = computing.setdefault(key, threading.Lock())
+        if value is _MISSING:
+            # One caller computes a missing entry; the others wait for it.
+            with key_lock:
+                with lock:
+                    value = entries.get(key, _MISSING)
+                if value is _MISSING:
+                    value = fn(*args, **kwargs)
+                    with lock:
+                        entries[key] = value
+                        computing.pop(key, None)
+                        if max_entries and len(entries) > max_entries:
+                            entries.popitem(last=False)
+        return copy.deepcopy(value) if copy_out else value
+
+    def clear():
+        with lock:
+            entries.clear()
+    cached.clear = clear
+    return cached
+
+def cache_resource(fn=None, *, max_entries: int | None = None):
+    if fn is None:
+        return lambda f: _memo(f, max_entries, copy_out=False)
+    return _memo(fn, max_entries, copy_out=False)
+
+def cache_data(fn=None, *, max_entries: int | None = None):
+    if fn is None:
+        return lambda f: _memo(f, max_entries, copy_out=True)
+    return _memo(fn, max_entries, copy_out=True)
+
+# Per-game stores: indexes and state shared by every caller of one game. The
+# store dict, and the lock in it, live as long as the process, so whoever
+# holds a store's lock excludes every other caller of that game. Only the
+# data is bounded: past MAX_ACTIVE_TENANTS games, the least recently used
+# game's stores are unloaded (each store's unload hook runs under its lock,
+# in that game's context) and reload on their next use. A store that is busy
+# at that moment stays loaded until the next round.
+_stores_lock = threading.Lock()
+_game_stores = {}
+_active_games = OrderedDict()
+_store_keys = {}
+_mru = [None]
+
+def _run_unload(game, unload, store: dict):
+    if game is not None:
+        _current.set(game)
+    unload(store)
+
+def _unload_game(data_dir: str) -> bool:
+    for store, unload, game in _game_stores.get(data_dir, ()):
+        if not store["lock"].acquire(blocking=False):
+            return False
+        try:
+            contextvars.copy_context().run(_run_unload, game, unload, store)
+        finally:
+            store["lock"].release()
+    return True
+
+def tenant_store(unload):
+    """Decorator for fn(data_dir) -> dict with a "lock"; unload(store) drops its data."""
+    def wrap(fn):
+        stores = {}
+
+        @functools.wraps(fn)
+        def get(data_dir: str) -> dict:
+            key = _store_keys.get(data_dir) or _store_keys.setdefault(data_dir, os.path.abspath(data_dir))
+            store = stores.get(key)
+            if store is not None and _mru[0] == key:
+                return store  # already the most recently used game
+            with _stores_lock:
+                store = stores.get(key)
+                if store is None:
+                    store = stores[key] = fn(data_dir)
+                    _game_stores.setdefault(key, []).append((store, unload, _current.get(None)))
+                _active_games[key] = True
+                _active_games.move_to_end(key)
+                _mru[0] = key
+                victims = [_active_games.popitem(last=False)[0] for _ in range(len(_active_games) - MAX_ACTIVE_TENANTS)]
+            for victim in victims:
+                if not _unload_game(victim):
+                    with _stores_lock:
+                        _active_games[victim] = True
+                        _active_games.move_to_end(victim, last=False)
+            return store
+        return get
+    return wrap
+
+# Per-game background workers: a tenant_store whose state also owns a daemon
+# thread running loop(state, stop). Unloading the game sets that thread's
+# stop event (and "wake", if the state has one), so at most
+# MAX_ACTIVE_TENANTS games keep a worker; the next use starts a fresh one.
+def _stop_worker(state: dict):
+    stop, state["stop"] = state.get("stop"), None
+    if stop is not None:
+        stop.set()
+        if "wake" in state:
+            state["wake"].set()
+
+def tenant_worker(loop, *, name: str, enabled: bool = True):
+    """Decorator for fn(data_dir) -> state dict with a "lock"; runs loop(state, stop) while the game is active."""
+    def wrap(fn):
+        store = tenant_store(_stop_worker)(fn)
+
+        @functools.wraps(fn)
+        def get(data_dir: str) -> dict:
+            state = store(data_dir)
+            if enabled and state.get("stop") is None:
+                with state["lock"]:
+                    if state.get("stop") is None:
+                        state["stop"] = stop = threading.Event()
+                        threading.Thread(target=bind_game(loop), args=(state, stop), daemon=True, name=name).start()
+            return state
+        return get
+    return wrap
@@ -0,0 +1,217 @@
+"""User-facing strings (English and Arabic) shared by the app and generated pages."""
+
+LANG = {
+    "en": {
+        "app_title": "⚽ Prediction Game",
+        "sidebar_time": "⏱️ Time & Settings",
+        "sidebar_lang": "Language",
+        "lang_en": "English",
+        "lang_ar": "العربية",
+        "app_timezone": "App Timezone",
+        "login_tab": "Login",
+        "user_login": "User Login",
+        "admin_login": "Admin Login",
+        "your_name": "Your Name",
+        "admin_pass": "Admin Password",
+        "login": "Login",
+        "register": "Register",
+        "login_ok": "Logged in.",
+        "admin_ok": "Admin authenticated.",
+        "admin_bad": "Wrong password.",
+        "need_name": "Please enter a name.",
+        "please_login_first": "Please log in first",
+        "tab_play": "Play",
+        "tab_leaderboard": "Leaderboard",
+        "tab_admin": "Admin",
+        "no_matches": "No matches yet.",
+        "kickoff": "Kickoff",
+        "opens_in": "Opens in",
+        "closes_in": "Closes in",
+        "closed": "Predictions closed",
+        "score": "Score (e.g. 2-1)",
+        "winner": "Winner",
+        "draw": "Draw",
+        "gold_badge": "🔥 Golden Match 🔥",
+        "already_submitted": "You already submitted.",
+        "saved_ok": "Prediction saved.",
+        "fmt_error": "Use format like 2-1 (numbers only)",
+        "range_error": "Goals must be 0–20",
+        "enter_both_teams": "Enter both teams.",
+        "submit_btn": "Submit",
+        "leaderboard": "Leaderboard",
+        "no_scores_yet": "No scores yet.",
+        "lb_rank": "Rank",
+        "lb_user": "User",
+        "lb_preds": "Predictions",
+        "lb_exact": "Exact",
+        "lb_outcome": "Outcome",
+        "lb_points": "Points",
+        "lb_move": "Move",
+        "lb_as_of": "Standings as of",
+        "lb_now": "Now",
+        "lb_after_round": "After {round}",
+        "admin_panel": "Admin Panel",
+        "season_name_label": "Season Name (e.g., Real Madrid 2025)",
+        "season_saved": "Season name saved.",
+        "test_data": "Insert Test Data",
+        "test_done": "Test data inserted.",
+        "add_match": "➕ Add a match",
+        "team_a": "Team A",
+        "team_b": "Team B",
+        "home_logo_url": "Home Logo URL",
+        "away_logo_url": "Away Logo URL",
+        "home_logo_upload": "Upload Home Logo",
+        "away_logo_upload": "Upload Away Logo",
+        "occasion": "Occasion",
+        "occasion_logo_url": "Occasion Logo URL",
+        "occasion_logo_upload": "Upload Occasion Logo",
+        "round": "Round",
+        "date_label": "Date",
+        "hour": "Hour (1–12)",
+        "minute": "Minute",
+        "ampm": "AM/PM",
+        "ampm_am": "AM",
+        "ampm_pm": "PM",
+        "big_game": "🔥 Golden Match 🔥",
+        "btn_add_match": "Add Match",
+        "match_added": "Match added.",
+        "edit_matches": "Edit Matches",
+        "final_score": "Final Score (e.g. 2-1)",
+        "real_winner": "Real Winner",
+        "save": "Save",
+        "delete": "Delete",
+        "updated": "Updated",
+        "deleted": "Deleted",
+        "match_history": "Match History (Admin only)",
+        "terminate": "Terminate",
+        "terminated": "User terminated.",
+        "leagues": "👥 Mini-leagues",
+        "league_pick": "Your leagues",
+        "league_none": "You are not in any mini-league yet.",
+        "league_name": "League name",
+        "league_create": "Create league",
+        "league_created": "League created. Share this join code: {code}",
+        "league_code": "Join code",
+        "league_join": "Join league",
+        "league_joined": "Joined {name}.",
+        "league_bad_code": "No league with that code.",
+        "league_leave": "Leave league",
+        "league_code_caption": "Join code: {code} · {n} members",
+        "past_seasons": "📚 Past seasons",
+        "season_pick": "Season",
+        "season_archive_caption": "Closed {date} · {matches} matches · {players} players",
+        "standings_updated": "Updated {time}",
+        "you_are_rank": "You are #{rank} of {n}",
+        "lb_show_all": "Show the full leaderboard",
+        "lb_top_and_you": "Top {k} and the players around you",
+    },
+    "ar": {
+        "app_title": "⚽ لعبة التوقعات",
+        "sidebar_time": "⏱️ الوقت والإعدادات",
+        "sidebar_lang": "اللغة",
+        "lang_en": "English",
+        "lang_ar": "العربية",
+        "app_timezone": "المنطقة الزمنية للتطبيق",
+        "login_tab": "تسجيل الدخول",
+        "user_login": "دخول المشارك",
+        "admin_login": "دخول المشرف",
+        "your_name": "اسمك",
+        "admin_pass": "كلمة مرور المشرف",
+        "login": "تسجيل الدخول",
+        "register": "تسجيل",
+        "login_ok": "تم تسجيل الدخول.",
+        "admin_ok": "تم التحقق من المشرف.",
+        "admin_bad": "كلمة المرور غير صحيحة.",
+        "need_name": "الرجاء إدخال الاسم.",
+        "please_login_first": "الرجاء تسجيل الدخول أولًا",
+        "tab_play": "اللعب",
+        "tab_leaderboard": "الترتيب",
+        "tab_admin": "الإدارة",
+        "no_matches": "لا توجد مباريات بعد.",
+        "kickoff": "ضربة البداية",
+        "opens_in": "يفتح بعد",
+        "closes_in": "يغلق بعد",
+        "closed": "أُغلقت التوقعات",
+        "score": "النتيجة (مثال 1-2)",
+        "winner": "الفائز",
+        "draw": "تعادل",
+        "gold_badge": "🔥 المباراة الذهبية 🔥",
+        "already_submitted": "لقد سجّلت توقعك.",
+        "saved_ok": "تم حفظ التوقع.",
+        "fmt_error": "استخدم الصيغة 1-2 (أرقام فقط)",
+        "range_error": "الأهداف بين 0 و20",
+        "enter_both_teams": "أدخل اسمي الفريقين.",
+        "submit_btn": "إرسال",
+        "leaderboard": "الترتيب",
+        "no_scores_yet": "لا توجد نقاط بعد.",
+        "lb_rank": "الترتيب",
+        "lb_user": "المشارك",
+        "lb_preds": "عدد التوقعات",
+        "lb_exact": "التوقع الصحيح",
+        "lb_outcome": "نصف التوقع",
+        "lb_points": "النقاط",
+        "lb_move": "التغير",
+        "lb_as_of": "الترتيب حتى",
+        "lb_now": "الآن",
+        "lb_after_round": "بعد {round}",
+        "admin_panel": "لوحة التحكم",
+        "season_name_label": "اسم الموسم (مثال: ريال مدريد 2025)",
+        "season_saved": "تم حفظ اسم الموسم.",
+        "test_data": "إدراج بيانات تجريبية",
+        "test_done": "تم إدراج البيانات التجريبية.",
+        "add_match": "➕ إضافة مباراة",
+        "team_a": "الفريق (أ)",
+        "team_b": "الفريق (ب)",
+        "home_logo_url": "رابط شعار المضيف",
+        "away_logo_url": "رابط شعار الضيف",
+        "home_logo_upload": "رفع شعار المضيف",
+        "away_logo_upload": "رفع شعار الضيف",
+        "occasion": "المناسبة",
+        "occasion_logo_url": "رابط شعار المناسبة",
+        "occasion_logo_upload": "رفع شعار المناسبة",
+        "round": "الجولة",
+        "date_label": "التاريخ",
+        "hour": "الساعة (1–12)",
+        "minute": "الدقيقة",
+        "ampm": "ص/م",
+        "ampm_am": "صباحا",
+        "ampm_pm": "مساء",
+        "big_game": "🔥 المباراة الذهبية 🔥",
+        "btn_add_match": "إضافة المباراة",
+        "match_added": "تمت إضافة المباراة.",
+        "edit_matches": "تعديل المباريات",
+        "final_score": "النتيجة النهائية (مثال 2-1)",
+        "real_winner": "الفائز الحقيقي",
+        "save": "حفظ",
+        "delete": "حذف",
+        "updated": "تم التحديث",
+        "deleted": "تم الحذف",
+        "match_history": "سجل المباريات (للمشرف فقط)",
+        "terminate": "إيقاف",
+        "terminated": "تم إيقاف المستخدم.",
+        "leagues": "👥 الدوريات المصغرة",
+        "league_pick": "دورياتك",
+        "league_none": "لست مشتركًا في أي دوري مصغر بعد.",
+        "league_name": "اسم الدوري",
+        "league_create": "إنشاء دوري",
+        "league_created": "تم إنشاء الدوري. شارك رمز الانضمام: {code}",
+        "league_code": "رمز الانضمام",
+        "league_join": "انضمام",
+        "league_joined": "تم الانضمام إلى {name}.",
+        "league_bad_code": "لا يوجد دوري بهذا الرمز.",
+        "league_leave": "مغادرة الدوري",
+        "league_code_caption": "رمز الانضمام: {code} · {n} أعضاء",
+        "past_seasons": "📚 المواسم السابقة",
+        "season_pick": "الموسم",
+        "season_archive_caption": "أُغلق {date} · {matches} مباراة · {players} لاعب",
+        "standings_updated": "آخر تحديث {time}",
+        "you_are_rank": "ترتيبك #{rank} من {n}",
+        "lb_show_all": "عرض الترتيب كاملاً",
+        "lb_top_and_you": "أفضل {k} واللاعبون القريبون منك",
+    }
+}
+
+def tr(lang, key, **kwargs):
+    d = LANG["ar" if lang == "ar" else "en"]
+    txt = d.get(key, key)
+    return txt.format(**kwargs) if kwargs else txt
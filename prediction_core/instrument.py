@@ -0,0 +1,310 @@
+"""Rerun profiling and Prometheus metrics, shared by all sessions of a process."""
+import bisect, functools, os, threading, time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlparse
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from .game import GAME, cache_resource, tenant_store
+from .settings import secret
+
+# Rerun profiling (opt-in with PROFILE_RERUNS or the admin Performance tab):
+# perf_span() times file I/O, leaderboard recomputes, logo fetches and page
+# sections into per-minute histograms shared by all sessions, and perf_rerun()
+# keeps the breakdown of the slowest recent reruns. Disabled, a span is one
+# flag check.
+PERF_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PERF_WINDOW_MINUTES = int(secret("PERF_WINDOW_MINUTES", 15))
+PERF_SLOW_RERUN_MS = float(secret("PERF_SLOW_RERUN_MS", 300))
+PERF_KEEP_SLOW = 25
+
+def _perf_unload(store: dict):
+    store["ops"] = {}
+    store["slow"].clear()
+
+@tenant_store(_perf_unload)
+def _perf_store(data_dir: str) -> dict:
+    return {
+        "lock": threading.Lock(),
+        "enabled": str(secret("PROFILE_RERUNS", "")).strip().lower() in ("1", "true", "yes", "on"),
+        "ops": {},
+        "slow": deque(maxlen=PERF_KEEP_SLOW),
+        "reruns": 0,
+        "local": threading.local(),
+    }
+
+def _perf_record(store: dict, op: str, secs: float, read: int, written: int):
+    minute = int(time.time() // 60)
+    with store["lock"]:
+        slots = store["ops"].setdefault(op, {})
+        slot = slots.get(minute)
+        if slot is None:
+            for m in [m for m in slots if m <= minute - PERF_WINDOW_MINUTES]:
+                del slots[m]
+            slot = slots[minute] = {"n": 0, "total": 0.0, "max": 0.0, "read": 0, "written": 0, "hist": [0] * (len(PERF_BUCKETS) + 1)}
+        slot["n"] += 1
+        slot["total"] += secs
+        slot["max"] = max(slot["max"], secs)
+        slot["read"] += read
+        slot["written"] += written
+        slot["hist"][bisect.bisect_left(PERF_BUCKETS, secs)] += 1
+    run = getattr(store["local"], "run", None)
+    if run is not None:
+        agg = run["ops"].setdefault(op, [0, 0.0, 0, 0])
+        agg[0] += 1
+        agg[1] += secs
+        agg[2] += read
+        agg[3] += written
+
+@contextmanager
+def perf_span(op: str):
+    store = _perf_store(GAME.DATA_DIR)
+    if not store["enabled"]:
+        yield None
+        return
+    io = {"read": 0, "written": 0}
+    t0 = time.perf_counter()
+    try:
+        yield io
+    finally:
+        _perf_record(store, op, time.perf_counter() - t0, io["read"], io["written"])
+
+@contextmanager
+def perf_rerun(page):
+    store = _perf_store(GAME.DATA_DIR)
+    if not store["enabled"]:
+        yield
+        return
+    run = {"ops": {}, "started": datetime.now(ZoneInfo("UTC")).isoformat(timespec="seconds"), "end": "done"}
+    store["local"].run = run
+    t0 = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        run["end"] = type(e).__name__
+        raise
+    finally:
+        store["local"].run = None
+        secs = time.perf_counter() - t0
+        try:
+            run["page"] = page()
+        except Exception:
+            run["page"] = "?"
+        _perf_record(store, f"rerun:{run['page']}", secs, 0, 0)
+        run["ms"] = secs * 1000
+        with store["lock"]:
+            store["reruns"] += 1
+            if run["ms"] >= PERF_SLOW_RERUN_MS:
+                store["slow"].append(run)
+
+def perf_timed(op: str):
+    def wrap(fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            with perf_span(op):
+                return fn(*args, **kwargs)
+        return timed
+    return wrap
+
+def _perf_quantile(hist: list, q: float) -> float:
+    total = sum(hist)
+    if not total:
+        return 0.0
+    seen = 0
+    for i, n in enumerate(hist):
+        seen += n
+        if seen >= q * total:
+            return PERF_BUCKETS[i] if i < len(PERF_BUCKETS) else float("inf")
+    return float("inf")
+
+def perf_summary() -> tuple[pd.DataFrame, list]:
+    store = _perf_store(GAME.DATA_DIR)
+    floor = int(time.time() // 60) - PERF_WINDOW_MINUTES
+    rows = []
+    with store["lock"]:
+        for op, slots in store["ops"].items():
+            live = [v for m, v in slots.items() if m > floor]
+            n = sum(v["n"] for v in live)
+            if not n:
+                continue
+            hist = [sum(col) for col in zip(*(v["hist"] for v in live))]
+            total = sum(v["total"] for v in live)
+            rows.append({
+                "Operation": op, "Calls": n, "Total ms": round(total * 1000, 1), "Mean ms": round(total * 1000 / n, 2),
+                "p50 ≤ ms": _perf_quantile(hist, 0.50) * 1000, "p95 ≤ ms": _perf_quantile(hist, 0.95) * 1000,
+                "Max ms": round(max(v["max"] for v in live) * 1000, 1),
+                "KB read": round(sum(v["read"] for v in live) / 1024, 1), "KB written": round(sum(v["written"] for v in live) / 1024, 1),
+            })
+        slow = list(store["slow"])
+    ops = pd.DataFrame(rows)
+    if not ops.empty:
+        ops = ops.sort_values("Total ms", ascending=False).reset_index(drop=True)
+    return ops, slow[::-1]
+
+def perf_reset():
+    store = _perf_store(GAME.DATA_DIR)
+    with store["lock"]:
+        store["ops"].clear()
+        store["slow"].clear()
+        store["reruns"] = 0
+
+# Ops metrics in Prometheus text format. Counters and histograms live in one
+# process-wide store labelled by game; data file sizes are read at scrape time.
+# METRICS_PORT serves /metrics on METRICS_HOST (default 127.0.0.1) and
+# METRICS_TEXTFILE rewrites a node-exporter textfile every
+# METRICS_TEXTFILE_SECONDS. Recording is a dict update under a lock.
+METRICS_PREFIX = "prediction_game_"
+METRICS = {
+    "predictions_submitted_total": ("counter", "Predictions saved from the Play page."),
+    "auth_attempts_total": ("counter", "User login and OTP reset attempts by stage (allowed, rejected, ok, failed)."),
+    "admin_logins_total": ("counter", "Admin password attempts by outcome."),
+    "otp_operations_total": ("counter", "OTP codes generated, revoked and validated."),
+    "leaderboard_recompute_seconds": ("histogram", "Time spent rebuilding the leaderboard (full recompute or event replay)."),
+    "cache_requests_total": ("counter", "In-process cache lookups by cache and result."),
+    "backups_total": ("counter", "Snapshots and backup uploads by outcome."),
+    "feed_requests_total": ("counter", "Spectator feed requests by resource and status."),
+    "data_file_bytes": ("gauge", "Size of each data file in bytes."),
+}
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+@cache_resource
+def _metrics_store() -> dict:
+    return {"lock": threading.Lock(), "counters": {}, "hists": {}, "files": {}}
+
+def _metrics_key(name: str, labels: dict) -> tuple:
+    return name, (("game", GAME.TENANT_ID or "default"),) + tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def metrics_inc(name: str, value: float = 1, **labels):
+    store = _metrics_store()
+    key = _metrics_key(name, labels)
+    with store["lock"]:
+        store["counters"][key] = store["counters"].get(key, 0) + value
+
+def metrics_observe(name: str, secs: float, **labels):
+    store = _metrics_store()
+    key = _metrics_key(name, labels)
+    with store["lock"]:
+        h = store["hists"].get(key)
+        if h is None:
+            h = store["hists"][key] = {"buckets": [0] * len(METRICS_BUCKETS), "sum": 0.0, "count": 0}
+        i = bisect.bisect_left(METRICS_BUCKETS, secs)
+        if i < len(METRICS_BUCKETS):
+            h["buckets"][i] += 1
+        h["sum"] += secs
+        h["count"] += 1
+
+def metrics_timed(name: str, **labels):
+    def wrap(fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics_observe(name, time.perf_counter() - t0, **labels)
+        return timed
+    return wrap
+
+def metrics_register_files(paths: list):
+    store = _metrics_store()
+    game = GAME.TENANT_ID or "default"
+    if game not in store["files"]:
+        with store["lock"]:
+            store["files"][game] = list(paths)
+
+def _metrics_labels(labels: tuple) -> str:
+    parts = ['{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in labels]
+    return "{" + ",".join(parts) + "}"
+
+def metrics_text() -> str:
+    store = _metrics_store()
+    with store["lock"]:
+        counters = dict(store["counters"])
+        hists = {k: {"buckets": list(h["buckets"]), "sum": h["sum"], "count": h["count"]} for k, h in store["hists"].items()}
+        files = {g: list(p) for g, p in store["files"].items()}
+    gauges = {}
+    for game, paths in files.items():
+        for path in paths:
+            try:
+                gauges[("data_file_bytes", (("game", game), ("file", os.path.basename(path))))] = os.path.getsize(path)
+            except OSError:
+                pass
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        full = METRICS_PREFIX + name
+        lines.append(f"# HELP {full} {help_text}")
+        lines.append(f"# TYPE {full} {kind}")
+        if kind == "histogram":
+            for (n, labels), h in sorted(hists.items()):
+                if n != name:
+                    continue
+                seen = 0
+                for le, c in zip(METRICS_BUCKETS, h["buckets"]):
+                    seen += c
+                    lines.append(f"{full}_bucket{_metrics_labels(labels + (('le', le),))} {seen}")
+                lines.append(f"{full}_bucket{_metrics_labels(labels + (('le', '+Inf'),))} {h['count']}")
+                lines.append(f"{full}_sum{_metrics_labels(labels)} {h['sum']:.6f}")
+                lines.append(f"{full}_count{_metrics_labels(labels)} {h['count']}")
+        else:
+            for (n, labels), v in sorted((counters if kind == "counter" else gauges).items()):
+                if n == name:
+                    lines.append(f"{full}{_metrics_labels(labels)} {v:g}")
+    return "\n".join(lines) + "\n"
+
+def _metrics_write_textfile(path: str):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(metrics_text())
+    os.replace(tmp, path)
+
+def _metrics_textfile_loop(state: dict, path: str, every: float):
+    while True:
+        try:
+            _metrics_write_textfile(path)
+            state["last_error"] = None
+        except Exception as e:
+            state["last_error"] = str(e)
+        time.sleep(every)
+
+def _metrics_http_handler():
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if urlparse(self.path).path not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = metrics_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+    return MetricsHandler
+
+@cache_resource
+def _metrics_exporter() -> dict:
+    state = {"address": None, "textfile": None, "last_error": None}
+    port = int(secret("METRICS_PORT", 0) or 0)
+    if port:
+        from http.server import ThreadingHTTPServer
+        try:
+            server = ThreadingHTTPServer((str(secret("METRICS_HOST", "127.0.0.1")), port), _metrics_http_handler())
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+            state["address"] = "{}:{}".format(*server.server_address[:2])
+        except OSError as e:
+            state["last_error"] = str(e)
+    path = str(secret("METRICS_TEXTFILE", "") or "")
+    if path:
+        state["textfile"] = path
+        every = max(1.0, float(secret("METRICS_TEXTFILE_SECONDS", 15)))
+        threading.Thread(target=_metrics_textfile_loop, args=(state, path, every), daemon=True, name="metrics-textfile").start()
+    return state
@@ -0,0 +1,776 @@
+"""Scoring, the event-sourced leaderboard, compaction and leaderboard history."""
+import bisect, json, os, re, secrets, threading, time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from .game import GAME, cache_data, tenant_store
+from .instrument import metrics_inc, metrics_observe, metrics_timed, perf_timed
+from .settings import MAX_ACTIVE_TENANTS, secret
+from .storage import (_append_rows, _file_sig, _read_json, _write_json_atomic, load_csv, load_overrides,
+                      normalize_digits, save_csv, to_utc_series)
+
+def split_match_name(match_name: str) -> tuple[str, str]:
+    parts = re.split(r"\s*vs\s*", str(match_name or ""), flags=re.IGNORECASE)
+    if len(parts) >= 2:
+        return parts[0].strip(), parts[1].strip()
+    return (match_name or "").strip(), ""
+
+def get_real_winner(match_row: pd.Series) -> str:
+    rw = str(match_row.get("RealWinner") or "").strip()
+    if rw:
+        return "Draw" if _norm_draw(rw) else rw
+    score = _parse_score(str(match_row.get("Result") or ""))
+    if not score:
+        return "Draw"
+    a, b = score
+    if a == b:
+        return "Draw"
+    team_a, team_b = split_match_name(match_row.get("Match") or "")
+    return team_a if a > b else team_b
+
+def _load_all_matches_for_scoring() -> pd.DataFrame:
+    cols_open = ["Match","Kickoff","Result","HomeLogo","AwayLogo","BigGame","RealWinner","Occasion","OccasionLogo","Round"]
+    cols_hist = cols_open + ["CompletedAt"]
+    open_m = load_csv(GAME.MATCHES_FILE, cols_open)
+    hist_m = load_csv(GAME.MATCH_HISTORY_FILE, cols_hist)
+    if not hist_m.empty:
+        hist_m = hist_m.drop(columns=["CompletedAt"], errors="ignore")
+    if open_m.empty and hist_m.empty:
+        return pd.DataFrame(columns=cols_open)
+    allm = pd.concat([open_m, hist_m], ignore_index=True)
+    for c in cols_open:
+        if c not in allm.columns:
+            allm[c] = None
+    return allm[cols_open]
+
+def _parse_score(s: str) -> tuple[int, int] | None:
+    s = normalize_digits(str(s or "")).strip()
+    m = re.fullmatch(r"(\d{1,2})-(\d{1,2})", s)
+    if not m:
+        return None
+    a = int(m.group(1))
+    b = int(m.group(2))
+    if not (0 <= a <= 20 and 0 <= b <= 20):
+        return None
+    return (a, b)
+
+
+def _norm_draw(txt: str) -> bool:
+    t = str(txt or "").strip().casefold()
+    return t in {"draw", "تعادل", "التعادل"}
+
+
+def _winner_from_score(match_name: str, score: str) -> str:
+    team_a, team_b = split_match_name(match_name)
+    parsed = _parse_score(score)
+    if not parsed:
+        return "Draw"
+    a, b = parsed
+    if a == b:
+        return "Draw"
+    return team_a if a > b else team_b
+
+
+def points_for_prediction(match_row: pd.Series, pred: str, big_game: bool, chosen_winner: str) -> tuple[int, int, int]:
+    match_name = str(match_row.get("Match") or "")
+    real_score = match_row.get("Result")
+    if not isinstance(real_score, str) or "-" not in real_score:
+        return (0, 0, 0)
+
+    real_parsed = _parse_score(real_score)
+    pred_parsed = _parse_score(pred)
+    if not real_parsed or not pred_parsed:
+        return (0, 0, 0)
+
+    if real_parsed == pred_parsed:
+        return (6 if big_game else 3, 1, 0)
+
+    real_w = _winner_from_score(match_name, real_score)
+    pred_w = _winner_from_score(match_name, f"{pred_parsed[0]}-{pred_parsed[1]}")
+
+    cw = str(chosen_winner or "").strip()
+    if _norm_draw(cw):
+        cw = "Draw"
+
+    if real_w == "Draw" and (pred_w == "Draw" or cw == "Draw"):
+        return (2 if big_game else 1, 0, 1)
+
+    if real_w != "Draw":
+        if pred_w == real_w:
+            return (2 if big_game else 1, 0, 1)
+        if cw and cw != "Draw" and cw == real_w:
+            return (2 if big_game else 1, 0, 1)
+
+    return (0, 0, 0)
+
+
+def score_predictions(predictions_df: pd.DataFrame, matches_full: pd.DataFrame | None = None,
+                      compacted: bool = False) -> pd.DataFrame:
+    cols = ["User", "Match", "Prediction", "Winner", "SubmittedAt", "Result", "BigGame", "Round", "Occasion",
+            "Points", "Exact", "Outcome", "Scored"]
+    if predictions_df.empty:
+        return pd.DataFrame(columns=cols)
+    if matches_full is None:
+        matches_full = _load_all_matches_for_scoring()
+
+    if compacted:
+        latest = predictions_df
+    else:
+        preds = predictions_df.copy()
+        preds["SubmittedAt"] = pd.to_datetime(preds["SubmittedAt"], errors="coerce")
+        preds = preds.sort_values(["User", "Match", "SubmittedAt"])
+        latest = preds.drop_duplicates(subset=["User", "Match"], keep="last")
+
+    latest = latest.merge(
+        matches_full[["Match", "Result", "BigGame", "Round", "Occasion"]].drop_duplicates("Match", keep="first"),
+        on="Match",
+        how="left",
+        suffixes=("", "_m"),
+    ).reset_index(drop=True)
+    latest["Scored"] = latest["Result"].astype(str).str.contains(r"\d{1,2}-\d{1,2}", regex=True, na=False)
+
+    pts, exact, outcome = [0] * len(latest), [0] * len(latest), [0] * len(latest)
+    for i, p in enumerate(latest.to_dict("records")):
+        if not p["Scored"]:
+            continue
+        pts[i], exact[i], outcome[i] = points_for_prediction(
+            p, str(p.get("Prediction") or ""), bool(p.get("BigGame", False)), str(p.get("Winner") or "")
+        )
+    latest["Points"] = pts
+    latest["Exact"] = exact
+    latest["Outcome"] = outcome
+    return latest[cols]
+
+
+@perf_timed("recompute_leaderboard")
+@metrics_timed("leaderboard_recompute_seconds", kind="full")
+def recompute_leaderboard(predictions_df: pd.DataFrame) -> pd.DataFrame:
+    cols = ["User", "Points", "Predictions", "Exact", "Outcome"]
+    empty = pd.DataFrame(columns=cols)
+
+    if predictions_df.empty:
+        save_csv(empty, GAME.LEADERBOARD_FILE)
+        return empty
+
+    matches_full = _load_all_matches_for_scoring()
+    if matches_full.empty:
+        save_csv(empty, GAME.LEADERBOARD_FILE)
+        return empty
+
+    latest = score_predictions(predictions_df, matches_full)
+    pred_counts = (
+        latest.groupby("User", as_index=False)
+        .agg(Predictions=("Match", "nunique"))
+    )
+
+    scored = latest[latest["Scored"]]
+    if scored.empty:
+        lb = pred_counts.copy()
+        lb["Points"] = 0
+        lb["Exact"] = 0
+        lb["Outcome"] = 0
+        lb = lb[cols].sort_values(["Points", "Predictions", "Exact"], ascending=[False, True, False])
+        save_csv(lb, GAME.LEADERBOARD_FILE)
+        return lb
+
+    sums = (
+        scored.groupby("User", as_index=False)
+        .agg(Points=("Points", "sum"), Exact=("Exact", "sum"), Outcome=("Outcome", "sum"))
+    )
+
+    lb = pred_counts.merge(sums, on="User", how="left")
+    lb["Points"] = pd.to_numeric(lb["Points"], errors="coerce").fillna(0).astype(int)
+    lb["Exact"] = pd.to_numeric(lb["Exact"], errors="coerce").fillna(0).astype(int)
+    lb["Outcome"] = pd.to_numeric(lb["Outcome"], errors="coerce").fillna(0).astype(int)
+
+    lb = lb[cols].sort_values(["Points", "Predictions", "Exact"], ascending=[False, True, False]).reset_index(drop=True)
+    save_csv(lb, GAME.LEADERBOARD_FILE)
+    return lb
+
+
+# Event log: prediction changes, match results and override edits are
+# appended to events.jsonl, and the season leaderboard is a view materialized
+# from that log. The view is checkpointed with the log offset it covers, so a
+# restart (or an evicted cache) replays only the tail. Writing a checkpoint
+# also starts a new log (a single "checkpoint" line with a fresh log_id), so
+# the log never holds more than LB_EVENT_CHECKPOINT_EVERY events; another
+# process that finds the log replaced picks the checkpoint up instead of
+# re-reading the CSVs. Writes that bypass the log (restore, reset, hand
+# edits) are noticed by file signature and rebase the view from the CSVs.
+LB_EVENT_CHECKPOINT_EVERY = 500
+LB_SCORE_RE = re.compile(r"\d{1,2}-\d{1,2}")
+
+def _lb_unload(store: dict):
+    store["state"] = None
+    store.pop("ranked", None)
+
+@tenant_store(_lb_unload)
+def _lb_store(data_dir: str) -> dict:
+    return {"lock": threading.RLock(), "state": None}
+
+def _sig_json(path: str):
+    sig = _file_sig(path)
+    return list(sig) if sig else None
+
+def _new_lb_state() -> dict:
+    return {
+        "log_id": None, "offset": 0, "seq": 0, "since_checkpoint": 0,
+        "preds_sig": None, "match_sigs": None, "overrides_sig": None,
+        "preds": {}, "matches": {}, "overrides": {}, "by_match": {}, "totals": {},
+    }
+
+def _lb_match_projection() -> dict:
+    allm = _load_all_matches_for_scoring().drop_duplicates("Match", keep="first")
+    return {
+        str(r["Match"]): [None if pd.isna(r["Result"]) else str(r["Result"]), bool(r["BigGame"])]
+        for r in allm.to_dict("records")
+    }
+
+def _lb_override_rows() -> list:
+    o = load_overrides().astype(object)
+    return o.where(o.notna(), None).to_dict("records")
+
+def _lb_score(proj, match: str, pred: str, winner: str) -> tuple[int, int, int]:
+    if proj is None or not LB_SCORE_RE.search(str(proj[0])):
+        return (0, 0, 0)
+    return points_for_prediction({"Match": match, "Result": proj[0]}, pred, proj[1], winner)
+
+def _lb_add(state: dict, row: list):
+    key = f"{row[0]}\x1f{row[1]}"
+    state["preds"][key] = row
+    state["by_match"].setdefault(row[1], set()).add(key)
+    t = state["totals"].setdefault(row[0], [0, 0, 0, 0])
+    t[0] += row[4]; t[1] += 1; t[2] += row[5]; t[3] += row[6]
+
+def _lb_drop(state: dict, key: str):
+    row = state["preds"].pop(key, None)
+    if row is None:
+        return
+    state["by_match"].get(row[1], set()).discard(key)
+    t = state["totals"][row[0]]
+    t[0] -= row[4]; t[1] -= 1; t[2] -= row[5]; t[3] -= row[6]
+    if t[1] <= 0:
+        del state["totals"][row[0]]
+
+def _lb_set_match(state: dict, match: str, proj):
+    if proj is None:
+        state["matches"].pop(match, None)
+    else:
+        state["matches"][match] = proj
+    for key in list(state["by_match"].get(match, ())):
+        u, m, pred, winner = state["preds"][key][:4]
+        _lb_drop(state, key)
+        _lb_add(state, [u, m, pred, winner, *_lb_score(proj, m, pred, winner)])
+
+def _lb_seed(state: dict):
+    matches = _lb_match_projection()
+    compacted = predictions_compacted()
+    preds = load_csv(GAME.PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
+    scored = score_predictions(preds, _load_all_matches_for_scoring(), compacted=compacted)
+    keep = (state["log_id"], state["seq"])
+    state.clear()
+    state.update(_new_lb_state(), log_id=keep[0], seq=keep[1])
+    state["matches"] = matches
+    for r in scored.to_dict("records"):
+        _lb_add(state, [str(r["User"]), str(r["Match"]), str(r.get("Prediction") or ""), str(r.get("Winner") or ""),
+                        int(r["Points"]), int(r["Exact"]), int(r["Outcome"])])
+    state["overrides"] = {str(r["User"]): r for r in _lb_override_rows()}
+    state["preds_sig"] = _sig_json(GAME.PREDICTIONS_FILE)
+    state["match_sigs"] = [_sig_json(GAME.MATCHES_FILE), _sig_json(GAME.MATCH_HISTORY_FILE)]
+    state["overrides_sig"] = _sig_json(GAME.LEADERBOARD_OVERRIDES_FILE)
+
+def _lb_apply(state: dict, ev: dict):
+    kind = ev.get("type")
+    if kind == "predictions":
+        for u, m, pred, winner in ev["rows"]:
+            _lb_drop(state, f"{u}\x1f{m}")
+            if pred is not None:
+                _lb_add(state, [u, m, pred, winner, *_lb_score(state["matches"].get(m), m, pred, winner)])
+        state["preds_sig"] = ev.get("preds_sig")
+    elif kind == "match":
+        _lb_set_match(state, ev["match"], ev.get("proj"))
+        state["match_sigs"] = ev.get("sigs")
+    elif kind == "compact":
+        state["preds_sig"] = ev.get("preds_sig")
+    elif kind == "overrides":
+        state["overrides"] = {str(r["User"]): r for r in ev["rows"]}
+        state["overrides_sig"] = ev.get("sig")
+    state["seq"] = ev.get("seq", state["seq"])
+
+def _lb_append(state: dict, ev: dict):
+    ev = {"seq": state["seq"] + 1, "at": datetime.now(ZoneInfo("UTC")).isoformat(), **ev}
+    line = (json.dumps(ev, ensure_ascii=False) + "\n").encode("utf-8")
+    with open(GAME.EVENTS_FILE, "ab") as f:
+        f.write(line)
+    _lb_apply(state, ev)
+    state["offset"] += len(line)
+    state["since_checkpoint"] += 1
+
+def _lb_rebase(state: dict, reason: str):
+    state["log_id"] = _lb_log_id()
+    if state["log_id"] is None:
+        state["log_id"] = secrets.token_hex(8)
+        with open(GAME.EVENTS_FILE, "wb"):
+            pass
+    _lb_seed(state)
+    state["offset"] = os.path.getsize(GAME.EVENTS_FILE)
+    _lb_append(state, {"type": "rebase", "log_id": state["log_id"], "reason": reason})
+    _lb_write_checkpoint(state)
+
+def _lb_write_checkpoint(state: dict):
+    # The checkpoint names the new log before the log is swapped in: a crash
+    # in between leaves a checkpoint that matches no log, which only costs a
+    # rebase from the CSVs.
+    log_id = secrets.token_hex(8)
+    head = (json.dumps({"seq": state["seq"], "at": datetime.now(ZoneInfo("UTC")).isoformat(),
+                        "type": "checkpoint", "log_id": log_id}) + "\n").encode("utf-8")
+    data = {k: state[k] for k in ("seq", "preds_sig", "match_sigs", "overrides_sig", "matches", "overrides")}
+    data.update(log_id=log_id, offset=len(head), preds=list(state["preds"].values()))
+    tmp = f"{GAME.LEADERBOARD_CHECKPOINT_FILE}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"), default=str)
+    os.replace(tmp, GAME.LEADERBOARD_CHECKPOINT_FILE)
+    tmp = f"{GAME.EVENTS_FILE}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(head)
+    os.replace(tmp, GAME.EVENTS_FILE)
+    state["log_id"], state["offset"], state["since_checkpoint"] = log_id, len(head), 0
+
+def _lb_log_id() -> str | None:
+    try:
+        with open(GAME.EVENTS_FILE, "rb") as f:
+            return json.loads(f.readline()).get("log_id")
+    except Exception:
+        return None
+
+def _lb_load_checkpoint() -> dict | None:
+    data = _read_json(GAME.LEADERBOARD_CHECKPOINT_FILE, None)
+    if not data or data.get("log_id") != _lb_log_id():
+        return None
+    state = _new_lb_state()
+    for k in ("log_id", "offset", "seq", "preds_sig", "match_sigs", "overrides_sig", "matches", "overrides"):
+        state[k] = data.get(k, state[k])
+    for row in data.get("preds", []):
+        _lb_add(state, row)
+    return state
+
+def _lb_replay(state: dict) -> int:
+    applied = 0
+    with open(GAME.EVENTS_FILE, "rb") as f:
+        try:
+            head_id = json.loads(f.readline()).get("log_id")
+        except Exception:
+            head_id = None
+        if head_id != state["log_id"]:
+            return 0  # rotated since _lb_sync looked; its signature checks catch up
+        f.seek(state["offset"])
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                ev = json.loads(line)
+            except ValueError:
+                # Offset no longer on a line boundary (another process
+                # appended between our check and our write): start over.
+                _lb_rebase(state, "log offset lost")
+                return applied + 1
+            if ev.get("type") == "rebase":
+                # Another process reseeded from the CSVs; do the same, but
+                # don't announce it again or the two would keep answering
+                # each other's rebases.
+                offset = state["offset"]
+                _lb_seed(state)
+                state["offset"] = offset
+            _lb_apply(state, ev)
+            state["offset"] += len(line)
+            state["since_checkpoint"] += 1
+            applied += 1
+    return applied
+
+def _lb_sync(state: dict) -> int:
+    applied = 0
+    size = os.path.getsize(GAME.EVENTS_FILE) if os.path.exists(GAME.EVENTS_FILE) else -1
+    if state["log_id"] is None or size < state["offset"] or _lb_log_id() != state["log_id"]:
+        fresh = _lb_load_checkpoint()
+        if fresh is None:
+            _lb_rebase(state, "log missing or replaced")
+            return 1
+        state.clear()
+        state.update(fresh)
+        applied += 1
+        size = os.path.getsize(GAME.EVENTS_FILE)
+    if size > state["offset"]:
+        applied += _lb_replay(state)
+    if _sig_json(GAME.PREDICTIONS_FILE) != state["preds_sig"]:
+        _lb_rebase(state, "predictions changed outside the log")
+        return applied + 1
+
+    match_sigs = [_sig_json(GAME.MATCHES_FILE), _sig_json(GAME.MATCH_HISTORY_FILE)]
+    if match_sigs != state["match_sigs"]:
+        proj = _lb_match_projection()
+        for m in sorted(set(proj) | set(state["matches"])):
+            if proj.get(m) != state["matches"].get(m):
+                _lb_append(state, {"type": "match", "match": m, "proj": proj.get(m), "sigs": match_sigs})
+                applied += 1
+        state["match_sigs"] = match_sigs
+
+    overrides_sig = _sig_json(GAME.LEADERBOARD_OVERRIDES_FILE)
+    if overrides_sig != state["overrides_sig"]:
+        rows = _lb_override_rows()
+        _lb_append(state, {"type": "overrides", "rows": rows, "sig": overrides_sig})
+        applied += 1
+    return applied
+
+def _lb_frame(state: dict, with_overrides: bool) -> pd.DataFrame:
+    cols = ["User", "Points", "Predictions", "Exact", "Outcome"]
+    if not state["preds"] or not state["matches"]:
+        return pd.DataFrame(columns=cols)
+    lb = pd.DataFrame([[u, *t] for u, t in sorted(state["totals"].items())],
+                      columns=["User", "Points", "Predictions", "Exact", "Outcome"])
+    lb = lb.sort_values(["Points", "Predictions", "Exact"], ascending=[False, True, False]).reset_index(drop=True)
+    if with_overrides and state["overrides"]:
+        lb = _apply_overrides_to_lb(lb, pd.DataFrame(list(state["overrides"].values()), columns=["User", "Predictions", "Points"]))
+    return lb
+
+def _lb_synced(store: dict) -> dict:
+    # Caller holds store["lock"].
+    t0 = time.perf_counter()
+    if store["state"] is None:
+        store["state"] = _lb_load_checkpoint() or _new_lb_state()
+    state = store["state"]
+    applied = _lb_sync(state)
+    if state["since_checkpoint"] >= LB_EVENT_CHECKPOINT_EVERY:
+        _lb_write_checkpoint(state)
+    if applied:
+        save_csv(_lb_frame(state, False), GAME.LEADERBOARD_FILE)
+        metrics_observe("leaderboard_recompute_seconds", time.perf_counter() - t0, kind="replay")
+    metrics_inc("cache_requests_total", cache="leaderboard", result="miss" if applied else "hit")
+    return state
+
+@perf_timed("materialized_leaderboard")
+def materialized_leaderboard(with_overrides: bool = False) -> pd.DataFrame:
+    store = _lb_store(GAME.DATA_DIR)
+    with store["lock"]:
+        return _lb_frame(_lb_synced(store), with_overrides)
+
+def effective_prediction_rows(predictions_df: pd.DataFrame, keys) -> list:
+    keys = {(str(u), str(m)) for u, m in keys}
+    latest = {}
+    if not predictions_df.empty:
+        p = predictions_df.assign(_u=predictions_df["User"].astype(str), _m=predictions_df["Match"].astype(str))
+        p = p[[k in keys for k in zip(p["_u"], p["_m"])]]
+        p = p.assign(_t=pd.to_datetime(p["SubmittedAt"], errors="coerce")).sort_values(["_u", "_m", "_t"])
+        for r in p.drop_duplicates(["_u", "_m"], keep="last").to_dict("records"):
+            latest[(r["_u"], r["_m"])] = [r["_u"], r["_m"], str(r.get("Prediction") or ""), str(r.get("Winner") or "")]
+    return [latest.get(k, [k[0], k[1], None, None]) for k in sorted(keys)]
+
+def save_predictions(predictions_df: pd.DataFrame, changed_rows: list):
+    store = _lb_store(GAME.DATA_DIR)
+    with store["lock"]:
+        state = store["state"]
+        if state is not None:
+            _lb_sync(state)  # take in other writers' events first, so this one can go through the log
+        in_sync = (
+            state is not None and os.path.exists(GAME.EVENTS_FILE)
+            and os.path.getsize(GAME.EVENTS_FILE) == state["offset"]
+            and _sig_json(GAME.PREDICTIONS_FILE) == state["preds_sig"]
+        )
+        still_compact = in_sync and predictions_compacted() and all(
+            r[2] is None or f"{r[0]}\x1f{r[1]}" not in state["preds"] for r in changed_rows
+        )
+        save_csv(predictions_df, GAME.PREDICTIONS_FILE)
+        if in_sync:
+            _lb_append(state, {"type": "predictions", "rows": changed_rows, "preds_sig": _sig_json(GAME.PREDICTIONS_FILE)})
+        if still_compact:
+            _write_json_atomic(GAME.PREDICTIONS_COMPACT_MARK, {"sig": _sig_json(GAME.PREDICTIONS_FILE)})
+
+def append_prediction(row: dict):
+    # Play-page submits re-read predictions.csv under the store lock instead of
+    # rewriting the frame loaded at the top of the rerun, so sessions posting
+    # at kickoff don't overwrite each other's rows.
+    with _lb_store(GAME.DATA_DIR)["lock"]:
+        preds = load_csv(GAME.PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
+        preds = pd.concat([preds, pd.DataFrame([row])], ignore_index=True)
+        save_predictions(preds, [[str(row["User"]), str(row["Match"]), str(row["Prediction"]), str(row["Winner"] or "")]])
+    metrics_inc("predictions_submitted_total")
+    return preds
+
+# Compaction: predictions.csv keeps only the effective (latest) submission
+# per (User, Match); superseded rows move to predictions_audit.csv. While the
+# marker file matches predictions.csv, readers skip the sort + dedup.
+PREDICTION_AUDIT_COLS = ["User", "Match", "Prediction", "Winner", "SubmittedAt", "SupersededAt"]
+
+def predictions_compacted() -> bool:
+    sig = _sig_json(GAME.PREDICTIONS_FILE)
+    return sig is not None and _read_json(GAME.PREDICTIONS_COMPACT_MARK, {}).get("sig") == sig
+
+def compact_predictions() -> int:
+    store = _lb_store(GAME.DATA_DIR)
+    with store["lock"]:
+        if predictions_compacted():
+            return 0
+        materialized_leaderboard()
+        preds = load_csv(GAME.PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
+        order = preds.assign(_t=pd.to_datetime(preds["SubmittedAt"], errors="coerce")).sort_values(["User", "Match", "_t"])
+        dup = order.duplicated(subset=["User", "Match"], keep="last")
+        superseded = preds.loc[dup[dup].index]
+        if not superseded.empty:
+            _append_rows(GAME.PREDICTIONS_AUDIT_FILE, superseded.assign(SupersededAt=datetime.now(ZoneInfo("UTC")).isoformat()), PREDICTION_AUDIT_COLS)
+            tmp = GAME.PREDICTIONS_FILE + ".tmp"
+            preds.drop(index=superseded.index).to_csv(tmp, index=False)
+            os.replace(tmp, GAME.PREDICTIONS_FILE)
+            _lb_append(store["state"], {"type": "compact", "removed": int(len(superseded)), "preds_sig": _sig_json(GAME.PREDICTIONS_FILE)})
+        _write_json_atomic(GAME.PREDICTIONS_COMPACT_MARK, {"sig": _sig_json(GAME.PREDICTIONS_FILE)})
+        return int(len(superseded))
+
+# Points cube: points/predictions/exact/outcome per (User, Round, Occasion),
+# built in one grouped pass over the scored predictions and cached per data
+# file signature. Any round/occasion slice is a filter + sum over the cube.
+CUBE_KEYS = ["User", "Round", "Occasion"]
+
+@cache_data(max_entries=8 * MAX_ACTIVE_TENANTS)
+def _points_cube_cached(data_key: str, sigs) -> pd.DataFrame:
+    compacted = predictions_compacted()
+    preds = load_csv(GAME.PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
+    scored = score_predictions(preds, compacted=compacted)
+    if scored.empty:
+        return pd.DataFrame(columns=CUBE_KEYS + ["Points", "Predictions", "Exact", "Outcome"])
+    for c in ["Round", "Occasion"]:
+        scored[c] = scored[c].where(scored[c].notna(), "").astype(str).str.strip()
+    return (scored.groupby(CUBE_KEYS, as_index=False)
+            .agg(Points=("Points", "sum"), Predictions=("Match", "count"),
+                 Exact=("Exact", "sum"), Outcome=("Outcome", "sum")))
+
+def points_cube() -> pd.DataFrame:
+    sigs = tuple(_file_sig(f) for f in (GAME.PREDICTIONS_FILE, GAME.MATCHES_FILE, GAME.MATCH_HISTORY_FILE))
+    return _points_cube_cached(os.path.abspath(GAME.DATA_DIR), sigs)
+
+def leaderboard_slice(rounds=None, occasions=None, cube: pd.DataFrame | None = None) -> pd.DataFrame:
+    cube = points_cube() if cube is None else cube
+    if rounds:
+        cube = cube[cube["Round"].isin([str(r) for r in rounds])]
+    if occasions:
+        cube = cube[cube["Occasion"].isin([str(o) for o in occasions])]
+    lb = (cube.groupby("User", as_index=False)
+          .agg(Points=("Points", "sum"), Predictions=("Predictions", "sum"),
+               Exact=("Exact", "sum"), Outcome=("Outcome", "sum")))
+    return lb.sort_values(["Points", "Predictions", "Exact"], ascending=[False, True, False]).reset_index(drop=True)
+
+
+# Leaderboard history: one row of point deltas per scored prediction of every
+# completed match, keyed by the match's CompletedAt and Round. Deltas are
+# appended when a result is posted; "as of" standings are per-user cumulative
+# sums cut at a timestamp, so past views never rescore the season.
+LB_HISTORY_COLS = ["CompletedAt", "Round", "Match", "User", "Points", "Exact", "Outcome"]
+
+def _completed_match_deltas(scored: pd.DataFrame, hist: pd.DataFrame) -> pd.DataFrame:
+    done = hist[["Match", "Round", "CompletedAt"]].drop_duplicates("Match", keep="last")
+    deltas = scored.loc[scored["Scored"], ["Match", "User", "Points", "Exact", "Outcome"]]
+    return deltas.merge(done, on="Match", how="inner")[LB_HISTORY_COLS]
+
+def rebuild_leaderboard_history(predictions_df: pd.DataFrame | None = None) -> pd.DataFrame:
+    compacted = False
+    if predictions_df is None:
+        compacted = predictions_compacted()
+        predictions_df = load_csv(GAME.PREDICTIONS_FILE, ["User", "Match", "Prediction", "Winner", "SubmittedAt"])
+    hist = load_csv(GAME.MATCH_HISTORY_FILE, ["Match", "Round", "CompletedAt"])
+    deltas = _completed_match_deltas(score_predictions(predictions_df, compacted=compacted), hist)
+    save_csv(deltas, GAME.LEADERBOARD_HISTORY_FILE)
+    return deltas
+
+def record_leaderboard_snapshot(match_name: str, predictions_df: pd.DataFrame):
+    hist = load_csv(GAME.MATCH_HISTORY_FILE, ["Match", "Round", "CompletedAt"])
+    hist = hist[hist["Match"].astype(str) == str(match_name)]
+    p = predictions_df[predictions_df["Match"].astype(str) == str(match_name)]
+    deltas = _completed_match_deltas(score_predictions(p), hist)
+    if os.path.exists(GAME.LEADERBOARD_HISTORY_FILE) and os.path.getsize(GAME.LEADERBOARD_HISTORY_FILE) > 0:
+        deltas.to_csv(GAME.LEADERBOARD_HISTORY_FILE, mode="a", header=False, index=False)
+    else:
+        rebuild_leaderboard_history()
+
+def competition_ranks(lb: pd.DataFrame, by: str | None = None) -> pd.Series:
+    """Ranks of a leaderboard already in leaderboard order, as RankedBoard gives them.
+
+    Rows tied on Points, Predictions and Exact share the first one's rank
+    (1, 2, 2, 4). With by, ranks restart at 1 for each group of that column.
+    """
+    keys = lb[["Points", "Predictions", "Exact"] + ([by] if by else [])]
+    first = keys.ne(keys.shift()).any(axis=1)
+    pos = (lb.groupby(by).cumcount() if by else pd.Series(range(len(lb)), index=lb.index)) + 1
+    return pos.where(first).ffill().astype(int)
+
+def _rank_standings(lb: pd.DataFrame) -> pd.DataFrame:
+    lb = lb.sort_values(["Points", "Predictions", "Exact"], ascending=[False, True, False]).reset_index(drop=True)
+    lb["Rank"] = competition_ranks(lb)
+    return lb
+
+def _lb_history_unload(store: dict):
+    store.update(sig=None, cum=None, snaps=None, round_end=None)
+
+@tenant_store(_lb_history_unload)
+def _lb_history_store(data_dir: str) -> dict:
+    return {"lock": threading.Lock(), "sig": None, "cum": None, "snaps": None, "round_end": None}
+
+def _load_history_cum(path: str) -> pd.DataFrame:
+    d = load_csv(path, LB_HISTORY_COLS)
+    d["CompletedAt"] = to_utc_series(d["CompletedAt"])
+    d = d.dropna(subset=["CompletedAt"])
+    for c in ["Points", "Exact", "Outcome"]:
+        d[c] = pd.to_numeric(d[c], errors="coerce").fillna(0).astype(int)
+    d["Predictions"] = 1
+    d = d.sort_values(["CompletedAt", "Match"], kind="stable").reset_index(drop=True)
+    d[["Points", "Predictions", "Exact", "Outcome"]] = d.groupby("User")[["Points", "Predictions", "Exact", "Outcome"]].cumsum()
+    return d
+
+def _lb_history() -> dict:
+    """The game's cumulative history store, reloaded when the file changes.
+
+    Its "cum" frame (one row per scored prediction) is shared by every
+    caller and must not be modified; "snaps" and "round_end" are derived
+    from it once per load.
+    """
+    if not os.path.exists(GAME.LEADERBOARD_HISTORY_FILE) and os.path.exists(GAME.MATCH_HISTORY_FILE):
+        rebuild_leaderboard_history()
+    path = GAME.LEADERBOARD_HISTORY_FILE
+    sig = _file_sig(path)
+    store = _lb_history_store(GAME.DATA_DIR)
+    with store["lock"]:
+        if store["cum"] is None or store["sig"] != sig:
+            cum = _load_history_cum(path)
+            snaps = cum[["CompletedAt", "Round", "Match"]].drop_duplicates("Match", keep="last").reset_index(drop=True)
+            round_end = cum.groupby(cum["Round"].astype(str))["CompletedAt"].max()
+            store.update(sig=sig, cum=cum, snaps=snaps, round_end=round_end)
+        return dict(store)
+
+def leaderboard_history() -> pd.DataFrame:
+    return _lb_history()["cum"].copy()
+
+def leaderboard_snapshots() -> pd.DataFrame:
+    return _lb_history()["snaps"].copy()
+
+@cache_data(max_entries=64 * MAX_ACTIVE_TENANTS)
+def _leaderboard_as_of_cached(path: str, sig, as_of) -> pd.DataFrame:
+    cum = _lb_history()["cum"]
+    if as_of is not None:
+        cum = cum.iloc[:cum["CompletedAt"].searchsorted(as_of, side="right")]
+    lb = cum.drop_duplicates("User", keep="last")[["User", "Points", "Predictions", "Exact", "Outcome"]]
+    return _rank_standings(lb)
+
+def leaderboard_as_of(as_of=None, round_name=None) -> pd.DataFrame:
+    hist = _lb_history()
+    if round_name is not None:
+        as_of = hist["round_end"].get(str(round_name))
+    if as_of is not None:
+        as_of = pd.Timestamp(as_of)
+        as_of = as_of.tz_localize("UTC") if as_of.tzinfo is None else as_of.tz_convert("UTC")
+    return _leaderboard_as_of_cached(GAME.LEADERBOARD_HISTORY_FILE, hist["sig"], as_of)
+
+def rank_movement(members=None) -> dict:
+    snaps = _lb_history()["snaps"]
+    if len(snaps) < 2:
+        return {}
+
+    def _ranks(as_of):
+        lb = leaderboard_as_of(as_of)
+        if members is not None:
+            lb = _rank_standings(lb[lb["User"].isin(members)].drop(columns=["Rank"]))
+        return lb.set_index("User")["Rank"]
+
+    now_rank = _ranks(snaps["CompletedAt"].iloc[-1])
+    prev_rank = _ranks(snaps["CompletedAt"].iloc[-2])
+    moved = (prev_rank.reindex(now_rank.index) - now_rank).dropna()
+    return {u: int(v) for u, v in moved.items()}
+
+def movement_arrow(delta) -> str:
+    if delta is None or pd.isna(delta):
+        return ""
+    delta = int(delta)
+    return f"▲{delta}" if delta > 0 else f"▼{-delta}" if delta < 0 else "–"
+
+def rank_medal(rank) -> str:
+    return {1: "🥇", 2: "🥈", 3: "🥉"}.get(int(rank), "")
+
+
+def _apply_overrides_to_lb(lb: pd.DataFrame, o: pd.DataFrame | None = None) -> pd.DataFrame:
+    if lb.empty:
+        return lb
+    o = load_overrides() if o is None else o
+    if o.empty:
+        return lb
+    out = lb.merge(o, on="User", how="left", suffixes=("", "_ovr"))
+    if "Predictions_ovr" in out.columns:
+        out["Predictions"] = out["Predictions_ovr"].where(pd.notna(out["Predictions_ovr"]), out["Predictions"])
+    if "Points_ovr" in out.columns:
+        out["Points"] = out["Points_ovr"].where(pd.notna(out["Points_ovr"]), out["Points"])
+    out["Predictions"] = pd.to_numeric(out["Predictions"], errors="coerce").fillna(0).astype(int)
+    out["Points"] = pd.to_numeric(out["Points"], errors="coerce").fillna(0).astype(int)
+    out = out.drop(columns=[c for c in ["Predictions_ovr", "Points_ovr"] if c in out.columns], errors="ignore")
+    out = out.sort_values(["Points", "Predictions", "Exact"], ascending=[False, True, False]).reset_index(drop=True)
+    return out
+
+# Ranked leaderboard: rows in leaderboard order (Points desc, Predictions
+# asc, Exact desc) with competition ranks, so players tied on all three
+# share a rank and the next one skips (1, 2, 2, 4). The sort keys are kept
+# as one ascending list: a rank is bisect_left on it, a player's rank is a
+# dict hit plus that bisect, and top() / around() build only the rows shown.
+LEADERBOARD_TOP_K = int(secret("LEADERBOARD_TOP_K", 50))
+LEADERBOARD_WINDOW = int(secret("LEADERBOARD_WINDOW", 2))
+
+class RankedBoard:
+    def __init__(self, lb: pd.DataFrame):
+        self.frame = lb.sort_values(["Points", "Predictions", "Exact"], ascending=[False, True, False],
+                                    kind="stable").reset_index(drop=True)
+        self._keys = list(zip((-self.frame["Points"]).tolist(), self.frame["Predictions"].tolist(),
+                              (-self.frame["Exact"]).tolist()))
+        self._pos = {str(u): i for i, u in enumerate(self.frame["User"])}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def rank_at(self, i: int) -> int:
+        return bisect.bisect_left(self._keys, self._keys[i]) + 1
+
+    def rank(self, user) -> int | None:
+        i = self._pos.get(str(user))
+        return None if i is None else self.rank_at(i)
+
+    def rank_for(self, points: int, predictions: int, exact: int) -> int:
+        """Rank a player with these totals would have (ahead of nobody they tie with)."""
+        return bisect.bisect_left(self._keys, (-points, predictions, -exact)) + 1
+
+    def rows(self, start: int, stop: int) -> pd.DataFrame:
+        start, stop = max(0, start), min(stop, len(self))
+        out = self.frame.iloc[start:stop].copy()
+        out.insert(0, "Rank", [self.rank_at(i) for i in range(start, max(start, stop))])
+        return out
+
+    def top(self, k: int) -> pd.DataFrame:
+        return self.rows(0, k)
+
+    def around(self, user, radius: int = LEADERBOARD_WINDOW) -> pd.DataFrame:
+        i = self._pos.get(str(user))
+        return self.rows(0, 0) if i is None else self.rows(i - radius, i + radius + 1)
+
+    def top_and_around(self, user, k: int = LEADERBOARD_TOP_K, radius: int = LEADERBOARD_WINDOW) -> pd.DataFrame:
+        """Top k rows, then the rows around user when they are further down."""
+        i = self._pos.get(str(user))
+        if i is None or i - radius <= k:
+            return self.rows(0, k if i is None else max(k, i + radius + 1))
+        return pd.concat([self.top(k), self.around(user, radius)])
+
+def ranked_leaderboard() -> RankedBoard:
+    """Season leaderboard (with overrides) as a RankedBoard.
+
+    Kept next to the materialized view and rebuilt only when its event log
+    moved, so a rank lookup on an unchanged season is a few stat() calls.
+    """
+    store = _lb_store(GAME.DATA_DIR)
+    with store["lock"]:
+        state = _lb_synced(store)
+        key = (state["log_id"], state["seq"])
+        ranked = store.get("ranked")
+        if ranked is None or ranked[0] != key:
+            ranked = store["ranked"] = (key, RankedBoard(_lb_frame(state, True)))
+        return ranked[1]
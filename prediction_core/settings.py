@@ -0,0 +1,65 @@
+"""Secrets and process-wide settings, read without Streamlit."""
+import json, os, re, tomllib
+from functools import lru_cache
+from pathlib import Path
+
+# Secrets come from the same secrets.toml files Streamlit reads (the user's
+# ~/.streamlit/ first, then the project's .streamlit/, which wins), then from
+# environment variables, so the app, the CLI and workers see the same values.
+SECRETS_FILES = [
+    os.path.join(Path.home(), ".streamlit", "secrets.toml"),
+    os.path.join(".streamlit", "secrets.toml"),
+]
+
+@lru_cache(maxsize=1)
+def _secrets_files() -> dict:
+    out = {}
+    for path in SECRETS_FILES:
+        try:
+            with open(path, "rb") as f:
+                out.update(tomllib.load(f))
+        except Exception:
+            pass
+    return out
+
+def secret(name: str, default=None):
+    val = _secrets_files().get(name)
+    if val is None:
+        val = os.environ.get(name)
+    return default if val is None else val
+
+# Tenants: one process can host several independent games. TENANTS (secret,
+# env var or tenants.json next to the app) maps a game id to its settings,
+# e.g. {"office": {"admin_password": "...", "title": "Office Cup"}}. A game is
+# picked with ?game=<id> (or DEFAULT_TENANT) and keeps all of its files under
+# tenants/<id>/. Logos fetched from URLs are cached once in the shared logos/
+# folder. Without TENANTS the app is a single game stored in BASE_DIR.
+BASE_DIR = "."
+SHARED_LOGO_DIR = os.path.join(BASE_DIR, "logos")
+
+def load_tenants() -> dict:
+    raw = secret("TENANTS")
+    path = os.path.join(BASE_DIR, "tenants.json")
+    if raw is None and os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = f.read()
+        except Exception:
+            raw = None
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except Exception:
+            raw = None
+    out = {}
+    if hasattr(raw, "items"):
+        for tid, cfg in raw.items():
+            if re.fullmatch(r"[A-Za-z0-9_-]{1,40}", str(tid)):
+                out[str(tid)] = dict(cfg) if hasattr(cfg, "items") else {}
+    return out
+
+TENANTS = load_tenants()
+MAX_ACTIVE_TENANTS = max(1, min(len(TENANTS), int(secret("MAX_ACTIVE_TENANTS", 16))))
+
+def tenant_data_dir(tenant_id: str) -> str:
+    return os.path.join(BASE_DIR, "tenants", tenant_id) if tenant_id in TENANTS else BASE_DIR
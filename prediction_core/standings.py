@@ -0,0 +1,149 @@
+"""Pre-rendered standings pages in English and Arabic for TV displays and sharing."""
+import hashlib, html, os, threading
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from .game import GAME, tenant_store, tenant_worker
+from .i18n import tr
+from .settings import TENANTS, secret
+from .storage import _file_sig, _read_json, _write_json_atomic
+from .scoring import RankedBoard, _apply_overrides_to_lb, leaderboard_slice, rank_medal
+
+# Standings pages: public/standings.en.html and public/standings.ar.html are
+# plain files, so serving them costs a file read (any web server can serve
+# public/ as-is; the spectator feed serves /standings.<lang>.html).
+# publish_standings() compares the signatures of the files the standings are
+# built from (predictions, users, matches, match history, overrides, season
+# name) with the last run and only re-renders when they moved and the
+# standings they produce differ from the published ones. The app calls it
+# from a background thread every STANDINGS_CHECK_SECONDS (0 turns that off),
+# never from a page render; the CLI calls it after each change it makes.
+STANDINGS_LANGS = ("en", "ar")
+STANDINGS_MAX_ROWS = int(secret("STANDINGS_MAX_ROWS", 100))
+STANDINGS_REFRESH_SECONDS = int(secret("STANDINGS_REFRESH_SECONDS", 60))
+STANDINGS_CHECK_SECONDS = float(secret("STANDINGS_CHECK_SECONDS", 30))
+STANDINGS_TZ = str(secret("STANDINGS_TZ", "Asia/Riyadh"))
+STANDINGS_CSS = (
+    "body{font-family:system-ui,'Segoe UI',Tahoma,sans-serif;margin:2rem auto;max-width:60rem;padding:0 1rem;"
+    "background:#0e1117;color:#fafafa}h1{margin:0}h2{font-weight:400;opacity:.8;margin:.25rem 0 1.5rem}"
+    "table{border-collapse:collapse;width:100%;font-size:1.15rem}th,td{padding:.45rem .7rem;text-align:start}"
+    "th{border-bottom:2px solid #444}tr:nth-child(even){background:#1a1d24}td.n{text-align:end}"
+    "tr.top td{font-weight:600}footer{margin-top:1rem;opacity:.6;font-size:.9rem}"
+)
+
+def season_standings() -> pd.DataFrame:
+    """Season leaderboard with overrides applied and a tie-aware Rank column.
+
+    Summed from the points cube, so it only reads the data dir; the order
+    is that of materialized_leaderboard(with_overrides=True).
+    """
+    board = RankedBoard(_apply_overrides_to_lb(leaderboard_slice()))
+    return board.top(len(board))
+
+def standings_page_path(lang: str) -> str:
+    return os.path.join(GAME.PUBLIC_DIR, f"standings.{lang}.html")
+
+def _standings_stamp_path() -> str:
+    return os.path.join(GAME.PUBLIC_DIR, "standings.json")
+
+def _standings_sigs() -> list:
+    files = (GAME.PREDICTIONS_FILE, GAME.USERS_FILE, GAME.MATCHES_FILE, GAME.MATCH_HISTORY_FILE,
+             GAME.LEADERBOARD_OVERRIDES_FILE, GAME.SEASON_FILE)
+    return [list(s) if s else None for s in map(_file_sig, files)]
+
+def _season_name() -> str:
+    try:
+        with open(GAME.SEASON_FILE, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except Exception:
+        return ""
+
+def render_standings_html(lb: pd.DataFrame, lang: str, season: str = "", updated: str = "") -> str:
+    esc = html.escape
+    game_title = str(TENANTS.get(GAME.TENANT_ID, {}).get("title") or "")
+    heading = game_title or tr(lang, "app_title")
+    sub = f"{season} — {tr(lang, 'leaderboard')}" if season else tr(lang, "leaderboard")
+    cols = [("lb_rank", ""), ("lb_user", ""), ("lb_preds", "n"), ("lb_exact", "n"), ("lb_outcome", "n"), ("lb_points", "n")]
+    head = "".join(f'<th{f" class={c}" if c else ""}>{esc(tr(lang, key))}</th>' for key, c in cols)
+    rows = []
+    for r in lb.head(STANDINGS_MAX_ROWS).itertuples(index=False):
+        rank = int(r.Rank)
+        rows.append(
+            f'<tr{" class=top" if rank <= 3 else ""}><td>{f"{rank} {rank_medal(rank)}".rstrip()}</td><td>{esc(str(r.User))}</td>'
+            f'<td class="n">{int(r.Predictions)}</td><td class="n">{int(r.Exact)}</td>'
+            f'<td class="n">{int(r.Outcome)}</td><td class="n">{int(r.Points)}</td></tr>'
+        )
+    body = (f"<table><thead><tr>{head}</tr></thead><tbody>{''.join(rows)}</tbody></table>" if rows
+            else f"<p>{esc(tr(lang, 'no_scores_yet'))}</p>")
+    refresh = f'<meta http-equiv="refresh" content="{STANDINGS_REFRESH_SECONDS}">' if STANDINGS_REFRESH_SECONDS > 0 else ""
+    return (
+        f'<!doctype html><html lang="{lang}" dir="{"rtl" if lang == "ar" else "ltr"}"><head><meta charset="utf-8">'
+        f'<meta name="viewport" content="width=device-width,initial-scale=1">{refresh}'
+        f"<title>{esc(heading)} — {esc(tr(lang, 'leaderboard'))}</title><style>{STANDINGS_CSS}</style></head>"
+        f"<body><h1>{esc(heading)}</h1><h2>{esc(sub)}</h2>{body}"
+        f"<footer>{esc(tr(lang, 'standings_updated', time=updated))}</footer></body></html>\n"
+    )
+
+def _write_text_atomic(path: str, text: str):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+@tenant_store(lambda state: state.update(sigs=None))
+def _standings_state(data_dir: str) -> dict:
+    return {"lock": threading.Lock(), "sigs": None, "last_error": None}
+
+def publish_standings(force: bool = False) -> bool:
+    """Re-render the standings pages if results changed; True when written."""
+    state = _standings_state(os.path.abspath(GAME.DATA_DIR))
+    sigs = _standings_sigs()
+    if not force and sigs == state["sigs"]:
+        return False
+    if not state["lock"].acquire(blocking=False):
+        return False
+    try:
+        pages = {lang: standings_page_path(lang) for lang in STANDINGS_LANGS}
+        stamp = _read_json(_standings_stamp_path(), {})
+        have_pages = all(os.path.exists(p) for p in pages.values())
+        if not force and have_pages and stamp.get("sigs") == sigs:
+            state["sigs"] = sigs
+            return False
+        lb = season_standings()
+        season = _season_name()
+        digest = hashlib.sha1((season + "\n" + lb.head(STANDINGS_MAX_ROWS).to_csv(index=False)).encode("utf-8")).hexdigest()
+        written = force or not have_pages or stamp.get("digest") != digest
+        generated = stamp.get("generated")
+        if written:
+            os.makedirs(GAME.PUBLIC_DIR, exist_ok=True)
+            now = datetime.now(ZoneInfo(STANDINGS_TZ))
+            generated = now.isoformat(timespec="seconds")
+            for lang, path in pages.items():
+                _write_text_atomic(path, render_standings_html(lb, lang, season, now.strftime("%Y-%m-%d %H:%M")))
+        _write_json_atomic(_standings_stamp_path(), {"sigs": sigs, "digest": digest, "generated": generated})
+        state["sigs"], state["last_error"] = sigs, None
+        return written
+    except Exception as e:
+        state["last_error"] = str(e)
+        raise
+    finally:
+        state["lock"].release()
+
+def standings_status() -> dict:
+    state = _standings_state(os.path.abspath(GAME.DATA_DIR))
+    stamp = _read_json(_standings_stamp_path(), {})
+    return {"generated": stamp.get("generated"), "last_error": state["last_error"],
+            "pages": [standings_page_path(lang) for lang in STANDINGS_LANGS]}
+
+def _standings_loop(state: dict, stop: threading.Event):
+    while not stop.wait(max(1.0, STANDINGS_CHECK_SECONDS)):
+        try:
+            publish_standings()
+        except Exception:
+            pass  # kept in last_error by publish_standings, shown on the admin page
+
+@tenant_worker(_standings_loop, name="standings-publisher", enabled=STANDINGS_CHECK_SECONDS > 0)
+def _standings_publisher(data_dir: str) -> dict:
+    return {"lock": threading.Lock(), "running": STANDINGS_CHECK_SECONDS > 0}
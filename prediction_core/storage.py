@@ -0,0 +1,167 @@
+"""CSV/JSON file access, logos and small parsing helpers for the current game."""
+import hashlib, json, os, re
+from datetime import datetime
+from urllib.parse import urlparse
+
+import pandas as pd
+
+from .game import GAME
+from .instrument import metrics_inc, perf_span
+from .settings import BASE_DIR, SHARED_LOGO_DIR
+
+def normalize_digits(text: str) -> str:
+    if not isinstance(text, str):
+        return text
+    mapping = {
+        ord('٠'):'0', ord('١'):'1', ord('٢'):'2', ord('٣'):'3', ord('٤'):'4',
+        ord('٥'):'5', ord('٦'):'6', ord('٧'):'7', ord('٨'):'8', ord('٩'):'9',
+        ord('۰'):'0', ord('۱'):'1', ord('۲'):'2', ord('۳'):'3', ord('۴'):'4',
+        ord('۵'):'5', ord('۶'):'6', ord('۷'):'7', ord('۸'):'8', ord('۹'):'9',
+    }
+    text = text.translate(mapping).strip()
+    for ch in ['–','—','−','ـ','‒','﹘','﹣','－']:
+        text = text.replace(ch, '-')
+    return text
+
+def load_csv(file, cols):
+    with perf_span(f"load_csv:{os.path.basename(file)}") as io:
+        if os.path.exists(file) and os.path.getsize(file) > 0:
+            df = pd.read_csv(file)
+            if io is not None:
+                io["read"] = os.path.getsize(file)
+            for c in cols:
+                if c not in df.columns:
+                    df[c] = None
+            return df[cols]
+        return pd.DataFrame(columns=cols)
+
+def save_csv(df, file):
+    with perf_span(f"save_csv:{os.path.basename(file)}") as io:
+        df.to_csv(file, index=False)
+        if io is not None:
+            io["written"] = os.path.getsize(file)
+
+def load_overrides() -> pd.DataFrame:
+    return load_csv(GAME.LEADERBOARD_OVERRIDES_FILE, ["User","Predictions","Points"])
+
+def save_overrides(df: pd.DataFrame):
+    save_csv(df, GAME.LEADERBOARD_OVERRIDES_FILE)
+
+def parse_iso_dt(val):
+    try:
+        return datetime.fromisoformat(str(val)) if pd.notna(val) and val else None
+    except Exception:
+        return None
+
+def to_utc_series(values: pd.Series) -> pd.Series:
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        return values.dt.tz_convert("UTC")
+    return pd.to_datetime(values, errors="coerce", utc=True, format="ISO8601")
+
+def _filename_from_url(url: str) -> str:
+    parsed = urlparse(url)
+    base = os.path.basename(parsed.path) or "logo.png"
+    ext = os.path.splitext(base)[1] or ".png"
+    stem = hashlib.md5(url.encode()).hexdigest()
+    return f"{stem}{ext}"
+
+def cache_logo_from_url(url: str) -> str | None:
+    if not (isinstance(url, str) and url.lower().startswith(("http://","https://"))):
+        return None
+    try:
+        fname = _filename_from_url(url)
+        path = os.path.join(SHARED_LOGO_DIR, fname)
+        if os.path.exists(path):
+            metrics_inc("cache_requests_total", cache="logos", result="hit")
+            return path
+        metrics_inc("cache_requests_total", cache="logos", result="miss")
+        import requests
+        with perf_span("logo_fetch") as io:
+            r = requests.get(url, timeout=12)
+            r.raise_for_status()
+            with open(path, "wb") as f:
+                f.write(r.content)
+            if io is not None:
+                io["written"] = len(r.content)
+        return path
+    except Exception:
+        return None
+
+def save_uploaded_logo(file, name_hint: str) -> str | None:
+    try:
+        ext = os.path.splitext(file.name)[1] or ".png"
+        safe = re.sub(r"[^A-Za-z0-9_-]+", "_", name_hint or "logo")
+        path = os.path.join(GAME.LOGO_DIR, f"{safe}{ext}")
+        with open(path, "wb") as f:
+            f.write(file.read())
+        return path
+    except Exception:
+        return None
+
+def _load_team_logos() -> dict:
+    if os.path.exists(GAME.TEAM_LOGOS_FILE) and os.path.getsize(GAME.TEAM_LOGOS_FILE) > 0:
+        try:
+            with open(GAME.TEAM_LOGOS_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+    return {}
+
+def _save_team_logos(mapping: dict):
+    try:
+        with open(GAME.TEAM_LOGOS_FILE, "w", encoding="utf-8") as f:
+            json.dump(mapping, f, ensure_ascii=False, indent=2)
+    except Exception:
+        pass
+
+def save_team_logo(team: str, logo_path_or_url: str | None):
+    if not team or not logo_path_or_url:
+        return
+    logos = _load_team_logos()
+    logos[team] = logo_path_or_url
+    _save_team_logos(logos)
+
+def get_saved_logo(team: str) -> str | None:
+    logos = _load_team_logos()
+    if (team or "") not in logos and GAME.TEAM_LOGOS_FILE != os.path.join(BASE_DIR, "team_logos.json"):
+        logos = _read_json(os.path.join(BASE_DIR, "team_logos.json"), {})
+    return logos.get(team or "", None)
+
+def ensure_history_schema(df: pd.DataFrame) -> pd.DataFrame:
+    cols = ["Match","Kickoff","Result","HomeLogo","AwayLogo","BigGame","RealWinner","Occasion","OccasionLogo","Round","CompletedAt"]
+    if df.empty:
+        return pd.DataFrame(columns=cols)
+    for c in cols:
+        if c not in df.columns:
+            df[c] = None
+    return df[cols]
+
+def _file_sig(path):
+    try:
+        s = os.stat(path)
+        return (s.st_mtime_ns, s.st_size)
+    except OSError:
+        return None
+
+def _append_rows(path: str, df: pd.DataFrame, cols: list):
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        df.reindex(columns=cols).to_csv(path, mode="a", header=False, index=False)
+    else:
+        save_csv(df.reindex(columns=cols), path)
+
+def _append_row(path: str, rec: dict, cols: list):
+    _append_rows(path, pd.DataFrame([rec], columns=cols), cols)
+
+def _write_json_atomic(path: str, obj):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def _read_json(path: str, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return default